@@ -1,59 +1,33 @@
-from machine import Pin, SPI
-from ili9341 import ILI9341
-import framebuf, time, gc, math
+import gfxcore as gfx
+from gfxcore import W, H, rgb565, S, sin_deg, cos_deg
 from array import array
+import math
+from kernels import mat_yxz, xform, XF_PAR, cull, depth_bins, DB_PAR
+from dirty import Damage
+from layers import RowLayer
+from mesh import load
+from scene import Scene, run
+import prof
 
 # =========================
-# CONFIG (tu setup)
+# CONFIG
 # =========================
-PIN_SCK  = 6
-PIN_MOSI = 7
-PIN_CS   = 13
-PIN_RST  = 14
-PIN_DC   = 15
-
-SPI_BAUD = 40_000_000
-ROTATION = 3
-BGR      = True
-
 FRAME_MS = 25
 
-# Kill switch: GP22 a GND (salida garantizada)
-KILL_PIN = 22
-kill = Pin(KILL_PIN, Pin.IN, Pin.PULL_UP)
-
-# ✅ FIX CLAVE PARA TU "FONDO VERDE"
-# Si ves el navy como verde, deja esto en True.
-# Si por alguna razón se te invierte, ponlo en False.
-SWAP_BYTES = True
+# Blit parcial: la cuadrícula no cambia, solo se manda la caja del avión
+PARTIAL_BLIT = True
 
-def rgb565(r, g, b):
-    # RGB565 estándar
-    v = ((r & 0xF8) << 8) | ((g & 0xFC) << 3) | (b >> 3)
-    # swap para cuando el framebuffer se manda byte-reversed
-    if SWAP_BYTES:
-        v = ((v & 0xFF) << 8) | (v >> 8)
-    return v
+# Cuadrícula como capa estática: se dibuja una vez y cada frame solo se
+# restaura bajo lo que ensuciaron los 2 frames anteriores (doble buffer)
+GRID_LAYER = True
 
-# =========================
-# INIT display + framebuffer
-# =========================
-spi = SPI(0, baudrate=SPI_BAUD, polarity=0, phase=0,
-          sck=Pin(PIN_SCK), mosi=Pin(PIN_MOSI))
+# Malla pre-armada (python sim/export_mesh.py); si no está en la flash se
+# arma en el arranque con build_airliner() (más lento)
+MESH_FILE = "airliner.msh"
 
-tft = ILI9341(spi, cs=PIN_CS, dc=PIN_DC, rst=PIN_RST,
-              width=240, height=320, rotation=ROTATION, bgr=BGR)
-
-W = tft.width
-H = tft.height
-
-buf = bytearray(W * H * 2)
-fb  = framebuf.FrameBuffer(buf, W, H, framebuf.RGB565)
-
-def blit():
-    tft._begin_write(0, 0, W - 1, H - 1)
-    tft.spi.write(buf)
-    tft._end_write()
+# Aristas de atrás (todas sus caras de espaldas): 0 = se dibujan igual,
+# 1 = una línea tenue (BACK_COL), 2 = no se dibujan
+CULL = 1
 
 # =========================
 # COLORS (blueprint navy)
@@ -63,56 +37,59 @@ GRID_MINOR  = rgb565(0, 20, 70)
 GRID_MAJOR  = rgb565(0, 35, 120)
 AXIS_COL    = rgb565(0, 55, 170)
 
-GLOW_FAR    = rgb565(0, 70, 95)
-GLOW_NEAR   = rgb565(0, 210, 255)
+GLOW_FAR_RGB  = (0, 70, 95)
+GLOW_NEAR_RGB = (0, 210, 255)
+GLOW_FAR    = rgb565(*GLOW_FAR_RGB)
+GLOW_NEAR   = rgb565(*GLOW_NEAR_RGB)
 LINE_WHITE  = rgb565(255, 255, 255)
 TEXT_COL    = rgb565(200, 220, 255)
+BACK_COL    = rgb565(0, 40, 90)      # aristas ocultas (CULL = 1)
 
 # =========================
-# TRIG LUT (fixed)
+# Profundidad: bins de zavg, se dibujan de lejos a cerca
 # =========================
-S = 1024
-sinLUT = array('h', [0]*360)
-for a in range(360):
-    sinLUT[a] = int(math.sin(a * math.pi / 180.0) * S)
-
-def sin_deg(a): return sinLUT[a % 360]
-def cos_deg(a): return sinLUT[(a + 90) % 360]
+# bin = (zavg - DEPTH_ZMIN) >> DEPTH_SHIFT; cada bin tiene su glow
+# (degradé GLOW_NEAR -> GLOW_FAR) y los más cercanos (zavg < -32) llevan
+# el glow doble.
+DEPTH_BINS  = 16
+DEPTH_SHIFT = 5
+DEPTH_ZMIN  = -256
+THICK_BINS  = (-32 - DEPTH_ZMIN) >> DEPTH_SHIFT
+
+def _glow_lut():
+    # centro del bin en -160..160 -> 0..255 (cerca..lejos)
+    lut = array('H', [0] * DEPTH_BINS)
+    for b in range(DEPTH_BINS):
+        z = DEPTH_ZMIN + (b << DEPTH_SHIFT) + (1 << (DEPTH_SHIFT - 1))
+        t = ((z + 160) * 255) // 320
+        if t < 0: t = 0
+        if t > 255: t = 255
+        c = [n + ((f - n) * t) // 255 for n, f in zip(GLOW_NEAR_RGB, GLOW_FAR_RGB)]
+        lut[b] = rgb565(c[0], c[1], c[2])
+    return lut
+
+GLOW_BIN = _glow_lut()
 
 # =========================
 # 3D helpers (fixed-point)
 # =========================
-def rot_x(x, y, z, cx, sx):
-    y1 = (y * cx - z * sx) // S
-    z1 = (y * sx + z * cx) // S
-    return x, y1, z1
-
-def rot_y(x, y, z, cy, sy):
-    x1 = (x * cy + z * sy) // S
-    z1 = (-x * sy + z * cy) // S
-    return x1, y, z1
-
-def rot_z(x, y, z, cz, sz):
-    x1 = (x * cz - y * sz) // S
-    y1 = (x * sz + y * cz) // S
-    return x1, y1, z
-
 CAM_Z = 360
 FOV   = 230
+DEN_MIN = 120
 
+# Referencia de la proyección; por frame lo hace kernels.xform
 def project(x, y, z, cx2d, cy2d):
     den = CAM_Z + z
-    if den < 120:
-        den = 120
+    if den < DEN_MIN:
+        den = DEN_MIN
     sx2d = cx2d + (x * FOV) // den
     # ✅ Y hacia arriba (timón ya no se “cae”)
     sy2d = cy2d - (y * FOV) // den
     return sx2d, sy2d
 
-def blueprint_line(x0, y0, x1, y1, zavg):
-    glow = GLOW_NEAR if zavg < 0 else GLOW_FAR
+def blueprint_line(fb, x0, y0, x1, y1, glow, thick):
     fb.line(x0, y0, x1, y1, glow)
-    if zavg < -40:
+    if thick:
         fb.line(x0+1, y0, x1+1, y1, glow)  # glow extra cerca
         fb.line(x0, y0+1, x1, y1+1, glow)
     fb.line(x0, y0, x1, y1, LINE_WHITE)
@@ -120,7 +97,7 @@ def blueprint_line(x0, y0, x1, y1, zavg):
 # =========================
 # Blueprint grid
 # =========================
-def draw_grid():
+def draw_grid(fb):
     fb.fill(BG)
 
     step = 20
@@ -154,6 +131,22 @@ def build_airliner():
 
     verts = []
     edges = []
+    faces = []     # quads (a, b, c, d), orientados hacia afuera
+
+    def quad(a, b, c, d, ax, ay):
+        # cara de un tubo con eje (ax, ay, z): si la normal (diagonal x
+        # diagonal) apunta hacia el eje, se invierte el orden
+        va = verts[a]; vb = verts[b]; vc = verts[c]; vd = verts[d]
+        d1 = (vc[0] - va[0], vc[1] - va[1], vc[2] - va[2])
+        d2 = (vd[0] - vb[0], vd[1] - vb[1], vd[2] - vb[2])
+        nx = d1[1] * d2[2] - d1[2] * d2[1]
+        ny = d1[2] * d2[0] - d1[0] * d2[2]
+        mx = (va[0] + vb[0] + vc[0] + vd[0]) / 4 - ax
+        my = (va[1] + vb[1] + vc[1] + vd[1]) / 4 - ay
+        if nx * mx + ny * my < 0:
+            faces.append((a, d, c, b))
+        else:
+            faces.append((a, b, c, d))
 
     for ri in range(RINGS):
         z = z_list[ri]
@@ -178,6 +171,7 @@ def build_airliner():
             if ri < RINGS - 1:
                 c = vid(ri+1, si)
                 edges.append((a, c))
+                quad(a, b, vid(ri+1, si+1), c, 0, 0)
 
     # ===== Alas =====
     root_ring = 7
@@ -264,80 +258,185 @@ def build_airliner():
                 edges.append((ev(ri, si), ev(ri, si+1)))
                 if ri < ENG_RINGS - 1:
                     edges.append((ev(ri, si), ev(ri+1, si)))
+                    quad(ev(ri, si), ev(ri, si+1), ev(ri+1, si+1), ev(ri+1, si), xc, yc)
 
         edges.append((ev(1, 0), pylon_to))
 
     add_engine(-40, -22, z_root - 22, i_wml2)
     add_engine( 40, -22, z_root - 22, i_wmr2)
 
-    return verts, edges
-
-verts_list, edges_list = build_airliner()
-NV = len(verts_list)
-NE = len(edges_list)
-
-VX = array('h', [v[0] for v in verts_list])
-VY = array('h', [v[1] for v in verts_list])
-VZ = array('h', [v[2] for v in verts_list])
-
-EA = array('H', [e[0] for e in edges_list])
-EB = array('H', [e[1] for e in edges_list])
-
-PX = array('h', [0]*NV)
-PY = array('h', [0]*NV)
-PZ = array('h', [0]*NV)
+    # alas, cola y timón son planos (se ven de los 2 lados): sin caras
+    return verts, edges, faces
+
+def face_tables(verts, edges, faces):
+    # normal (x S) y centro de cada cara + las 2 caras de cada arista
+    nf = len(faces)
+    NX = array('h', [0] * nf); NY = array('h', [0] * nf); NZ = array('h', [0] * nf)
+    CX = array('h', [0] * nf); CY = array('h', [0] * nf); CZ = array('h', [0] * nf)
+    owner = {}
+    for f in range(nf):
+        q = faces[f]
+        va = verts[q[0]]; vb = verts[q[1]]; vc = verts[q[2]]; vd = verts[q[3]]
+        d1 = (vc[0] - va[0], vc[1] - va[1], vc[2] - va[2])
+        d2 = (vd[0] - vb[0], vd[1] - vb[1], vd[2] - vb[2])
+        nx = d1[1] * d2[2] - d1[2] * d2[1]
+        ny = d1[2] * d2[0] - d1[0] * d2[2]
+        nz = d1[0] * d2[1] - d1[1] * d2[0]
+        ln = math.sqrt(nx * nx + ny * ny + nz * nz) or 1
+        NX[f] = int(nx * S / ln); NY[f] = int(ny * S / ln); NZ[f] = int(nz * S / ln)
+        CX[f] = (va[0] + vb[0] + vc[0] + vd[0]) // 4
+        CY[f] = (va[1] + vb[1] + vc[1] + vd[1]) // 4
+        CZ[f] = (va[2] + vb[2] + vc[2] + vd[2]) // 4
+        for i in range(4):
+            a = q[i]; b = q[(i + 1) & 3]
+            owner.setdefault((a, b) if a < b else (b, a), []).append(f)
+
+    ne = len(edges)
+    EF0 = array('H', [0xFFFF] * ne)
+    EF1 = array('H', [0xFFFF] * ne)
+    for e in range(ne):
+        a, b = edges[e]
+        fs = owner.get((a, b) if a < b else (b, a), ())
+        if len(fs) > 0: EF0[e] = fs[0]
+        if len(fs) > 1: EF1[e] = fs[1]
+    return (NX, NY, NZ, CX, CY, CZ), (EF0, EF1)
+
+def airliner_tables():
+    # build_airliner() -> los arrays de mesh.load(): (src, edges, fc, ed)
+    verts, edges, faces = build_airliner()
+    src = (array('h', [v[0] for v in verts]),
+           array('h', [v[1] for v in verts]),
+           array('h', [v[2] for v in verts]))
+    ea = (array('H', [e[0] for e in edges]),
+          array('H', [e[1] for e in edges]))
+    fc, ed = face_tables(verts, edges, faces)
+    return src, ea, fc, ed
 
 # =========================
-# LOOP
+# Escena
 # =========================
-try:
-    time.sleep(1)
-
-    cx2d = W // 2
-    cy2d = H // 2 + 8
-
-    frame = 0
-    while True:
-        t0 = time.ticks_ms()
-
-        if not kill.value():
-            raise KeyboardInterrupt
-
-        draw_grid()
+class Airliner(Scene):
+    FRAME_MS = FRAME_MS
+
+    def init(self):
+        try:
+            src, edges, self.fc, self.ed = load(MESH_FILE)
+        except (OSError, ValueError):
+            # sin .msh (o corto, de otro formato o con índices fuera de
+            # rango): se arma aquí
+            src, edges, self.fc, self.ed = airliner_tables()
+        self.VX, self.VY, self.VZ = src
+        self.EA, self.EB = edges
+        NV = len(self.VX)
+        self.NV = NV
+        self.NE = len(self.EA)
+
+        self.PX = array('h', [0]*NV)
+        self.PY = array('h', [0]*NV)
+        self.PZ = array('h', [0]*NV)
+
+        # kernel: (VX,VY,VZ) -> (PX,PY,PZ) + bbox en par[16:20]
+        self.src = (self.VX, self.VY, self.VZ)
+        self.dst = (self.PX, self.PY, self.PZ)
+        par = array('i', [0] * XF_PAR)
+        par[10] = W // 2
+        par[11] = H // 2 + 8
+        par[12] = CAM_Z
+        par[13] = FOV
+        par[14] = DEN_MIN
+        par[15] = 1          # Y hacia arriba
+        self.par = par
+
+        # caras del fuselaje/motores (fc / ed): de frente / de espaldas por frame
+        self.cv = (bytearray(len(self.fc[0])), bytearray(self.NE))
+
+        # draw list por profundidad (prealocado)
+        self.ed2 = (self.EA, self.EB)
+        self.bins = (array('H', [0] * self.NE), array('H', [0] * (DEPTH_BINS + 1)),
+                     array('H', [0] * DEPTH_BINS), bytearray(self.NE))
+        bpar = array('i', [0] * DB_PAR)
+        bpar[0] = self.NE
+        bpar[1] = DEPTH_ZMIN
+        bpar[2] = DEPTH_SHIFT
+        bpar[3] = DEPTH_BINS
+        self.bpar = bpar
+
+        self.dmg = Damage(W, H) if PARTIAL_BLIT else None
+        self.frame = 0
+
+        # cuadrícula -> filas plantilla (None: se dibuja cada frame)
+        self.grid = None
+        if GRID_LAYER:
+            draw_grid(gfx.fb)
+            lay = RowLayer(W, H)
+            if lay.capture(gfx.buf):
+                self.grid = lay
+        # cajas del avión de los 2 frames anteriores (x0, y0, x1, y1) x 2;
+        # los 2 primeros frames restauran todo (cada buffer una vez)
+        self.boxes = array('h', [0] * 8)
+        self.fresh = 2
+
+    def update(self, frame):
+        self.frame = frame
+
+    def render(self, fb):
+        PX = self.PX; PY = self.PY; PZ = self.PZ
+        EA = self.EA; EB = self.EB
+        par = self.par
+        frame = self.frame
+
+        grid = self.grid
+        if grid is None:
+            draw_grid(fb)
+        elif self.fresh:
+            grid.restore_all(gfx.buf)
+            self.fresh -= 1
+        else:
+            # lo que dibujó este buffer: caja de hace 1 y 2 frames + HUD
+            bb = self.boxes
+            grid.restore(gfx.buf, min(bb[0], bb[4]), min(bb[1], bb[5]),
+                         max(bb[2], bb[6]), max(bb[3], bb[7]))
+            if prof.ENABLED and prof.HUD:
+                grid.restore(gfx.buf, 6, 6, 6 + prof.HUD_W * 8 - 1, 6 + 17)
+        prof.mark(prof.RASTER)
 
         yaw   = (frame * 3) % 360
         t     = (frame * 2) % 360
         pitch = 8 + (sin_deg(t) * 10) // S
         roll  = (sin_deg((t*2) % 360) * 22) // S
 
-        cy = cos_deg(yaw);   sy = sin_deg(yaw)
-        cx = cos_deg(pitch); sx = sin_deg(pitch)
-        cz = cos_deg(roll);  sz = sin_deg(roll)
-
-        z_bob = (sin_deg((frame*3) % 360) * 22) // S
-
-        for i in range(NV):
-            x = VX[i]; y = VY[i]; z = VZ[i]
-            x,y,z = rot_y(x,y,z, cy,sy)
-            x,y,z = rot_x(x,y,z, cx,sx)
-            x,y,z = rot_z(x,y,z, cz,sz)
-            z = z + z_bob
-
-            PZ[i] = z
-            sx2d, sy2d = project(x, y, z, cx2d, cy2d)
-            PX[i] = sx2d
-            PY[i] = sy2d
-
-        # 2 pasadas: lejos primero, cerca al final (se ve más 3D)
-        for pass_id in (0, 1):
-            for k in range(NE):
+        # yaw -> pitch -> roll en una sola matriz por frame
+        mat_yxz(par, cos_deg(yaw), sin_deg(yaw),
+                cos_deg(pitch), sin_deg(pitch),
+                cos_deg(roll), sin_deg(roll))
+
+        # z_bob
+        par[9] = (sin_deg((frame*3) % 360) * 22) // S
+
+        # matriz + project de todos los vértices
+        xform(self.src, self.dst, par, self.NV)
+        bx0 = par[16]; by0 = par[17]
+        bx1 = par[18]; by1 = par[19]
+
+        # EV[k] = 1: la arista solo toca caras de espaldas
+        cull_mode = CULL
+        if cull_mode:
+            cull(self.fc, self.ed, self.cv, par)
+        EV = self.cv[1]
+
+        # aristas por bin de profundidad, una sola pasada
+        depth_bins(self.ed2, PZ, self.bins, self.bpar)
+        ORDER = self.bins[0]; START = self.bins[1]
+
+        prof.mark(prof.GEOM)
+
+        # lejos primero, cerca al final (se ve más 3D)
+        for bn in range(DEPTH_BINS - 1, -1, -1):
+            glow = GLOW_BIN[bn]
+            thick = bn < THICK_BINS
+            for j in range(START[bn], START[bn + 1]):
+                k = ORDER[j]
                 a = EA[k]; b = EB[k]
-                zavg = (PZ[a] + PZ[b]) // 2
-
-                if pass_id == 0 and zavg < 0:
-                    continue
-                if pass_id == 1 and zavg >= 0:
-                    continue
 
                 x0 = PX[a]; y0 = PY[a]
                 x1 = PX[b]; y1 = PY[b]
@@ -345,23 +444,37 @@ try:
                 if (x0 < -50 and x1 < -50) or (x0 > W+50 and x1 > W+50): continue
                 if (y0 < -50 and y1 < -50) or (y0 > H+50 and y1 > H+50): continue
 
-                blueprint_line(x0, y0, x1, y1, zavg)
+                if cull_mode and EV[k]:
+                    # oculta: nada (CULL = 2) o una línea tenue (CULL = 1)
+                    if cull_mode == 1:
+                        fb.line(x0, y0, x1, y1, BACK_COL)
+                    continue
 
-        fb.text("", 6, 6, TEXT_COL)
-        fb.text("", 6, 16, TEXT_COL)
+                blueprint_line(fb, x0, y0, x1, y1, glow, thick)
 
-        blit()
+        # HUD (fps / ms por fase / heap con prof.enable())
+        prof.hud(fb, 6, 6, TEXT_COL, self.dmg)
 
-        dt = time.ticks_diff(time.ticks_ms(), t0)
-        if dt < FRAME_MS:
-            time.sleep_ms(FRAME_MS - dt)
-        else:
-            time.sleep_ms(1)
+        # +2 px por el glow extra de blueprint_line
+        bb = self.boxes
+        bb[4] = bb[0]; bb[5] = bb[1]; bb[6] = bb[2]; bb[7] = bb[3]
+        bb[0] = bx0 - 2; bb[1] = by0 - 2; bb[2] = bx1 + 2; bb[3] = by1 + 2
 
-        frame += 1
-        if (frame & 31) == 0:
-            gc.collect()
+        if self.dmg is not None:
+            self.dmg.mark(bx0 - 2, by0 - 2, bx1 + 2, by1 + 2)
 
-except KeyboardInterrupt:
-    fb.fill(0)
-    blit()
+    def teardown(self):
+        self.VX = self.VY = self.VZ = None
+        self.EA = self.EB = None
+        self.PX = self.PY = self.PZ = None
+        self.src = self.dst = self.par = None
+        self.dmg = None
+        self.grid = self.boxes = None
+        self.fc = self.ed = self.cv = None
+        self.ed2 = self.bins = self.bpar = None
+
+# =========================
+# LOOP
+# =========================
+if __name__ == "__main__":
+    run(Airliner())
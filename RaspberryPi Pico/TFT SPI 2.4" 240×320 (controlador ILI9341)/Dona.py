@@ -1,24 +1,17 @@
-from machine import Pin, SPI
-from ili9341 import ILI9341, color565
-import framebuf, time, gc
+from gfxcore import W, H, S, sin_deg, cos_deg
+from ili9341 import color565
 from array import array
-import math
+from kernels import mat_yxz, donut, DN_PAR, diff_cells, ink_cells
+from glyphs import Atlas
+from dirty import Damage, CellDamage
+from scene import Scene, run
+import prof
 
 # =========================
-# CONFIG (tu setup)
+# CONFIG
 # =========================
-PIN_SCK  = 6
-PIN_MOSI = 7
-PIN_CS   = 13
-PIN_RST  = 14
-PIN_DC   = 15
-
-SPI_BAUD = 40_000_000
-ROTATION = 3
-BGR      = True
-
-WIDTH  = 240
-HEIGHT = 320
+WIDTH  = W
+HEIGHT = H
 
 # FPS / Responsividad a Ctrl+C
 FRAME_MS = 30  # 30-40 recomendado
@@ -28,11 +21,14 @@ COLS = WIDTH  // 8   # 30
 ROWS = HEIGHT // 8   # 40
 
 # Donut detalle (más grande step = más rápido)
-THETA_STEP = 18
-PHI_STEP   = 12
+# Con las tablas + kernels.donut aguanta más muestras: antes 18 / 12
+THETA_STEP = 12
+PHI_STEP   = 8
+
+# muestras por frame (phi x theta); 6 tablas array('h') de NPTS
+NPTS = len(range(0, 360, PHI_STEP)) * len(range(0, 360, THETA_STEP))
 
 # Fixed-point
-S  = 1024
 R1 = 1 * S
 R2 = 2 * S
 K2 = 5 * S
@@ -51,44 +47,30 @@ CENTER_Y_OFF = -4
 SHOW_TITLE  = True
 TITLE_TEXT  = "ASCII DONUT // PICO"
 TITLE_Y_PIX = HEIGHT - 8  # abajo
+# filas de celdas que toca el título (se limpian al cambiar el color)
+TITLE_R0 = TITLE_Y_PIX // 8
+TITLE_R1 = min((TITLE_Y_PIX + 7) // 8, ROWS - 1) if SHOW_TITLE else TITLE_R0 - 1
 
 BG = color565(0, 0, 0)
 
-# =========================
-# INIT DISPLAY + FRAMEBUFFER
-# =========================
-spi = SPI(0, baudrate=SPI_BAUD, polarity=0, phase=0,
-          sck=Pin(PIN_SCK), mosi=Pin(PIN_MOSI))
-
-tft = ILI9341(spi, cs=PIN_CS, dc=PIN_DC, rst=PIN_RST,
-              width=WIDTH, height=HEIGHT, rotation=ROTATION, bgr=BGR)
-
-buf = bytearray(tft.width * tft.height * 2)
-fb = framebuf.FrameBuffer(buf, tft.width, tft.height, framebuf.RGB565)
-
-def blit_fullscreen():
-    tft._begin_write(0, 0, tft.width - 1, tft.height - 1)
-    tft.spi.write(buf)
-    tft._end_write()
-
-# =========================
-# LUT sin/cos (0..359) * S
-# =========================
-sinLUT = array('h', [0] * 360)
-for a in range(360):
-    sinLUT[a] = int(math.sin(a * math.pi / 180.0) * S)
+# Blit parcial: solo se manda lo que cambió
+PARTIAL_BLIT = True
+# True: celdas 8x8 cambiadas (runs por fila); False: franja de filas
+CELL_DIFF = True
 
-def sin_deg(a): return sinLUT[a % 360]
-def cos_deg(a): return sinLUT[(a + 90) % 360]
+# El color avanza cada COLOR_FRAMES frames, al mismo ritmo promedio.
+# Cambio de color = se redibujan y mandan las celdas con tinta y el
+# título; sin cambio, solo las celdas nuevas. 1 = un paso de paleta por
+# frame (el ciclo suave de siempre); con más se ahorran esos redibujos
+# pero el color salta (8 -> 24 entradas, hasta ~72 por canal).
+COLOR_FRAMES = 1
 
 # =========================
 # Shading ASCII
 # =========================
 SHADE = " .,-~:;=!*#$@"
 NLEV  = len(SHADE) - 1
-
-zbuf  = array('h', [0] * (COLS * ROWS))
-lines = [bytearray(b" " * COLS) for _ in range(ROWS)]
+SHADE_B = bytes(SHADE, "ascii")
 
 # Color neón para el texto
 PAL = array('H', [0] * 256)
@@ -116,133 +98,168 @@ for i in range(256):
     PAL[i] = color565(r, g, b)
 
 # =========================
-# Rotaciones fixed-point
-# =========================
-def rot_x(x, y, z, cx, sx):
-    y1 = (y * cx - z * sx) // S
-    z1 = (y * sx + z * cx) // S
-    return x, y1, z1
-
-def rot_z(x, y, z, cz, sz):
-    x1 = (x * cz - y * sz) // S
-    y1 = (x * sz + y * cz) // S
-    return x1, y1, z
-
-# =========================
-# Render
+# Escena
 # =========================
-def render_ascii_donut(A, B, text_color):
-    # limpia buffers
-    for i in range(COLS * ROWS):
-        zbuf[i] = 0
-    for r in range(ROWS):
-        ln = lines[r]
-        for c in range(COLS):
-            ln[c] = 32
-
-    cxA = cos_deg(A); sxA = sin_deg(A)
-    czB = cos_deg(B); szB = sin_deg(B)
-
-    # Centro para grid par: usar COLS//2, ROWS//2 y ajustar offsets
-    cx2 = (COLS // 2) + CENTER_X_OFF
-    cy2 = (ROWS // 2) + CENTER_Y_OFF
-
-    for phi in range(0, 360, PHI_STEP):
-        cph = cos_deg(phi)
-        sph = sin_deg(phi)
-
-        for th in range(0, 360, THETA_STEP):
-            cth = cos_deg(th)
-            sth = sin_deg(th)
-
-            circlex = R2 + (R1 * cth) // S
-            circley = (R1 * sth) // S
-
-            x = (circlex * cph) // S
-            y = circley
-            z = (circlex * sph) // S
-
-            nx = (cph * cth) // S
-            ny = sth
-            nz = (sph * cth) // S
-
-            x, y, z = rot_x(x, y, z, cxA, sxA)
-            x, y, z = rot_z(x, y, z, czB, szB)
-
-            nx, ny, nz = rot_x(nx, ny, nz, cxA, sxA)
-            nx, ny, nz = rot_z(nx, ny, nz, czB, szB)
-
-            zz = z + K2
-            if zz <= 0:
-                continue
-
-            ooz = (S * 64) // (zz // S + 1)
-
-            xp = cx2 + (x * X_SCALE) // zz
-            yp = cy2 - (y * Y_SCALE) // zz
-
-            if 0 <= xp < COLS and 0 <= yp < ROWS:
-                idx = yp * COLS + xp
-                if ooz > zbuf[idx]:
-                    zbuf[idx] = ooz
-
-                    dot = ny - nz
-                    if dot <= 0:
-                        ch = SHADE[0]
-                    else:
-                        lev = (dot * NLEV) // (2 * S)
-                        if lev < 0: lev = 0
-                        if lev > NLEV: lev = NLEV
-                        ch = SHADE[lev]
-
-                    lines[yp][xp] = ord(ch)
-
-    # dibuja en pantalla
-    fb.fill(BG)
-    ypix = 0
-    for r in range(ROWS):
-        fb.text(lines[r].decode("ascii"), 0, ypix, text_color)
-        ypix += 8
-
-    if SHOW_TITLE:
-        fb.text(TITLE_TEXT, 8, TITLE_Y_PIX, text_color)
+class Donut(Scene):
+    FRAME_MS = FRAME_MS
+
+    def init(self):
+        self.zbuf = array('h', [0] * (COLS * ROWS))
+        self.grid = bytearray(b" " * (COLS * ROWS))
+        self.chg = array('H', [0] * (COLS * ROWS))
+        self.atlas = Atlas(SHADE_B)
+        # por framebuffer (1 o 2 con doble buffer): [fb, grilla que tiene, color]
+        self.shown = []
+        self.panel_col = -1     # color de lo que tiene el panel
+        if not PARTIAL_BLIT:
+            self.dmg = None
+        elif CELL_DIFF:
+            self.dmg = CellDamage(COLS, ROWS)
+        else:
+            self.dmg = Damage(W, H)
+
+        # Toro + normales (sin rotar): fijos, se calculan una vez
+        tab = tuple(array('h', [0] * NPTS) for _ in range(6))
+        bx, by, bz, bnx, bny, bnz = tab
+        k = 0
+        for phi in range(0, 360, PHI_STEP):
+            cph = cos_deg(phi)
+            sph = sin_deg(phi)
+
+            for th in range(0, 360, THETA_STEP):
+                cth = cos_deg(th)
+                sth = sin_deg(th)
+
+                circlex = R2 + (R1 * cth) // S
+                circley = (R1 * sth) // S
+
+                bx[k] = (circlex * cph) // S
+                by[k] = circley
+                bz[k] = (circlex * sph) // S
+
+                bnx[k] = (cph * cth) // S
+                bny[k] = sth
+                bnz[k] = (sph * cth) // S
+                k += 1
+        self.tab = tab
+        self.out = (self.zbuf, self.grid, SHADE_B)
+
+        # Centro para grid par: usar COLS//2, ROWS//2 y ajustar offsets
+        par = array('i', [0] * DN_PAR)
+        par[9] = COLS
+        par[10] = ROWS
+        par[11] = (COLS // 2) + CENTER_X_OFF
+        par[12] = (ROWS // 2) + CENTER_Y_OFF
+        par[13] = K2
+        par[14] = X_SCALE
+        par[15] = Y_SCALE
+        par[16] = NLEV
+        self.par = par
+
+        self.A = 0
+        self.B = 0
+        self.t = 0
+
+    def update(self, frame):
+        self.A = (frame * 6) % 360
+        self.B = (frame * 4) % 360
+        self.t = ((frame // COLOR_FRAMES) * COLOR_FRAMES * 3) & 255
+
+    def render(self, fb):
+        self.render_ascii_donut(fb, self.A, self.B, PAL[self.t])
+
+    def teardown(self):
+        self.zbuf = None
+        self.grid = None
+        self.chg = None
+        self.atlas = None
+        self.shown = None
+        self.tab = None
+        self.out = None
+        self.par = None
+        self.dmg = None
+
+    # =========================
+    # Render
+    # =========================
+    def render_ascii_donut(self, fb, A, B, text_color):
+        par = self.par
+        grid = self.grid
+        chg = self.chg
+        atlas = self.atlas
+        dmg = self.dmg
+
+        # rot_x(A) -> rot_z(B) en una matriz; el kernel limpia zbuf/grilla,
+        # proyecta, hace z-test y shade, y deja la caja (en celdas)
+        mat_yxz(par, S, 0, cos_deg(A), sin_deg(A), cos_deg(B), sin_deg(B))
+        donut(self.tab, self.out, par, NPTS)
+
+        prof.mark(prof.GEOM)
+
+        # lo que ya tiene este framebuffer
+        st = None
+        for s in self.shown:
+            if s[0] is fb:
+                st = s
+        if st is None:
+            st = [fb, bytearray(b" " * (COLS * ROWS)), -1]
+            self.shown.append(st)
+        prev = st[1]
+
+        atlas.tint(text_color, BG)
+
+        if st[2] < 0:
+            # buffer nuevo: pantalla limpia + título, y todas las celdas van
+            fb.fill(BG)
+            for i in range(COLS * ROWS):
+                prev[i] = 32
+            if SHOW_TITLE:
+                fb.text(TITLE_TEXT, 8, TITLE_Y_PIX, text_color)
+            st[2] = text_color
+            if dmg is not None and not CELL_DIFF:
+                dmg.mark_all()
+        elif st[2] != text_color:
+            # color nuevo: las celdas con tinta se redibujan (las que
+            # quedaron vacías, con el tile de fondo) y las filas del
+            # título se limpian y se reescriben; el resto ya es fondo
+            ink_cells(prev, COLS * ROWS)
+            if SHOW_TITLE:
+                fb.fill_rect(0, TITLE_R0 * 8, W, (TITLE_R1 - TITLE_R0 + 1) * 8, BG)
+                for i in range(TITLE_R0 * COLS, (TITLE_R1 + 1) * COLS):
+                    prev[i] = 32
+                fb.text(TITLE_TEXT, 8, TITLE_Y_PIX, text_color)
+            st[2] = text_color
+            if dmg is not None and not CELL_DIFF:
+                dmg.mark_all()
+
+        # solo las celdas que cambiaron (el espacio es un tile de fondo)
+        n = diff_cells(grid, prev, chg, COLS * ROWS)
+        tiles = atlas.tiles
+        index = atlas.index
+        for k in range(n):
+            i = chg[k]
+            r = i // COLS
+            fb.blit(tiles[index[grid[i]]], (i - r * COLS) * 8, r * 8)
+
+        if dmg is None:
+            pass
+        elif CELL_DIFF:
+            # contra lo que tiene el panel (con doble buffer no es "prev");
+            # color nuevo: van las celdas con tinta y el título (el 1er
+            # frame, todo)
+            if self.panel_col != text_color:
+                if self.panel_col < 0:
+                    dmg.mark_all()
+                else:
+                    dmg.recolor(TITLE_R0, TITLE_R1)
+                self.panel_col = text_color
+            dmg.diff(grid)
+        elif n:
+            # chg va en orden: primera y última fila tocadas
+            dmg.mark(0, (chg[0] // COLS) * 8, W - 1, (chg[n - 1] // COLS) * 8 + 7)
 
 # =========================
 # LOOP (stop seguro)
 # =========================
-def main():
-    # Ventana para detener fácil antes de arrancar
-    time.sleep(1)
-
-    A = 0
-    B = 0
-    t = 0
-    frame = 0
-
-    while True:
-        start = time.ticks_ms()
-
-        col = PAL[t & 255]
-        render_ascii_donut(A, B, col)
-        blit_fullscreen()
-
-        A = (A + 6) % 360
-        B = (B + 4) % 360
-        t = (t + 3) & 255
-
-        # Cede CPU siempre -> Thonny puede interrumpir
-        dt = time.ticks_diff(time.ticks_ms(), start)
-        if dt < FRAME_MS:
-            time.sleep_ms(FRAME_MS - dt)
-        else:
-            time.sleep_ms(1)
-
-        frame += 1
-        if (frame & 31) == 0:
-            gc.collect()
-
-try:
-    main()
-except KeyboardInterrupt:
-    fb.fill(0)
-    blit_fullscreen()
+if __name__ == "__main__":
+    run(Donut())
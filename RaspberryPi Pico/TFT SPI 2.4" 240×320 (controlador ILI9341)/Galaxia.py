@@ -1,81 +1,46 @@
-from machine import Pin, SPI
-from ili9341 import ILI9341, color565
-import framebuf, time, gc
+import gfxcore as gfx
+import framebuf
+from gfxcore import W, H, S, sin_deg, cos_deg, rnd, rnd_range, rnd16
+from ili9341 import color565
 from array import array
+from scene import Scene, run
+from layers import DotLayer, Decay
+from kernels import galaxy, meteors
 
 # =========================
-# CONFIG (tu setup)
+# CONFIG
 # =========================
-PIN_SCK  = 6
-PIN_MOSI = 7
-PIN_CS   = 13
-PIN_RST  = 14
-PIN_DC   = 15
-
-SPI_BAUD = 40_000_000
-ROTATION = 3
-BGR      = True
-
-WIDTH  = 240
-HEIGHT = 320
+WIDTH  = W
+HEIGHT = H
 
 FRAME_MS   = 35     # 25-45 (más bajo = más FPS)
-STAR_COUNT = 520    # sube/baja según fluidez (450-700)
+STAR_COUNT = 2000   # sube/baja según fluidez (1000-2400, el kernel las mueve en lote)
 ARMS       = 4
 MAX_R      = 150
 ELLIPSE_Y  = 650    # 1000 círculo; menos = disco
 TWIST      = 220
 
 # Shooting stars
-SHOOT_CHANCE = 45   # menor = más frecuentes
+SHOOT_CHANCE = 45   # menor = más frecuentes (1 / SHOOT_CHANCE por frame)
 SHOOT_LEN    = 16
+SHOOT_MAX    = 24   # pool fijo: fugaces vivas a la vez
+SHOOT_BURST  = 4    # cada aparición trae 1..SHOOT_BURST juntas
 
-# =========================
-# INIT DISPLAY
-# =========================
-spi = SPI(0, baudrate=SPI_BAUD, polarity=0, phase=0,
-          sck=Pin(PIN_SCK), mosi=Pin(PIN_MOSI))
-
-tft = ILI9341(spi, cs=PIN_CS, dc=PIN_DC, rst=PIN_RST,
-              width=WIDTH, height=HEIGHT, rotation=ROTATION, bgr=BGR)
-
-gc.collect()
-
-# =========================
-# FRAMEBUFFER
-# =========================
-buf = bytearray(tft.width * tft.height * 2)
-fb = framebuf.FrameBuffer(buf, tft.width, tft.height, framebuf.RGB565)
-
-def blit_fullscreen():
-    tft._begin_write(0, 0, tft.width - 1, tft.height - 1)
-    tft.spi.write(buf)
-    tft._end_write()
+# Modo estela: el frame anterior se atenúa (DECAY_KEEP / 256
+# por frame) en vez de fill; las estrellas dejan arcos y la fugaz su
+# cola por acumulación (sin recorrer SHOOT_LEN pasos). El fondo estelar
+# se mueve por toda la pantalla, así que se atenúa todo.
+DECAY      = False
+DECAY_KEEP = 176
 
-# =========================
-# FIXED TRIG LUT (sin/cos) * 1024
-# =========================
-# Para ahorrar RAM: int16
-S = 1024
-import math
-sinLUT = array('h', [0] * 360)
-for a in range(360):
-    sinLUT[a] = int(math.sin(a * math.pi / 180.0) * S)
+DUST_N = 50         # polvo: capa estática (antes 50 pixeles al azar por frame)
+SKY_N  = 90         # fondo estelar: 90 puntos que se corren (3, 5) por frame
 
-def sin_deg(a): return sinLUT[a % 360]
-def cos_deg(a): return sinLUT[(a + 90) % 360]
-
-# =========================
-# RNG (LCG)
-# =========================
-_seed = 0x12345678
-def rnd():
-    global _seed
-    _seed = (_seed * 1664525 + 1013904223) & 0xFFFFFFFF
-    return _seed
-
-def rnd_range(a, b):
-    return a + (rnd() % (b - a + 1))
+# Núcleo: CORE_N muestras polares (r < CORE_R) pre-rasterizadas en
+# GLOW_VARIANTS sprites de 1 bit; cada frame se estampa uno (un blit)
+CORE_R        = 18
+CORE_N        = 220
+GLOW_VARIANTS = 4
 
 # =========================
 # PALETA (256) en uint16 RGB565 (sin floats, sin trig)
@@ -108,153 +73,228 @@ for i in range(256):
 
     PAL[i] = color565(r, g, b)
 
+# =========================
+# TABLAS por radio / ángulo (kernels.galaxy)
+# =========================
+# Lo que el loop por estrella recalculaba en cada frame:
+#   OMEGA[r] = 2 + 90 // (r + 12)      (el centro gira más rápido)
+#   RADT[r]  = r * 255 // MAX_R        (base del índice de paleta)
+#   COS[a], SINE[a] = sin * ELLIPSE_Y // 1000  (elipse ya aplicada)
+OMEGA = bytearray(MAX_R + 1)
+RADT  = bytearray(MAX_R + 1)
+for r in range(MAX_R + 1):
+    OMEGA[r] = 2 + 90 // (r + 12)
+    RADT[r]  = (r * 255) // (MAX_R if MAX_R else 1)
+
+COS  = array('h', [0] * 360)
+SINE = array('h', [0] * 360)
+for a in range(360):
+    COS[a]  = cos_deg(a)
+    SINE[a] = (sin_deg(a) * ELLIPSE_Y) // 1000
+
 BG   = color565(0, 0, 0)
 DUST = color565(6, 6, 10)
 ORNG = color565(255, 140, 40)
 WHT  = color565(255, 255, 255)
+CORE = PAL[25]
 
 # =========================
-# STARS (arrays, no listas de listas)
-# r: uint16, ang: uint16, bright: uint8, drift: int8
+# Sprites del núcleo (MONO_HLSB + paleta, como glyphs.Labels)
 # =========================
-r_arr   = array('H', [0] * STAR_COUNT)
-ang_arr = array('H', [0] * STAR_COUNT)
-b_arr   = bytearray(STAR_COUNT)
-d_arr   = array('b', [0] * STAR_COUNT)
-
-arm_step = 360 // ARMS
-
-for i in range(STAR_COUNT):
-    u = rnd() & 0xFFFF
-    # Distribución radial sin floats: r ~ u^2 (más denso al centro)
-    u2 = (u * u) >> 16          # 0..65535
-    r  = (u2 * MAX_R) >> 16     # 0..MAX_R
+CORE_RY = (CORE_R * ELLIPSE_Y) // 1000 + 1     # medio alto (floor de y < 0)
+GLOW_W  = 2 * CORE_R + 1
+GLOW_H  = 2 * CORE_RY + 1
+GLOW_KEY = (CORE + 1) & 0xFFFF                  # 0 -> transparente
+
+def glow_sprites():
+    # GLOW_VARIANTS tiles con CORE_N puntos al azar cada uno (el mismo
+    # muestreo que antes se hacía por frame), centro en (CORE_R, CORE_RY)
+    st = (GLOW_W + 7) // 8
+    buf = bytearray(GLOW_VARIANTS * st * GLOW_H)
+    mv = memoryview(buf)
+    sz = st * GLOW_H
+    out = []
+    for k in range(GLOW_VARIANTS):
+        t = framebuf.FrameBuffer(mv[k * sz:(k + 1) * sz], GLOW_W, GLOW_H, framebuf.MONO_HLSB)
+        for _ in range(CORE_N):
+            a = rnd16() % 360
+            rr = rnd16() % CORE_R
+            x = CORE_R + (rr * cos_deg(a)) // S
+            y = CORE_RY + (rr * sin_deg(a) * ELLIPSE_Y) // (S * 1000)
+            t.pixel(x, y, 1)
+        out.append(t)
+    return out
+
+def glow_palette():
+    pal = framebuf.FrameBuffer(bytearray(4), 2, 1, framebuf.RGB565)
+    pal.pixel(0, 0, GLOW_KEY)
+    pal.pixel(1, 0, CORE)
+    return pal
 
-    arm = rnd() % ARMS
-    base_ang = rnd() % 360
-    ang = (base_ang + (r * TWIST) // (MAX_R if MAX_R else 1) + arm * arm_step) % 360
-
-    br = rnd_range(50, 255)
-    if r < 35 and (rnd() & 3) == 0:
-        br = 255
+# =========================
+# Escena
+# =========================
+class Galaxy(Scene):
+    FRAME_MS = FRAME_MS
 
-    drift = rnd_range(-1, 2)
+    def init(self):
+        gfx.seed(0x12345678)
 
-    r_arr[i]   = r
-    ang_arr[i] = ang
-    b_arr[i]   = br
-    d_arr[i]   = drift
+        # =========================
+        # STARS (arrays, no listas de listas)
+        # r: uint16, ang: uint16, bright: uint8, drift: int8
+        # =========================
+        r_arr   = array('H', [0] * STAR_COUNT)
+        ang_arr = array('H', [0] * STAR_COUNT)
+        b_arr   = bytearray(STAR_COUNT)
+        d_arr   = array('b', [0] * STAR_COUNT)
 
-# Shooting star state: x,y,vx,vy,life
-shoot = None
+        arm_step = 360 // ARMS
 
-# =========================
-# MAIN LOOP
-# =========================
-try:
-    cx = WIDTH // 2
-    cy = HEIGHT // 2
-    frame = 0
-
-    while True:
-        t0 = time.ticks_ms()
-        fb.fill(BG)
-
-        # Fondo estelar sin guardar lista (determinista)
-        for i in range(90):
-            x = (i * 97 + frame * 3) % WIDTH
-            y = (i * 57 + frame * 5) % HEIGHT
-            fb.pixel(x, y, PAL[(i * 19) & 255])
-
-        # Polvo barato
-        for _ in range(50):
-            fb.pixel(rnd() % WIDTH, rnd() % HEIGHT, DUST)
-
-        # Galaxia: rotación diferencial
         for i in range(STAR_COUNT):
-            r = r_arr[i]
-            ang = ang_arr[i]
-            br = b_arr[i]
-
-            omega = 2 + (90 // (r + 12))   # centro gira más rápido
-            ang = (ang + omega) % 360
-
-            # drift radial leve cada tanto
-            if (frame & 15) == 0:
-                rr = r + d_arr[i]
-                if rr < 0: rr = 0
-                if rr > MAX_R: rr = MAX_R
-                r = rr
-
-            x = cx + (r * cos_deg(ang)) // S
-            y = cy + (r * sin_deg(ang) * ELLIPSE_Y) // (S * 1000)
-
-            if 0 <= x < WIDTH and 0 <= y < HEIGHT:
-                rad_t = (r * 255) // (MAX_R if MAX_R else 1)
-                idx = (rad_t + (br // 3)) & 255
-                c = PAL[idx]
-                fb.pixel(x, y, c)
-
-                # sparkle para las más brillantes (sin gastar mucho)
-                if br > 240:
-                    if x + 1 < WIDTH: fb.pixel(x + 1, y, c)
-                    if y + 1 < HEIGHT: fb.pixel(x, y + 1, c)
-
-            r_arr[i] = r
-            ang_arr[i] = ang
+            u = rnd() & 0xFFFF
+            # Distribución radial sin floats: r ~ u^2 (más denso al centro)
+            u2 = (u * u) >> 16          # 0..65535
+            r  = (u2 * MAX_R) >> 16     # 0..MAX_R
 
-        # Núcleo (glow simple)
-        for _ in range(220):
-            a = rnd() % 360
-            rr = rnd() % 18
-            x = cx + (rr * cos_deg(a)) // S
-            y = cy + (rr * sin_deg(a) * ELLIPSE_Y) // (S * 1000)
-            if 0 <= x < WIDTH and 0 <= y < HEIGHT:
-                fb.pixel(x, y, PAL[25])
-
-        # Shooting star spawn
-        if shoot is None and (rnd() % SHOOT_CHANCE) == 0:
-            sx = rnd() % WIDTH
-            sy = rnd() % HEIGHT
-            vx = rnd_range(-5, 5)
-            vy = rnd_range(-5, 5)
-            if vx == 0 and vy == 0:
-                vx = 4
-            shoot = [sx, sy, vx, vy, rnd_range(10, 18)]
-
-        # Shooting star update/draw
-        if shoot is not None:
-            sx, sy, vx, vy, life = shoot
-
-            # trail
-            x2, y2 = sx, sy
-            for _ in range(SHOOT_LEN):
-                x2 -= vx
-                y2 -= vy
-                if 0 <= x2 < WIDTH and 0 <= y2 < HEIGHT:
-                    fb.pixel(x2, y2, ORNG)
-
-            if 0 <= sx < WIDTH and 0 <= sy < HEIGHT:
-                fb.pixel(sx, sy, WHT)
-
-            sx += vx
-            sy += vy
-            life -= 1
-            if life <= 0 or sx < -20 or sx > WIDTH + 20 or sy < -20 or sy > HEIGHT + 20:
-                shoot = None
-            else:
-                shoot[0], shoot[1], shoot[4] = sx, sy, life
+            arm = rnd() % ARMS
+            base_ang = rnd() % 360
+            ang = (base_ang + (r * TWIST) // (MAX_R if MAX_R else 1) + arm * arm_step) % 360
 
-        blit_fullscreen()
+            br = rnd_range(50, 255)
+            if r < 35 and (rnd() & 3) == 0:
+                br = 255
 
-        frame += 1
-        if (frame & 31) == 0:
-            gc.collect()
+            drift = rnd_range(-1, 2)
 
-        dt = time.ticks_diff(time.ticks_ms(), t0)
-        if dt < FRAME_MS:
-            time.sleep_ms(FRAME_MS - dt)
+            r_arr[i]   = r
+            ang_arr[i] = ang
+            b_arr[i]   = br
+            d_arr[i]   = drift
+
+        self.r_arr = r_arr
+        self.ang_arr = ang_arr
+        self.b_arr = b_arr
+        self.d_arr = d_arr
+        self.st = (r_arr, ang_arr, b_arr, d_arr)
+        self.tab = (OMEGA, COS, SINE, RADT, PAL)
+        self.gpar = array('i', [STAR_COUNT, WIDTH, HEIGHT, WIDTH // 2, HEIGHT // 2, 0, MAX_R])
+
+        # Fondo + polvo: capa estática, un fill + un kernel por frame
+        dx = array('H', [0] * DUST_N)
+        dy = array('H', [0] * DUST_N)
+        dc = array('H', [DUST] * DUST_N)
+        for i in range(DUST_N):
+            dx[i] = rnd() % WIDTH
+            dy[i] = rnd() % HEIGHT
+        self.dust = DotLayer(dx, dy, dc, BG, WIDTH, HEIGHT)
+
+        # Fondo estelar: las posiciones del frame 0, cada frame corridas
+        # (frame * 3, frame * 5) con la vuelta en el kernel
+        sx = array('H', [0] * SKY_N)
+        sy = array('H', [0] * SKY_N)
+        sc = array('H', [0] * SKY_N)
+        for i in range(SKY_N):
+            sx[i] = (i * 97) % WIDTH
+            sy[i] = (i * 57) % HEIGHT
+            sc[i] = PAL[(i * 19) & 255]
+        self.sky = DotLayer(sx, sy, sc, BG, WIDTH, HEIGHT)
+
+        self.decay = Decay(WIDTH, HEIGHT, DECAY_KEEP, gfx.SWAP_BYTES) if DECAY else None
+
+        self.glow = glow_sprites()
+        self.glow_pal = glow_palette()
+
+        # Fugaces: pool SoA (array('h') paralelos) + pila de libres; el
+        # kernel las mueve y dibuja todas y devuelve las muertas a FREE
+        self.pool = tuple(array('h', [0] * SHOOT_MAX) for _ in range(6))
+        free = self.pool[5]
+        for i in range(SHOOT_MAX):
+            free[i] = SHOOT_MAX - 1 - i
+        self.mpar = array('i', [SHOOT_MAX, WIDTH, HEIGHT, SHOOT_LEN, SHOOT_MAX, ORNG, WHT])
+        self.frame = 0
+
+    def update(self, frame):
+        self.frame = frame
+
+        # Aparición (rnd16: por frame sin enteros grandes): una ráfaga de
+        # 1..SHOOT_BURST fugaces con la misma dirección, desde la pila
+        mpar = self.mpar
+        if mpar[4] and (rnd16() % SHOOT_CHANCE) == 0:
+            X, Y, VX, VY, LIFE, FREE = self.pool
+            vx = rnd16() % 11 - 5
+            vy = rnd16() % 11 - 5
+            x0 = rnd16() % WIDTH
+            y0 = rnd16() % HEIGHT
+            n = 1 + rnd16() % SHOOT_BURST
+            while n and mpar[4]:
+                k = mpar[4] - 1
+                i = FREE[k]
+                mpar[4] = k
+                a = vx + rnd16() % 3 - 1
+                b = vy
+                if a == 0 and b == 0:
+                    a = 4
+                X[i] = x0 + rnd16() % 17 - 8
+                Y[i] = y0 + rnd16() % 17 - 8
+                VX[i] = a
+                VY[i] = b
+                LIFE[i] = 10 + rnd16() % 9
+                n -= 1
+
+    def render(self, fb):
+        frame = self.frame
+
+        cx = WIDTH // 2
+        cy = HEIGHT // 2
+
+        # fondo + polvo (en modo estela: atenuar y volver a poner el polvo)
+        decay = self.decay
+        if decay is None:
+            self.dust.draw(fb, gfx.buf)
+        else:
+            if decay.apply(gfx.buf, gfx.pres.front):
+                self.dust.stamp(gfx.buf)
+            else:
+                self.dust.draw(fb, gfx.buf)
+            decay.mark_all()
+
+        # Fondo estelar: un kernel, sin pixel() por estrella
+        self.sky.stamp(gfx.buf, (frame * 3) % WIDTH, (frame * 5) % HEIGHT)
+
+        # Galaxia: rotación diferencial, todas las estrellas en un kernel
+        # (drift radial leve cada 16 frames)
+        gpar = self.gpar
+        gpar[5] = 1 if (frame & 15) == 0 else 0
+        galaxy(self.st, self.tab, gfx.buf, gpar)
+
+        # Núcleo (glow): un sprite pre-rasterizado, rotando las variantes
+        fb.blit(self.glow[frame % GLOW_VARIANTS], cx - CORE_R, cy - CORE_RY,
+                GLOW_KEY, self.glow_pal)
+
+        # Fugaces: todas en un kernel (en modo estela solo el último paso
+        # de la cola, el resto queda)
+        mpar = self.mpar
+        mpar[3] = SHOOT_LEN if decay is None else 1
+        meteors(self.pool, gfx.buf, mpar)
+
+    def teardown(self):
+        self.r_arr = None
+        self.ang_arr = None
+        self.b_arr = None
+        self.d_arr = None
+        self.st = None
+        self.tab = None
+        self.pool = None
+        self.mpar = None
+        self.dust = None
+        self.sky = None
+        self.glow = None
+        self.glow_pal = None
+        self.decay = None
 
-except KeyboardInterrupt:
-    fb.fill(0)
-    blit_fullscreen()
+# =========================
+# MAIN LOOP
+# =========================
+if __name__ == "__main__":
+    run(Galaxy())
@@ -1,64 +1,25 @@
-from machine import Pin, SPI
-from ili9341 import ILI9341, color565
-import framebuf, time, gc
+import gfxcore as gfx
+from gfxcore import W, H, rnd_range
+from ili9341 import color565
 from array import array
+from kernels import grid_links, GL_PAR
+from glyphs import Labels, put_dec
+from scene import Scene, run
+import prof
 
 # =========================
-# CONFIG (tu setup)
+# CONFIG
 # =========================
-PIN_SCK  = 6
-PIN_MOSI = 7
-PIN_CS   = 13
-PIN_RST  = 14
-PIN_DC   = 15
-
-SPI_BAUD = 40_000_000
-ROTATION = 3
-BGR      = True
-
 FRAME_MS = 25  # 20-30 fluido
 
-# Kill switch: GP22 a GND
-KILL_PIN = 22
-kill = Pin(KILL_PIN, Pin.IN, Pin.PULL_UP)
-
-# =========================
-# INIT display + framebuffer
-# =========================
-spi = SPI(0, baudrate=SPI_BAUD, polarity=0, phase=0,
-          sck=Pin(PIN_SCK), mosi=Pin(PIN_MOSI))
-
-tft = ILI9341(spi, cs=PIN_CS, dc=PIN_DC, rst=PIN_RST,
-              width=240, height=320, rotation=ROTATION, bgr=BGR)
-
-W = tft.width
-H = tft.height
-
-buf = bytearray(W * H * 2)
-fb  = framebuf.FrameBuffer(buf, W, H, framebuf.RGB565)
-
-def blit():
-    tft._begin_write(0, 0, W - 1, H - 1)
-    tft.spi.write(buf)
-    tft._end_write()
-
-# =========================
-# RNG rápido (LCG)
-# =========================
-_seed = 0xC0FFEE12
-def rnd():
-    global _seed
-    _seed = (_seed * 1664525 + 1013904223) & 0xFFFFFFFF
-    return _seed
-
-def rndi(a, b):
-    return a + (rnd() % (b - a + 1))
-
 # =========================
 # LOOK & PERFORMANCE
 # =========================
-NODES = 34              # 28-40 recomendado
-LINK_DIST = 62          # distancia para conectar
+# 64: ~200 fb.line + 320 pixel por frame, el mismo trabajo en Python que
+# los 34 nodos de antes con el O(N²) (que ya no está). Más nodos = más
+# líneas: medir con prof.enable() antes de subirlo.
+NODES = 64              # 48-80 a 25 ms (grilla espacial); antes 28-40 con O(N²)
+LINK_DIST = 62          # distancia para conectar (= tamaño de celda)
 LINK_DIST2 = LINK_DIST * LINK_DIST
 
 # si quieres más loco: baja a 45-55 pero más líneas = más CPU
@@ -80,29 +41,31 @@ LINK_HI     = color565(0, 160, 200)   # líneas cercanas
 TEXT_COL    = color565(180, 180, 220)
 HUD_COL     = color565(90, 90, 130)
 
-# =========================
-# Nodos: posiciones y velocidades (prealocado)
-# =========================
-x = array('h', [0] * NODES)
-y = array('h', [0] * NODES)
-vx = array('h', [0] * NODES)
-vy = array('h', [0] * NODES)
-
 MARGIN = 10
 
-for i in range(NODES):
-    x[i] = rndi(MARGIN, W - MARGIN - 1)
-    y[i] = rndi(MARGIN, H - MARGIN - 1)
-    # vel suave
-    vx[i] = rndi(-14, 14)
-    vy[i] = rndi(-14, 14)
-    if vx[i] == 0: vx[i] = 7
-    if vy[i] == 0: vy[i] = -9
+# Grilla espacial: celda = LINK_DIST, así todo vecino está en las 9
+# celdas de alrededor. Tablas x -> columna, y -> fila (sin dividir).
+GCOLS = (W + LINK_DIST - 1) // LINK_DIST
+GROWS = (H + LINK_DIST - 1) // LINK_DIST
+XCELL = bytearray(x // LINK_DIST for x in range(W))
+YCELL = bytearray(y // LINK_DIST for y in range(H))
+
+# Etiquetas: un sprite 1 bit por nodo etiquetado, que solo se reescribe
+# cuando cambia su coordenada. HEX2[2v], HEX2[2v+1] = "%02X" de v.
+NLABELS = (NODES + COORDS_EVERY_NTH - 1) // COORDS_EVERY_NTH
+LABEL_W = 7 if COORDS_STYLE_HEX else 9      # "xAF y3C" / "(123,456)"
+LABEL_CHARS = b"0123456789ABCDEFxy (),"
+
+_HD = b"0123456789ABCDEF"
+HEX2 = bytearray(512)
+for _v in range(256):
+    HEX2[2 * _v] = _HD[_v >> 4]
+    HEX2[2 * _v + 1] = _HD[_v & 15]
 
 # =========================
 # Util: dibujar nodo con glow barato
 # =========================
-def node_glow(px, py, bright=True):
+def node_glow(fb, px, py, bright=True):
     # cross + pixel central
     if bright:
         c0 = NODE_COL
@@ -118,24 +81,68 @@ def node_glow(px, py, bright=True):
     if py < H - 1:   fb.pixel(px, py + 1, c1)
 
 # =========================
-# MAIN LOOP
+# Escena
 # =========================
-try:
-    # ventana anti-busy
-    time.sleep(1)
-
-    frame = 0
-    cx = W // 2
-    cy = H // 2
+class NeuralMesh(Scene):
+    FRAME_MS = FRAME_MS
 
-    while True:
-        start = time.ticks_ms()
+    def init(self):
+        gfx.seed(0xC0FFEE12)
 
-        # salida garantizada
-        if not kill.value():
-            raise KeyboardInterrupt
+        # Nodos: posiciones y velocidades (prealocado)
+        x = array('h', [0] * NODES)
+        y = array('h', [0] * NODES)
+        vx = array('h', [0] * NODES)
+        vy = array('h', [0] * NODES)
 
-        fb.fill(BG)
+        for i in range(NODES):
+            x[i] = rnd_range(MARGIN, W - MARGIN - 1)
+            y[i] = rnd_range(MARGIN, H - MARGIN - 1)
+            # vel suave
+            vx[i] = rnd_range(-14, 14)
+            vy[i] = rnd_range(-14, 14)
+            if vx[i] == 0: vx[i] = 7
+            if vy[i] == 0: vy[i] = -9
+
+        self.x = x
+        self.y = y
+        self.vx = vx
+        self.vy = vy
+
+        # grilla (counting sort) + links del frame, prealocado
+        ncell = GCOLS * GROWS
+        self.pos = (x, y, XCELL, YCELL)
+        self.idx = (bytearray(NODES), array('H', [0] * (ncell + 1)),
+                    array('H', [0] * (ncell + 1)), array('H', [0] * NODES))
+        nmax = NODES * MAX_LINKS_PER_NODE
+        self.la = array('H', [0] * nmax)
+        self.lb = array('H', [0] * nmax)
+        self.lf = bytearray(nmax)
+        self.links = (self.la, self.lb, self.lf,
+                      array('H', [0] * MAX_LINKS_PER_NODE),
+                      array('H', [0] * MAX_LINKS_PER_NODE))
+        par = array('i', [0] * GL_PAR)
+        par[0] = NODES
+        par[1] = GCOLS
+        par[2] = GROWS
+        par[3] = LINK_DIST2
+        par[4] = MAX_LINKS_PER_NODE
+        self.par = par
+
+        # etiquetas: sprites + última coordenada mostrada (-1 = ninguna)
+        self.labels = Labels(LABEL_CHARS, NLABELS, LABEL_W, TEXT_COL)
+        self.lx = array('h', [-1] * NLABELS)
+        self.ly = array('h', [-1] * NLABELS)
+        self.ltxt = bytearray(LABEL_W)
+        if COORDS_STYLE_HEX:
+            # "x.. y..": lo fijo se escribe una vez
+            self.ltxt[0] = 0x78
+            self.ltxt[3] = 0x20
+            self.ltxt[4] = 0x79
+
+    def update(self, frame):
+        x = self.x; y = self.y
+        vx = self.vx; vy = self.vy
 
         # Update nodos
         for i in range(NODES):
@@ -160,30 +167,32 @@ try:
             x[i] = xi
             y[i] = yi
 
-        # Conexiones (distancia) con límite por nodo (FPS)
-        # Estrategia: para cada i, conecta con j>i y cuenta links_i
-        for i in range(NODES):
-            links_i = 0
-            xi = x[i]
-            yi = y[i]
+    def render(self, fb):
+        x = self.x; y = self.y
+        cx = W // 2
+        cy = H // 2
 
-            for j in range(i + 1, NODES):
-                dx = xi - x[j]
-                dy = yi - y[j]
-                d2 = dx*dx + dy*dy
+        fb.fill(BG)
+        prof.mark(prof.RASTER)
+
+        # Conexiones (distancia) con límite por nodo (FPS)
+        # Para cada i, los primeros MAX_LINKS_PER_NODE j>i en rango; la
+        # grilla espacial solo revisa las 9 celdas vecinas
+        par = self.par
+        grid_links(self.pos, self.idx, self.links, par)
 
-                if d2 <= LINK_DIST2:
-                    # brillo según cercanía (sin sqrt)
-                    # muy cerca => link fuerte
-                    col = LINK_HI if d2 < (LINK_DIST2 >> 2) else LINK_COL
-                    fb.line(xi, yi, x[j], y[j], col)
+        prof.mark(prof.GEOM)
 
-                    links_i += 1
-                    if links_i >= MAX_LINKS_PER_NODE:
-                        break
+        la = self.la; lb = self.lb; lf = self.lf
+        for k in range(par[5]):
+            a = la[k]; b = lb[k]
+            # brillo según cercanía (sin sqrt): muy cerca => link fuerte
+            fb.line(x[a], y[a], x[b], y[b], LINK_HI if lf[k] else LINK_COL)
 
         # Dibuja nodos + coords
         # “Seleccionados” (más cercanos al centro) brillan
+        labels = self.labels; lens = labels.lens
+        lx = self.lx; ly = self.ly; ltxt = self.ltxt
         for i in range(NODES):
             xi = x[i]
             yi = y[i]
@@ -192,41 +201,61 @@ try:
             dcy = yi - cy
             near_center = (dcx*dcx + dcy*dcy) < 70*70
 
-            node_glow(xi, yi, bright=near_center)
+            node_glow(fb, xi, yi, bright=near_center)
 
             if SHOW_COORDS and (i % COORDS_EVERY_NTH == 0):
+                k = i // COORDS_EVERY_NTH
                 if COORDS_STYLE_HEX:
-                    # xAF y3C
-                    s = "x{:02X} y{:02X}".format(xi & 0xFF, yi & 0xFF)
+                    # xAF y3C: solo cuenta el byte bajo
+                    qx = xi & 0xFF
+                    qy = yi & 0xFF
                 else:
-                    # (123,45)
-                    s = "({},{})".format(xi, yi)
+                    qx = xi
+                    qy = yi
+                if qx != lx[k] or qy != ly[k]:
+                    lx[k] = qx
+                    ly[k] = qy
+                    if COORDS_STYLE_HEX:
+                        ltxt[1] = HEX2[2 * qx]
+                        ltxt[2] = HEX2[2 * qx + 1]
+                        ltxt[5] = HEX2[2 * qy]
+                        ltxt[6] = HEX2[2 * qy + 1]
+                        n = 7
+                    else:
+                        # (123,45)
+                        ltxt[0] = 0x28
+                        n = put_dec(ltxt, 1, qx)
+                        ltxt[n] = 0x2C
+                        n = put_dec(ltxt, n + 1, qy)
+                        ltxt[n] = 0x29
+                        n += 1
+                    labels.set(k, ltxt, n)
 
                 # evita que el texto se salga
+                n = lens[k] * 8
                 tx = xi + 4
                 ty = yi - 6
-                if tx > W - 8*len(s): tx = xi - 8*len(s) - 2
+                if tx > W - n: tx = xi - n - 2
                 if ty < 0: ty = yi + 2
                 if ty > H - 8: ty = H - 8
 
-                fb.text(s, tx, ty, TEXT_COL)
-
-        # HUD mínimo
-        fb.text("", 4, 4, HUD_COL)
+                labels.draw(fb, k, tx, ty)
 
-        blit()
+        # HUD mínimo (fps / ms por fase / heap con prof.enable())
+        prof.hud(fb, 4, 4, HUD_COL)
 
-        # anti-busy: cede CPU siempre
-        dt = time.ticks_diff(time.ticks_ms(), start)
-        if dt < FRAME_MS:
-            time.sleep_ms(FRAME_MS - dt)
-        else:
-            time.sleep_ms(1)
+    def teardown(self):
+        self.x = None
+        self.y = None
+        self.vx = None
+        self.vy = None
+        self.pos = self.idx = self.links = None
+        self.la = self.lb = self.lf = None
+        self.par = None
+        self.labels = self.lx = self.ly = self.ltxt = None
 
-        frame += 1
-        if (frame & 31) == 0:
-            gc.collect()
-
-except KeyboardInterrupt:
-    fb.fill(0)
-    blit()
+# =========================
+# MAIN LOOP
+# =========================
+if __name__ == "__main__":
+    run(NeuralMesh())
@@ -1,97 +1,81 @@
-from machine import Pin, SPI
-from ili9341 import ILI9341, color565
-import framebuf, time, gc, math
+import gfxcore as gfx
+from gfxcore import W, H, S, sin_deg, cos_deg, rnd
+from ili9341 import color565
 from array import array
+import framebuf
+from kernels import mat_yxz, xform, XF_PAR
+from layers import DotLayer, Decay
+from dirty import Damage
+from scene import Scene, run
+import prof
 
 # =========================
-# Pines (tu setup)
+# CONFIG
 # =========================
-PIN_SCK  = 6
-PIN_MOSI = 7
-PIN_CS   = 13
-PIN_RST  = 14
-PIN_DC   = 15
-
-SPI_BAUD = 40_000_000
-ROTATION = 3
-BGR      = True
-
 FRAME_MS = 25  # 20-30 fluido y estable
 
-# Kill switch: GP22 a GND
-KILL_PIN = 22
-kill = Pin(KILL_PIN, Pin.IN, Pin.PULL_UP)
+# Modo estela: el frame anterior se atenúa (DECAY_KEEP / 256
+# por frame) y la luna deja su estela por acumulación, sin el ring de
+# TRAIL_LEN puntos. Solo se atenúa y se manda la zona de órbita + Tierra
+# (+ HUD); las estrellas quedan fijas (sin parallax).
+DECAY      = False
+DECAY_KEEP = 200
 
 # Ajuste fino de centrado (pixeles) por si quieres
 CENTER_X_OFF = 0
 CENTER_Y_OFF = 0
 
-# =========================
-# Init display + framebuffer
-# =========================
-spi = SPI(0, baudrate=SPI_BAUD, polarity=0, phase=0,
-          sck=Pin(PIN_SCK), mosi=Pin(PIN_MOSI))
-
-tft = ILI9341(spi, cs=PIN_CS, dc=PIN_DC, rst=PIN_RST,
-              width=240, height=320, rotation=ROTATION, bgr=BGR)
-
-W = tft.width
-H = tft.height
-
-buf = bytearray(W * H * 2)
-fb  = framebuf.FrameBuffer(buf, W, H, framebuf.RGB565)
-
-def blit():
-    tft._begin_write(0, 0, W - 1, H - 1)
-    tft.spi.write(buf)
-    tft._end_write()
-
-# =========================
-# Trig LUT (fixed)
-# =========================
-S = 1024
-sinLUT = array('h', [0] * 360)
-for a in range(360):
-    sinLUT[a] = int(math.sin(a * math.pi / 180.0) * S)
-
-def sin_deg(a): return sinLUT[a % 360]
-def cos_deg(a): return sinLUT[(a + 90) % 360]
-
 # =========================
 # 3D helpers
 # =========================
 D = 220  # distancia "cámara"
+DEN_MIN = 60
+
+# Círculo unitario (x S) por cantidad de segmentos: seg + 1 puntos,
+# se calcula una vez por seg
+_UNIT = {}
+
+def unit_circle(seg):
+    t = _UNIT.get(seg)
+    if t is None:
+        ux = array('h', [0] * (seg + 1))
+        uy = array('h', [0] * (seg + 1))
+        for i in range(seg + 1):
+            a = (i * 360) // seg
+            ux[i] = cos_deg(a)
+            uy[i] = sin_deg(a)
+        t = (ux, uy)
+        _UNIT[seg] = t
+    return t
+
+def circle_pts(cx, cy, r, seg):
+    # vértices del polígono ya en pantalla (para círculos que no se mueven)
+    ux, uy = unit_circle(seg)
+    xs = array('h', [0] * (seg + 1))
+    ys = array('h', [0] * (seg + 1))
+    for i in range(seg + 1):
+        xs[i] = cx + (r * ux[i]) // S
+        ys[i] = cy + (r * uy[i]) // S
+    return xs, ys
+
+def polyline(fb, xs, ys, col):
+    px = xs[0]; py = ys[0]
+    for i in range(1, len(xs)):
+        x = xs[i]; y = ys[i]
+        fb.line(px, py, x, y, col)
+        px = x; py = y
 
-def rot_y(x, y, z, cy, sy):
-    x1 = (x * cy + z * sy) // S
-    z1 = (-x * sy + z * cy) // S
-    return x1, y, z1
-
-def rot_x(x, y, z, cx, sx):
-    y1 = (y * cx - z * sx) // S
-    z1 = (y * sx + z * cx) // S
-    return x, y1, z1
-
-def project(x, y, z, cx2d, cy2d):
-    den = D + z
-    if den < 60:
-        den = 60
-    k = (D * S) // den
-    sx2d = cx2d + (x * k) // S
-    sy2d = cy2d + (y * k) // S
-    return sx2d, sy2d
-
-def circle_poly(cx, cy, r, col, seg=44):
-    px = cx + (r * cos_deg(0)) // S
-    py = cy + (r * sin_deg(0)) // S
+def circle_poly(fb, cx, cy, r, col, seg=44):
+    ux, uy = unit_circle(seg)
+    px = cx + (r * ux[0]) // S
+    py = cy + (r * uy[0]) // S
     for i in range(1, seg + 1):
-        a = (i * 360) // seg
-        x = cx + (r * cos_deg(a)) // S
-        y = cy + (r * sin_deg(a)) // S
+        x = cx + (r * ux[i]) // S
+        y = cy + (r * uy[i]) // S
         fb.line(px, py, x, y, col)
-        px, py = x, y
+        px = x; py = y
 
-def fill_circle(cx, cy, r, col):
+def fill_circle(fb, cx, cy, r, col):
     # Midpoint circle + hlines (rápido y sin floats)
     x = 0
     y = r
@@ -115,58 +99,65 @@ def fill_circle(cx, cy, r, col):
 EARTH_R = 78
 ORBIT_R = 118
 MOON_R  = 13
+MOON_SEG = 20
+MOON_RQ  = 1    # paso del radio en el cache de sprites (2 = la mitad de RAM)
 
 LON_STEP = 30
-LAT_LIST = [-75, -45, -15, 15, 45, 75]
-
-lons = list(range(0, 360, LON_STEP))
-
-earth_pts = []
-earth_idx = {}
-for li, lat in enumerate(LAT_LIST):
-    cl = cos_deg(lat)
-    sl = sin_deg(lat)
-    for oi, lon in enumerate(lons):
+LAT_LIST = (-75, -45, -15, 15, 45, 75)
+
+N_LON = 360 // LON_STEP
+N_LAT = len(LAT_LIST)
+
+# puntos en SoA (array('h')) para el kernel; vértice (lat li, lon oi)
+# en li * N_LON + oi
+N_E = N_LAT * N_LON
+EX = array('h', [0] * N_E)
+EY = array('h', [0] * N_E)
+EZ = array('h', [0] * N_E)
+for li in range(N_LAT):
+    cl = cos_deg(LAT_LIST[li])
+    sl = sin_deg(LAT_LIST[li])
+    for oi in range(N_LON):
+        lon = oi * LON_STEP
         co = cos_deg(lon)
         so = sin_deg(lon)
-        x = (EARTH_R * cl // S) * co // S
-        y = (EARTH_R * sl) // S
-        z = (EARTH_R * cl // S) * so // S
-        earth_idx[(li, oi)] = len(earth_pts)
-        earth_pts.append((x, y, z))
-
-earth_edges = []
-for li in range(len(LAT_LIST)):
-    for oi in range(len(lons)):
-        a = earth_idx[(li, oi)]
-        b = earth_idx[(li, (oi + 1) % len(lons))]
-        earth_edges.append((a, b))
-for oi in range(len(lons)):
-    for li in range(len(LAT_LIST) - 1):
-        a = earth_idx[(li, oi)]
-        b = earth_idx[(li + 1, oi)]
-        earth_edges.append((a, b))
-
-N_E = len(earth_pts)
-px = array('h', [0] * N_E)
-py = array('h', [0] * N_E)
-pz = array('h', [0] * N_E)
-
+        i = li * N_LON + oi
+        EX[i] = (EARTH_R * cl // S) * co // S
+        EY[i] = (EARTH_R * sl) // S
+        EZ[i] = (EARTH_R * cl // S) * so // S
+EARTH = (EX, EY, EZ)
+
+# aristas EA[k] -> EB[k]: paralelos y después meridianos
+N_EE = N_LAT * N_LON + (N_LAT - 1) * N_LON
+EA = array('H', [0] * N_EE)
+EB = array('H', [0] * N_EE)
+k = 0
+for li in range(N_LAT):
+    for oi in range(N_LON):
+        EA[k] = li * N_LON + oi
+        EB[k] = li * N_LON + (oi + 1) % N_LON
+        k += 1
+for oi in range(N_LON):
+    for li in range(N_LAT - 1):
+        EA[k] = li * N_LON + oi
+        EB[k] = (li + 1) * N_LON + oi
+        k += 1
+
+# órbita: ORBIT_SEG puntos en anillo (arista i -> i+1) + la luna en el
+# último lugar, así pasa por el mismo xform que la órbita
 ORBIT_SEG = 48
-orbit_pts = []
+MOON_I = ORBIT_SEG
+OX = array('h', [0] * (ORBIT_SEG + 1))
+OY = array('h', [0] * (ORBIT_SEG + 1))
+OZ = array('h', [0] * (ORBIT_SEG + 1))
 for i in range(ORBIT_SEG):
     ang = (i * 360) // ORBIT_SEG
-    x = (ORBIT_R * cos_deg(ang)) // S
-    y = 0
-    z = (ORBIT_R * sin_deg(ang)) // S
-    orbit_pts.append((x, y, z))
-orbit_edges = [(i, (i + 1) % ORBIT_SEG) for i in range(ORBIT_SEG)]
+    OX[i] = (ORBIT_R * cos_deg(ang)) // S
+    OZ[i] = (ORBIT_R * sin_deg(ang)) // S
+ORBIT = (OX, OY, OZ)
 
-# Trail luna (prealocado)
+# Trail luna
 TRAIL_LEN = 18
-trail_x = array('h', [0] * TRAIL_LEN)
-trail_y = array('h', [0] * TRAIL_LEN)
-trail_i = 0
 
 TRAIL_COL = array('H', [0] * TRAIL_LEN)
 for i in range(TRAIL_LEN):
@@ -174,23 +165,8 @@ for i in range(TRAIL_LEN):
     if v > 200: v = 200
     TRAIL_COL[i] = color565(v, v, v + 25)
 
-# =========================
-# Fondo estrellas (prealocado)
-# =========================
-_seed = 0xA5A5A5A5
-def rnd():
-    global _seed
-    _seed = (_seed * 1664525 + 1013904223) & 0xFFFFFFFF
-    return _seed
-
+# Fondo estrellas
 STAR_N = 90
-star_x = array('H', [0] * STAR_N)
-star_y = array('H', [0] * STAR_N)
-star_l = array('B', [0] * STAR_N)
-for i in range(STAR_N):
-    star_x[i] = rnd() % W
-    star_y[i] = rnd() % H
-    star_l[i] = 1 if (rnd() & 1) else 2
 
 # =========================
 # Colores
@@ -211,130 +187,217 @@ MOON_RIM_FAR   = color565(170, 170, 170)
 
 HUD_COL   = color565(120, 120, 160)
 
-# =========================
-# LOOP
-# =========================
-try:
-    # Ventana anti-busy
-    time.sleep(1)
-
-    cx2d = W // 2 + CENTER_X_OFF
-    cy2d = H // 2 + CENTER_Y_OFF
-
-    angY = 0
-    angX = 18
-    moonA = 0
-    frame = 0
-
-    while True:
-        start = time.ticks_ms()
+# Luna pre-rasterizada por radio en 2 bits/pixel: 0 transparente,
+# 1 relleno, 2 contorno; el color sale de la paleta (cerca / lejos).
+# MOON_KEY: cualquier color que no sea de la luna.
+MOON_KEY = 1
 
-        # salida garantizada
-        if not kill.value():
-            raise KeyboardInterrupt
+def moon_palette(fill_col, rim_col):
+    pal = framebuf.FrameBuffer(bytearray(8), 4, 1, framebuf.RGB565)
+    pal.pixel(0, 0, MOON_KEY)
+    pal.pixel(1, 0, fill_col)
+    pal.pixel(2, 0, rim_col)
+    return pal
 
-        fb.fill(BG)
-
-        # estrellas (parallax)
-        drift = (frame // 2) % W
+# =========================
+# Escena
+# =========================
+class EarthMoon(Scene):
+    FRAME_MS = FRAME_MS
+
+    def init(self):
+        # proyección Tierra (prealocado)
+        self.px = array('h', [0] * N_E)
+        self.py = array('h', [0] * N_E)
+        self.pz = array('h', [0] * N_E)
+
+        # proyección órbita + luna (prealocado)
+        self.opx = array('h', [0] * (ORBIT_SEG + 1))
+        self.opy = array('h', [0] * (ORBIT_SEG + 1))
+        self.opz = array('h', [0] * (ORBIT_SEG + 1))
+
+        # matriz del frame + perspectiva (kernels.xform)
+        par = array('i', [0] * XF_PAR)
+        par[10] = W // 2 + CENTER_X_OFF
+        par[11] = H // 2 + CENTER_Y_OFF
+        par[12] = D
+        par[13] = D
+        par[14] = DEN_MIN
+        self.par = par
+
+        # anillos de atmósfera: fijos en pantalla, vértices una sola vez
+        ax = W // 2 + CENTER_X_OFF
+        ay = H // 2 + CENTER_Y_OFF
+        self.atm2 = circle_pts(ax, ay, EARTH_R + 5, 44)
+        self.atm1 = circle_pts(ax, ay, EARTH_R + 3, 44)
+
+        # sprites de la luna por radio (se llenan la 1a vez que aparece
+        # cada radio; una vuelta de órbita y ya no aloca) + paletas
+        self.moon_spr = {}
+        self.pal_near = moon_palette(MOON_FILL_NEAR, MOON_RIM_NEAR)
+        self.pal_far = moon_palette(MOON_FILL_FAR, MOON_RIM_FAR)
+
+        # Trail luna (prealocado)
+        self.trail_x = array('h', [0] * TRAIL_LEN)
+        self.trail_y = array('h', [0] * TRAIL_LEN)
+        self.trail_i = 0
+
+        # Fondo estrellas: capa estática (fill + un kernel, con parallax)
+        gfx.seed(0xA5A5A5A5)
+        star_x = array('H', [0] * STAR_N)
+        star_y = array('H', [0] * STAR_N)
+        star_c = array('H', [0] * STAR_N)
         for i in range(STAR_N):
-            x = (star_x[i] + drift) % W
-            y = star_y[i]
-            fb.pixel(x, y, STAR1 if star_l[i] == 1 else STAR2)
-
-        cy = cos_deg(angY); sy = sin_deg(angY)
-        cx = cos_deg(angX); sx = sin_deg(angX)
-
-        # órbita
-        for a, b in orbit_edges:
-            x, y, z = orbit_pts[a]
-            x1, y1, z1 = rot_y(x, y, z, cy, sy)
-            x2, y2, z2 = rot_x(x1, y1, z1, cx, sx)
-            xA, yA = project(x2, y2, z2, cx2d, cy2d)
-
-            x, y, z = orbit_pts[b]
-            x1, y1, z1 = rot_y(x, y, z, cy, sy)
-            x2, y2, z2 = rot_x(x1, y1, z1, cx, sx)
-            xB, yB = project(x2, y2, z2, cx2d, cy2d)
-
-            fb.line(xA, yA, xB, yB, ORBIT_C)
-
-        # Tierra: proyecta puntos
-        for i in range(N_E):
-            x, y, z = earth_pts[i]
-            x1, y1, z1 = rot_y(x, y, z, cy, sy)
-            x2, y2, z2 = rot_x(x1, y1, z1, cx, sx)
-            pz[i] = z2
-            sxp, syp = project(x2, y2, z2, cx2d, cy2d)
-            px[i] = sxp
-            py[i] = syp
+            star_x[i] = rnd() % W
+            star_y[i] = rnd() % H
+            star_c[i] = STAR1 if (rnd() & 1) else STAR2
+        self.stars = DotLayer(star_x, star_y, star_c, BG, W, H)
+
+        # modo estela: atenuación + blit parcial de lo que cambia
+        self.decay = None
+        self.dmg = None
+        if DECAY:
+            self.dmg = Damage(W, H)
+            self.decay = Decay(W, H, DECAY_KEEP, gfx.SWAP_BYTES, self.dmg)
+
+        self.angY = 0
+        self.angX = 18
+        self.moonA = 0
+        self.frame = 0
+
+    def update(self, frame):
+        # animación
+        self.angY = (frame * 3) % 360
+        self.moonA = (frame * 6) % 360
+        self.frame = frame
+
+    def render(self, fb):
+        px = self.px; py = self.py; pz = self.pz
+        opx = self.opx; opy = self.opy; opz = self.opz
+        par = self.par
+        trail_x = self.trail_x; trail_y = self.trail_y
+        frame = self.frame
+        moonA = self.moonA
+
+        cx2d = W // 2 + CENTER_X_OFF
+        cy2d = H // 2 + CENTER_Y_OFF
+
+        decay = self.decay
+        if decay is None:
+            # fondo + estrellas (parallax)
+            self.stars.draw(fb, gfx.buf, (frame // 2) % W)
+        elif decay.apply(gfx.buf, gfx.pres.front):
+            # lo atenuado tapó algunas estrellas: se vuelven a poner
+            self.stars.stamp(gfx.buf)
+        else:
+            self.stars.draw(fb, gfx.buf)
+
+        cy = cos_deg(self.angY); sy = sin_deg(self.angY)
+        cx = cos_deg(self.angX); sx = sin_deg(self.angX)
+
+        prof.mark(prof.RASTER)
+
+        # Luna: un vértice más de la órbita
+        OX[MOON_I] = (ORBIT_R * cos_deg(moonA)) // S
+        OZ[MOON_I] = (ORBIT_R * sin_deg(moonA)) // S
+
+        # rot_y -> rot_x en una matriz; cada vértice se transforma una vez
+        # (órbita + luna, Tierra) y las aristas solo leen px/py/pz
+        mat_yxz(par, cy, sy, cx, sx)
+        xform(ORBIT, (opx, opy, opz), par, ORBIT_SEG + 1)
+        if decay is not None:
+            # cajas que escribe el kernel: órbita, Tierra (+ atmósfera)
+            decay.mark(par[16], par[17], par[18], par[19])
+        xform(EARTH, (px, py, pz), par, N_E)
+        if decay is not None:
+            decay.mark(par[16], par[17], par[18], par[19])
+            decay.mark(cx2d - EARTH_R - 6, cy2d - EARTH_R - 6,
+                       cx2d + EARTH_R + 6, cy2d + EARTH_R + 6)
+
+        prof.mark(prof.GEOM)
+
+        # órbita (anillo: i -> i+1)
+        x0 = opx[ORBIT_SEG - 1]; y0 = opy[ORBIT_SEG - 1]
+        for i in range(ORBIT_SEG):
+            x1 = opx[i]; y1 = opy[i]
+            fb.line(x0, y0, x1, y1, ORBIT_C)
+            x0 = x1; y0 = y1
 
         # Tierra wireframe: Z negativa = cerca (frente)
-        for a, b in earth_edges:
+        for k in range(N_EE):
+            a = EA[k]; b = EB[k]
             col = EARTH_F if (pz[a] + pz[b]) < 0 else EARTH_B
             fb.line(px[a], py[a], px[b], py[b], col)
 
         # Atmosfera
-        circle_poly(cx2d, cy2d, EARTH_R + 5, ATM2, seg=44)
-        circle_poly(cx2d, cy2d, EARTH_R + 3, ATM1, seg=44)
-
-        # Luna
-        mx = (ORBIT_R * cos_deg(moonA)) // S
-        mz = (ORBIT_R * sin_deg(moonA)) // S
-        my = 0
-
-        mx1, my1, mz1 = rot_y(mx, my, mz, cy, sy)
-        mx2, my2, mz2 = rot_x(mx1, my1, mz1, cx, sx)
-        moon_x, moon_y = project(mx2, my2, mz2, cx2d, cy2d)
-
-        # trail
-        trail_x[trail_i] = moon_x
-        trail_y[trail_i] = moon_y
-        trail_i = (trail_i + 1) % TRAIL_LEN
-
-        for k in range(TRAIL_LEN):
-            idx = (trail_i + k) % TRAIL_LEN
-            x = trail_x[idx]
-            y = trail_y[idx]
-            if 0 <= x < W and 0 <= y < H:
-                fb.pixel(x, y, TRAIL_COL[k])
+        polyline(fb, self.atm2[0], self.atm2[1], ATM2)
+        polyline(fb, self.atm1[0], self.atm1[1], ATM1)
+
+        # Luna (ya proyectada con la órbita)
+        moon_x = opx[MOON_I]
+        moon_y = opy[MOON_I]
+        mz2 = opz[MOON_I]
+
+        # trail (en modo estela lo deja la luna misma)
+        if decay is None:
+            trail_i = self.trail_i
+            trail_x[trail_i] = moon_x
+            trail_y[trail_i] = moon_y
+            trail_i = (trail_i + 1) % TRAIL_LEN
+            self.trail_i = trail_i
+
+            for k in range(TRAIL_LEN):
+                idx = (trail_i + k) % TRAIL_LEN
+                x = trail_x[idx]
+                y = trail_y[idx]
+                if 0 <= x < W and 0 <= y < H:
+                    fb.pixel(x, y, TRAIL_COL[k])
 
         # tamaño aparente (si Z es negativa => más cerca => más grande)
         den = D + mz2
-        if den < 60: den = 60
+        if den < DEN_MIN: den = DEN_MIN
         kproj = (D * S) // den
-        moon_r = max(6, (MOON_R * kproj) // S)
+        moon_r = (MOON_R * kproj) // S
+        if MOON_RQ > 1: moon_r -= moon_r % MOON_RQ
+        if moon_r < 6: moon_r = 6
 
         # ✅ FIX CLAVE: cerca = mz2 NEGATIVA
         near = (mz2 < 0)
 
-        fill_col = MOON_FILL_NEAR if near else MOON_FILL_FAR
-        rim_col  = MOON_RIM_NEAR  if near else MOON_RIM_FAR
+        # relleno + contorno para que nunca "se pierda" (un blit)
+        fb.blit(self.moon_sprite(moon_r), moon_x - moon_r, moon_y - moon_r,
+                MOON_KEY, self.pal_near if near else self.pal_far)
+        if decay is not None:
+            decay.mark(moon_x - moon_r, moon_y - moon_r, moon_x + moon_r, moon_y + moon_r)
+
+        # HUD (fps / ms por fase / heap con prof.enable())
+        prof.hud(fb, 4, 4, HUD_COL, decay)
+
+    def moon_sprite(self, r):
+        spr = self.moon_spr.get(r)
+        if spr is None:
+            n = 2 * r + 1
+            spr = framebuf.FrameBuffer(bytearray(((n + 3) // 4) * n), n, n,
+                                       framebuf.GS2_HMSB)
+            fill_circle(spr, r, r, r, 1)
+            circle_poly(spr, r, r, r, 2, seg=MOON_SEG)
+            self.moon_spr[r] = spr
+        return spr
+
+    def teardown(self):
+        self.px = self.py = self.pz = None
+        self.atm1 = self.atm2 = None
+        self.moon_spr = None
+        self.pal_near = self.pal_far = None
+        self.opx = self.opy = self.opz = None
+        self.par = None
+        self.trail_x = self.trail_y = None
+        self.stars = None
+        self.decay = None
+        self.dmg = None
 
-        # relleno + contorno para que nunca "se pierda"
-        fill_circle(moon_x, moon_y, moon_r, fill_col)
-        circle_poly(moon_x, moon_y, moon_r, rim_col, seg=20)
-
-        # HUD
-        fb.text("", 4, 4, HUD_COL)
-
-        blit()
-
-        # animación
-        angY = (angY + 3) % 360
-        moonA = (moonA + 6) % 360
-        frame += 1
-
-        # anti-busy: cede CPU SIEMPRE
-        dt = time.ticks_diff(time.ticks_ms(), start)
-        if dt < FRAME_MS:
-            time.sleep_ms(FRAME_MS - dt)
-        else:
-            time.sleep_ms(1)
-
-        if (frame & 31) == 0:
-            gc.collect()
-
-except KeyboardInterrupt:
-    fb.fill(0)
-    blit()
+# =========================
+# LOOP
+# =========================
+if __name__ == "__main__":
+    run(EarthMoon())
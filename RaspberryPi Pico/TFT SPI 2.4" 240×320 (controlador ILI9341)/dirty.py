@@ -0,0 +1,363 @@
+# =========================
+# DIRTY RECTS (blit parcial para ILI9341)
+# =========================
+# En vez de mandar los 240x320x2 bytes cada frame, las escenas marcan
+# las cajas que tocan; aqui se acumulan por tiles, se juntan en
+# rectangulos y se manda una ventana _begin_write por rectangulo. Las
+# filas del rectangulo se copian a un buffer contiguo (_Stage) y salen en
+# bloques de alto fijo, con vistas armadas de antemano (sin crear
+# memoryviews por frame).
+#
+# Ojo: lo que se borró en el frame anterior también hay que mandarlo,
+# por eso se une el frame actual con el anterior antes de transferir.
+#
+# Uso:
+#   dmg = Damage(W, H)
+#   ... dibujar ...
+#   dmg.mark(x0, y0, x1, y1)     # caja inclusiva en pixeles
+#   dmg.flush(tft, buf)          # manda solo lo sucio (o todo si conviene)
+#
+# CellDamage (abajo) es lo mismo para escenas hechas de celdas de texto
+# (Dona): en vez de cajas recibe la grilla de caracteres y manda solo
+# las celdas 8x8 que cambiaron, juntas en runs horizontales.
+
+from array import array
+from kernels import diff_cells, ink_cells, copy_rows, CR_PAR
+
+STAGE = 4096    # bytes del buffer de envío (8 filas de 240 px caben)
+
+class _Stage:
+    # filas del framebuffer -> buffer contiguo -> spi.write. Los anchos
+    # posibles salen de la grilla (múltiplos de unit, o recortados contra
+    # el borde derecho), así que las vistas se arman todas acá: por ancho,
+    # un bloque de k filas, uno de r filas y una fila suelta. Los bloques
+    # tienen alto fijo, el frame no crea ninguna vista.
+    def __init__(self, row_bytes, unit):
+        self.size = STAGE if STAGE > row_bytes else row_bytes
+        self.buf = bytearray(self.size)
+        r = self.size // row_bytes
+        self.r = r
+        self.par = array('i', [0] * CR_PAR)
+
+        mv = memoryview(self.buf)
+        self.views = {}
+        nb = unit
+        while nb <= row_bytes:
+            for w in (nb, row_bytes - nb + unit):
+                if w not in self.views:
+                    k = self.size // w // r * r
+                    blk = mv[:r * w]
+                    self.views[w] = (mv[:k * w] if k > r else blk, blk, mv[:w])
+            nb += unit
+
+    def write(self, spi, src, o, nb, rows, stride):
+        # rows filas de nb bytes desde src[o], separadas stride bytes:
+        # bloques de k filas, después de r, el resto de a una
+        par = self.par
+        par[1] = nb
+        par[3] = stride
+        big, blk, one = self.views[nb]
+        r = self.r
+        k = self.size // nb // r * r
+        while rows > 0:
+            if rows >= k:
+                n = k; v = big
+            elif rows >= r:
+                n = r; v = blk
+            else:
+                n = 1; v = one
+            par[0] = o
+            par[2] = n
+            copy_rows(self.buf, src, par)
+            spi.write(v)
+            o += n * stride
+            rows -= n
+
+class Damage:
+    def __init__(self, w, h, tile=16, max_rects=24, full_pct=70):
+        self.w = w
+        self.h = h
+        self.tile = tile
+        self.tw = (w + tile - 1) // tile
+        self.th = (h + tile - 1) // tile
+
+        n = self.tw * self.th
+        self.cur  = bytearray(n)
+        self._zero = bytes(n)
+        self._ones = b"\x01" * n
+        self.prev = bytearray(self._ones)   # 1er frame: pantalla desconocida
+
+        # Cobertura (en tiles) a partir de la cual sale más barato mandar todo
+        self.full_tiles = (n * full_pct) // 100
+        self.full = False
+
+        # Rectangulos resultantes (en tiles, inclusivos) prealocados
+        self.max_rects = max_rects
+        self.rx0 = array('H', [0] * max_rects)
+        self.ry0 = array('H', [0] * max_rects)
+        self.rx1 = array('H', [0] * max_rects)
+        self.ry1 = array('H', [0] * max_rects)
+        self.n = 0
+
+        self.sent = 0   # bytes mandados en el último flush
+        self.stage = _Stage(w * 2, tile * 2)
+
+    # =========================
+    # Marcado
+    # =========================
+    def mark(self, x0, y0, x1, y1):
+        # caja inclusiva en pixeles; se recorta a pantalla
+        if x0 > x1: x0, x1 = x1, x0
+        if y0 > y1: y0, y1 = y1, y0
+        if x1 < 0 or y1 < 0 or x0 >= self.w or y0 >= self.h:
+            return
+        if x0 < 0: x0 = 0
+        if y0 < 0: y0 = 0
+        if x1 >= self.w: x1 = self.w - 1
+        if y1 >= self.h: y1 = self.h - 1
+
+        t = self.tile
+        tw = self.tw
+        cur = self.cur
+        a = x0 // t
+        b = x1 // t
+        for ty in range(y0 // t, y1 // t + 1):
+            o = ty * tw
+            for tx in range(a, b + 1):
+                cur[o + tx] = 1
+
+    def mark_all(self):
+        # todo sucio (este frame y, por el borrado, también el siguiente)
+        self.cur[:] = self._ones
+
+    # =========================
+    # Merge: runs por fila de tiles + unión vertical de spans iguales
+    # =========================
+    def collect(self):
+        cur = self.cur
+        prev = self.prev
+        tw = self.tw
+        rx0 = self.rx0; ry0 = self.ry0
+        rx1 = self.rx1; ry1 = self.ry1
+
+        n = 0
+        count = 0
+        full = False
+
+        for ty in range(self.th):
+            o = ty * tw
+            tx = 0
+            while tx < tw:
+                if not (cur[o + tx] | prev[o + tx]):
+                    tx += 1
+                    continue
+
+                a = tx
+                while tx < tw and (cur[o + tx] | prev[o + tx]):
+                    tx += 1
+                b = tx - 1
+                count += b - a + 1
+
+                # ¿extiende un rect que terminó en la fila de arriba?
+                k = 0
+                while k < n:
+                    if ry1[k] == ty - 1 and rx0[k] == a and rx1[k] == b:
+                        ry1[k] = ty
+                        break
+                    k += 1
+
+                if k == n:
+                    if n == self.max_rects:
+                        full = True
+                        break
+                    rx0[n] = a; rx1[n] = b
+                    ry0[n] = ty; ry1[n] = ty
+                    n += 1
+
+            if full:
+                break
+
+        if count > self.full_tiles:
+            full = True
+
+        self.n = 0 if full else n
+        self.full = full
+
+        # rota: lo de este frame es lo "anterior" del siguiente
+        self.prev = cur
+        self.cur = prev
+        self.cur[:] = self._zero
+        return self.n
+
+    # =========================
+    # Transferencia
+    # =========================
+    def send(self, tft, buf):
+        w = self.w
+        h = self.h
+        spi = tft.spi
+
+        if self.full:
+            tft._begin_write(0, 0, w - 1, h - 1)
+            spi.write(buf)
+            tft._end_write()
+            self.full = False
+            self.sent = len(buf)
+            return self.sent
+
+        stage = self.stage
+        stride = w * 2
+        t = self.tile
+        sent = 0
+
+        for k in range(self.n):
+            x0 = self.rx0[k] * t
+            y0 = self.ry0[k] * t
+            x1 = (self.rx1[k] + 1) * t - 1
+            y1 = (self.ry1[k] + 1) * t - 1
+            if x1 >= w: x1 = w - 1
+            if y1 >= h: y1 = h - 1
+
+            nb = (x1 - x0 + 1) * 2
+            tft._begin_write(x0, y0, x1, y1)
+            stage.write(spi, buf, y0 * stride + x0 * 2, nb, y1 - y0 + 1, stride)
+            tft._end_write()
+            sent += (y1 - y0 + 1) * nb
+
+        self.sent = sent
+        return sent
+
+    def flush(self, tft, buf):
+        self.collect()
+        return self.send(tft, buf)
+
+# =========================
+# CELL DIFF (grilla de caracteres 8x8)
+# =========================
+# El panel ya tiene la grilla del último frame mandado ("shown"); diff()
+# compara la nueva contra esa y collect() junta las celdas cambiadas de
+# cada fila en runs (con huecos de hasta GAP celdas, que salen más
+# baratos que abrir otra ventana). Cambio de color -> recolor() antes
+# del diff: van las celdas con tinta (las de antes y las nuevas) y las
+# filas pedidas, no el frame completo. Mismo contrato que Damage para
+# Presenter.
+#
+#   dmg = CellDamage(COLS, ROWS)
+#   ... dibujar la grilla ...
+#   dmg.recolor(r0, r1)          # solo si cambió el color (r0..r1: título)
+#   dmg.diff(grid)               # grid: bytearray COLS*ROWS
+#   gfx.present(dmg)
+
+class CellDamage:
+    GAP = 2
+
+    def __init__(self, cols, rows, cell=8, max_runs=160):
+        self.cols = cols
+        self.rows = rows
+        self.cell = cell
+        self.w = cols * cell
+        self.h = rows * cell
+
+        n = cols * rows
+        self.shown = bytearray(b" " * n)    # grilla que tiene el panel
+        self.chg = array('H', [0] * n)      # celdas cambiadas (en orden)
+        self.nchg = 0
+
+        # runs: fila y columnas (inclusivas) en celdas
+        self.max_runs = max_runs
+        self.rr  = array('H', [0] * max_runs)
+        self.rc0 = array('H', [0] * max_runs)
+        self.rc1 = array('H', [0] * max_runs)
+        self.n = 0
+
+        self.full = True    # 1er frame: pantalla desconocida
+        self._all = True
+        self.sent = 0
+        self.stage = _Stage(self.w * 2, cell * 2)
+
+    def diff(self, grid):
+        self.nchg = diff_cells(grid, self.shown, self.chg, self.cols * self.rows)
+        return self.nchg
+
+    def mark_all(self):
+        self._all = True
+
+    def recolor(self, r0, r1):
+        # todo lo que tiene tinta en el panel y las filas r0..r1 dejan de
+        # coincidir con la grilla: el próximo diff() las lista
+        shown = self.shown
+        ink_cells(shown, self.cols * self.rows)
+        for i in range(r0 * self.cols, (r1 + 1) * self.cols):
+            shown[i] = 0
+
+    def collect(self):
+        full = self._all
+        self._all = False
+
+        chg = self.chg
+        cols = self.cols
+        rr = self.rr; rc0 = self.rc0; rc1 = self.rc1
+        gap = self.GAP + 1
+        n = 0
+
+        if not full:
+            k = 0
+            nchg = self.nchg
+            while k < nchg:
+                i = chg[k]
+                r = i // cols
+                c0 = i - r * cols
+                c1 = c0
+                k += 1
+                # mismo run: misma fila y hueco <= GAP
+                while k < nchg:
+                    j = chg[k] - r * cols
+                    if j >= cols or j - c1 > gap:
+                        break
+                    c1 = j
+                    k += 1
+                if n == self.max_runs:
+                    full = True
+                    break
+                rr[n] = r; rc0[n] = c0; rc1[n] = c1
+                n += 1
+
+        self.nchg = 0
+        self.n = 0 if full else n
+        self.full = full
+        return self.n
+
+    def send(self, tft, buf):
+        spi = tft.spi
+
+        if self.full:
+            tft._begin_write(0, 0, self.w - 1, self.h - 1)
+            spi.write(buf)
+            tft._end_write()
+            self.full = False
+            self.sent = len(buf)
+            return self.sent
+
+        stage = self.stage
+        stride = self.w * 2
+        t = self.cell
+        sent = 0
+
+        for k in range(self.n):
+            x0 = self.rc0[k] * t
+            x1 = (self.rc1[k] + 1) * t - 1
+            y0 = self.rr[k] * t
+            nb = (x1 - x0 + 1) * 2
+
+            # las t filas del run en un solo write
+            tft._begin_write(x0, y0, x1, y0 + t - 1)
+            stage.write(spi, buf, y0 * stride + x0 * 2, nb, t, stride)
+            tft._end_write()
+            sent += t * nb
+
+        self.sent = sent
+        return sent
+
+    def flush(self, tft, buf):
+        self.collect()
+        return self.send(tft, buf)
@@ -0,0 +1,157 @@
+# =========================
+# GFXCORE: lo que antes se copiaba en cada escena
+# =========================
+# Display + framebuffer, LUT de seno/coseno, RNG y rotaciones fixed-point.
+# Se construye una sola vez por arranque (el módulo queda en sys.modules),
+# así cambiar de escena no vuelve a pedir los 153 KB del buffer ni a
+# rehacer LUTs. Se puede congelar en el firmware (manifest.py) tal cual.
+#
+# Uso en una escena:
+#   import gfxcore as gfx
+#   from gfxcore import W, H, S, sin_deg, cos_deg, rot_x
+#   from ili9341 import color565         # colores: directo del driver
+#   fb = gfx.fb
+#   ... dibujar ...
+#   gfx.present()          # o gfx.present(dmg)
+#   fb = gfx.fb            # con doble buffer el buffer de dibujo cambia
+
+from machine import Pin, SPI
+from ili9341 import ILI9341
+import gc, math
+from array import array
+from presenter import Presenter
+
+# =========================
+# CONFIG (tu setup)
+# =========================
+PIN_SCK  = 6
+PIN_MOSI = 7
+PIN_CS   = 13
+PIN_RST  = 14
+PIN_DC   = 15
+
+SPI_BAUD = 40_000_000
+ROTATION = 3
+BGR      = True
+
+WIDTH  = 240
+HEIGHT = 320
+
+# Kill switch: GP22 a GND (salida garantizada)
+KILL_PIN = 22
+
+# ✅ FIX CLAVE PARA EL "FONDO VERDE" (Avion.py)
+# Si ves el navy como verde, deja esto en True.
+# Si por alguna razón se te invierte, ponlo en False.
+SWAP_BYTES = True
+
+# =========================
+# INIT display + framebuffer
+# =========================
+spi = SPI(0, baudrate=SPI_BAUD, polarity=0, phase=0,
+          sck=Pin(PIN_SCK), mosi=Pin(PIN_MOSI))
+
+tft = ILI9341(spi, cs=PIN_CS, dc=PIN_DC, rst=PIN_RST,
+              width=WIDTH, height=HEIGHT, rotation=ROTATION, bgr=BGR)
+
+W = tft.width
+H = tft.height
+
+kill = Pin(KILL_PIN, Pin.IN, Pin.PULL_UP)
+
+gc.collect()
+
+# Doble buffer si hay RAM (Pico 2); si no, un buffer y transferencia en línea
+pres = Presenter(tft)
+buf = pres.buf
+fb  = pres.fb
+
+def blit():
+    # frame completo, síncrono (arranque / salida)
+    pres.wait()
+    tft._begin_write(0, 0, W - 1, H - 1)
+    tft.spi.write(buf)
+    tft._end_write()
+
+def clear(col=0):
+    # pantalla completa a un color (salida de escena)
+    fb.fill(col)
+    blit()
+
+def present(dmg=None):
+    # entrega el frame y sigue dibujando en el otro buffer
+    global buf, fb
+    pres.present(dmg)
+    buf = pres.buf
+    fb = pres.fb
+
+def rgb565(r, g, b):
+    # RGB565 estándar
+    v = ((r & 0xF8) << 8) | ((g & 0xFC) << 3) | (b >> 3)
+    # swap para cuando el framebuffer se manda byte-reversed
+    if SWAP_BYTES:
+        v = ((v & 0xFF) << 8) | (v >> 8)
+    return v
+
+# =========================
+# TRIG LUT (fixed) 0..359 * S
+# =========================
+S = 1024
+sinLUT = array('h', [0] * 360)
+for a in range(360):
+    sinLUT[a] = int(math.sin(a * math.pi / 180.0) * S)
+
+def sin_deg(a): return sinLUT[a % 360]
+def cos_deg(a): return sinLUT[(a + 90) % 360]
+
+# =========================
+# RNG (LCG)
+# =========================
+_seed = 0x12345678
+
+# rnd() pasa de 30 bits: en la Pico cada llamada aloca enteros grandes.
+# Para los loops por frame está rnd16() (xorshift de 16 bits, periodo
+# 65535), que nunca sale de small int.
+_s16 = 1
+
+def seed(s):
+    global _seed, _s16
+    _seed = s & 0xFFFFFFFF
+    _s16 = ((s >> 16) ^ s) & 0xFFFF or 1
+
+seed(_seed)
+
+def rnd():
+    global _seed
+    _seed = (_seed * 1664525 + 1013904223) & 0xFFFFFFFF
+    return _seed
+
+def rnd_range(a, b):
+    return a + (rnd() % (b - a + 1))
+
+def rnd16():
+    global _s16
+    x = _s16
+    x ^= (x << 7) & 0xFFFF
+    x ^= x >> 9
+    x ^= (x << 8) & 0xFFFF
+    _s16 = x
+    return x
+
+# =========================
+# 3D helpers (fixed-point)
+# =========================
+def rot_x(x, y, z, cx, sx):
+    y1 = (y * cx - z * sx) // S
+    z1 = (y * sx + z * cx) // S
+    return x, y1, z1
+
+def rot_y(x, y, z, cy, sy):
+    x1 = (x * cy + z * sy) // S
+    z1 = (-x * sy + z * cy) // S
+    return x1, y, z1
+
+def rot_z(x, y, z, cz, sz):
+    x1 = (x * cz - y * sz) // S
+    y1 = (x * sz + y * cz) // S
+    return x1, y1, z
@@ -0,0 +1,134 @@
+# =========================
+# GLYPHS: atlas de caracteres 8x8 ya rasterizados (RGB565)
+# =========================
+# fb.text() vuelve a leer la fuente y pinta pixel por pixel cada vez;
+# aquí cada carácter se rasteriza una sola vez en un tile 8x8 RGB565 y
+# después se copia con fb.blit(). Cambiar de color (tint) vuelve a
+# rasterizar solo los tiles del atlas, no la pantalla.
+#
+# Uso:
+#   at = Atlas(b" .,-~")
+#   at.tint(fg, bg)                  # no hace nada si el color es el mismo
+#   fb.blit(at.tile(ord("~")), x, y)
+
+import framebuf
+
+class Atlas:
+    def __init__(self, chars):
+        self.chars = bytes(chars)
+        n = len(self.chars)
+
+        # todos los tiles en un solo buffer (128 bytes c/u)
+        self.buf = bytearray(n * 128)
+        mv = memoryview(self.buf)
+        self.tiles = [framebuf.FrameBuffer(mv[i * 128:(i + 1) * 128], 8, 8, framebuf.RGB565)
+                      for i in range(n)]
+
+        # código ASCII -> tile (255 = no está en el atlas)
+        self.index = bytearray(b"\xff" * 256)
+        for i in range(n):
+            self.index[self.chars[i]] = i
+
+        # str de 1 carácter hechos una vez (tint() no aloca)
+        self.strs = [chr(c) for c in self.chars]
+
+        self.fg = -1
+        self.bg = -1
+
+    def tint(self, fg, bg=0):
+        # re-rasteriza con otro color; True si hubo cambio
+        if fg == self.fg and bg == self.bg:
+            return False
+        strs = self.strs
+        for i in range(len(strs)):
+            t = self.tiles[i]
+            t.fill(bg)
+            t.text(strs[i], 0, 0, fg)
+        self.fg = fg
+        self.bg = bg
+        return True
+
+    def tile(self, code):
+        return self.tiles[self.index[code]]
+
+# =========================
+# LABELS: banco de etiquetas de texto 1 bit por pixel
+# =========================
+# Para textos cortos que cambian poco (coordenadas, contadores). Cada
+# etiqueta es un sprite MONO_HLSB de w caracteres; set() solo reescribe
+# las celdas cuyo carácter cambió (8 bytes c/u, copiados de la fuente ya
+# rasterizada) y draw() es un solo blit con paleta: 0 -> key
+# (transparente), 1 -> fg. Sin str ni format: cero allocs por frame.
+#
+# Uso:
+#   lb = Labels(b"0123456789", 4, 3, fg)
+#   n = put_dec(s, 0, 42)                    # s: bytearray reutilizable
+#   lb.set(0, s, n)
+#   lb.draw(fb, 0, x, y)
+
+def put_dec(s, i, v):
+    # v (>= 0) en decimal desde s[i]; devuelve el índice siguiente
+    n = 1
+    t = v
+    while t >= 10:
+        t //= 10
+        n += 1
+    j = i + n
+    while n:
+        n -= 1
+        s[i + n] = 48 + v % 10
+        v //= 10
+    return j
+
+class Labels:
+    def __init__(self, chars, n, w, fg):
+        self.n = n
+        self.w = w
+
+        # fuente: 8 bytes (filas) por carácter; la entrada 0 queda en blanco
+        # para lo que no esté en chars
+        chars = bytes(chars)
+        self.font = bytearray((len(chars) + 1) * 8)
+        self.index = bytearray(256)
+        tmp = bytearray(8)
+        t = framebuf.FrameBuffer(tmp, 8, 8, framebuf.MONO_HLSB)
+        for i in range(len(chars)):
+            t.fill(0)
+            t.text(chr(chars[i]), 0, 0, 1)
+            self.font[(i + 1) * 8:(i + 2) * 8] = tmp
+            self.index[chars[i]] = i + 1
+
+        # sprites de todas las etiquetas en un buffer (w bytes por fila)
+        sz = w * 8
+        self.buf = bytearray(n * sz)
+        mv = memoryview(self.buf)
+        self.sprites = [framebuf.FrameBuffer(mv[k * sz:(k + 1) * sz], w * 8, 8, framebuf.MONO_HLSB)
+                        for k in range(n)]
+        self.text = bytearray(n * w)       # índice de fuente por celda (0 = vacío)
+        self.lens = bytearray(n)
+
+        # paleta 1 bit -> RGB565; key es cualquier color distinto de fg
+        self.key = (fg + 1) & 0xFFFF
+        self.pal = framebuf.FrameBuffer(bytearray(4), 2, 1, framebuf.RGB565)
+        self.pal.pixel(0, 0, self.key)
+        self.pal.pixel(1, 0, fg)
+
+    def set(self, k, s, ln):
+        # etiqueta k <- los primeros ln códigos de s
+        w = self.w
+        if ln > w:
+            ln = w
+        text = self.text; font = self.font; index = self.index; buf = self.buf
+        base = k * w
+        for i in range(w):
+            g = index[s[i]] if i < ln else 0
+            if text[base + i] != g:
+                text[base + i] = g
+                o = g * 8
+                p = base * 8 + i
+                for r in range(8):
+                    buf[p + r * w] = font[o + r]
+        self.lens[k] = ln
+
+    def draw(self, fb, k, x, y):
+        fb.blit(self.sprites[k], x, y, self.key, self.pal)
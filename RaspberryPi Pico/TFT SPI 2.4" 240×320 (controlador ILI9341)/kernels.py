@@ -0,0 +1,741 @@
+# =========================
+# KERNELS: transformaciones por lote sobre array('h')
+# =========================
+# Rotación + proyección sobre los arrays completos de vértices
+# (VX/VY/VZ -> PX/PY/PZ) y sin tuplas: la rotación del frame se compone
+# una vez en una matriz 3x3 (mat_yxz) y xform() hace 9 multiplicaciones
+# + la perspectiva por vértice.
+#
+# En la Pico las funciones se compilan con @micropython.viper (enteros de
+# máquina, punteros ptr16/ptr32). El compilador solo reconoce el
+# decorador escrito tal cual, por eso cada kernel lleva el suyo. En el PC
+# (simulador) sim/micropython.py hace de viper un no-op y sim/host.py
+# pone ptr8/ptr16/ptr32 (memoryview) en builtins: el mismo código corre
+# como Python normal y sim/check_kernels.py puede compararlo bit a bit
+# contra una versión directa en Python.
+#
+# Bit-exacto:
+#   x // S       -> x >> 10          (S = 1024, el shift aritmético es floor)
+#   a // den     -> recíproco de tabla + corrección (viper no divide)
+#
+# Parámetros: tuplas de arrays (src = (VX, VY, VZ), ...) + par = array('i')
+# (viper acepta hasta 4 argumentos, por eso van agrupados).
+
+import sys
+import micropython
+from micropython import const
+from array import array
+
+VIPER = sys.implementation.name == "micropython"
+
+# Recíproco 65536 // d para la división exacta (d < _RCP_N)
+_RCP_N = const(1024)
+_RCP = array('H', [0] * _RCP_N)
+for _d in range(2, _RCP_N):
+    _RCP[_d] = 65536 // _d
+_RCP[1] = 65535
+
+# =========================
+# Matriz de rotación por frame (S = 1024)
+# =========================
+# M = Rz(roll) * Rx(pitch) * Ry(yaw), el mismo orden que
+# rot_y -> rot_x -> rot_z. Se escribe en par[0:9] (fila por fila).
+def mat_yxz(par, cy, sy, cx, sx, cz=1024, sz=0):
+    # Rx * Ry
+    r10 = (sx * sy) // 1024
+    r12 = (-sx * cy) // 1024
+    r20 = (-cx * sy) // 1024
+    r22 = (cx * cy) // 1024
+
+    # Rz * (Rx * Ry)
+    par[0] = (cz * cy - sz * r10) // 1024
+    par[1] = (-sz * cx) // 1024
+    par[2] = (cz * sy - sz * r12) // 1024
+    par[3] = (sz * cy + cz * r10) // 1024
+    par[4] = (cz * cx) // 1024
+    par[5] = (sz * sy + cz * r12) // 1024
+    par[6] = r20
+    par[7] = sx
+    par[8] = r22
+
+# =========================
+# Matriz + perspectiva en una pasada (Tierra, órbita, Avión)
+# =========================
+# par: [m00..m22, zoff, cx2d, cy2d, CAM, FOV, DEN_MIN, YFLIP,
+#       bx0, by0, bx1, by1]   (los 4 últimos los escribe el kernel: bbox)
+#   z'  = fila 2 de M + zoff              -> PZ
+#   den = max(CAM + z', DEN_MIN)
+#   PX  = cx2d + (x' * FOV) // den
+#   PY  = cy2d -/+ (y' * FOV) // den     (YFLIP = 1: Y hacia arriba)
+XF_PAR = 20
+
+@micropython.viper
+def xform(src, dst, par, n: int):
+    VX = ptr16(src[0]); VY = ptr16(src[1]); VZ = ptr16(src[2])
+    PX = ptr16(dst[0]); PY = ptr16(dst[1]); PZ = ptr16(dst[2])
+    P = ptr32(par)
+    RC = ptr16(_RCP)
+
+    m00 = P[0]; m01 = P[1]; m02 = P[2]
+    m10 = P[3]; m11 = P[4]; m12 = P[5]
+    m20 = P[6]; m21 = P[7]; m22 = P[8]
+    zoff = P[9]
+    ox = P[10]; oy = P[11]
+    cam = P[12]; fov = P[13]; dmin = P[14]
+    yflip = P[15]
+
+    bx0 = 32767; by0 = 32767
+    bx1 = -32768; by1 = -32768
+
+    for i in range(n):
+        x = (VX[i] ^ 0x8000) - 0x8000
+        y = (VY[i] ^ 0x8000) - 0x8000
+        z = (VZ[i] ^ 0x8000) - 0x8000
+
+        x1 = (m00 * x + m01 * y + m02 * z) >> 10
+        y1 = (m10 * x + m11 * y + m12 * z) >> 10
+        z1 = ((m20 * x + m21 * y + m22 * z) >> 10) + zoff
+
+        PZ[i] = z1 & 0xFFFF
+
+        den = cam + z1
+        if den < dmin:
+            den = dmin
+        r = 0
+        if den < _RCP_N:
+            r = RC[den]
+
+        # (x1 * fov) // den
+        a = x1 * fov
+        q = (a * r) >> 16
+        while q * den > a:
+            q -= 1
+        while q * den + den <= a:
+            q += 1
+        sx2d = ox + q
+
+        # (y1 * fov) // den
+        a = y1 * fov
+        q = (a * r) >> 16
+        while q * den > a:
+            q -= 1
+        while q * den + den <= a:
+            q += 1
+        if yflip:
+            sy2d = oy - q
+        else:
+            sy2d = oy + q
+
+        PX[i] = sx2d & 0xFFFF
+        PY[i] = sy2d & 0xFFFF
+
+        if sx2d < bx0: bx0 = sx2d
+        if sx2d > bx1: bx1 = sx2d
+        if sy2d < by0: by0 = sy2d
+        if sy2d > by1: by1 = sy2d
+
+    P[16] = bx0; P[17] = by0
+    P[18] = bx1; P[19] = by1
+
+# =========================
+# Dona: matriz + proyección + z-test + shade, directo a la grilla ASCII
+# =========================
+# tab = (BX, BY, BZ, BNX, BNY, BNZ)  superficie y normales sin rotar (S)
+# out = (zbuf, grid, shade)          array('h'), bytearray COLS*ROWS, bytes
+# par: [m00..m22, COLS, ROWS, cx2, cy2, K2, X_SCALE, Y_SCALE, NLEV,
+#       cmin, rmin, cmax, rmax]      (los 4 últimos los escribe el kernel)
+# Luz fija (0, 1, -1): dot = ny' - nz' = (fila1 - fila2) . n
+DN_PAR = 21
+
+@micropython.viper
+def donut(tab, out, par, n: int):
+    BX = ptr16(tab[0]); BY = ptr16(tab[1]); BZ = ptr16(tab[2])
+    NX = ptr16(tab[3]); NY = ptr16(tab[4]); NZ = ptr16(tab[5])
+    ZB = ptr16(out[0]); G = ptr8(out[1]); SH = ptr8(out[2])
+    P = ptr32(par)
+    RC = ptr16(_RCP)
+
+    m00 = P[0]; m01 = P[1]; m02 = P[2]
+    m10 = P[3]; m11 = P[4]; m12 = P[5]
+    m20 = P[6]; m21 = P[7]; m22 = P[8]
+    cols = P[9]; rows = P[10]
+    cx2 = P[11]; cy2 = P[12]
+    k2 = P[13]; xs = P[14]; ys = P[15]; nlev = P[16]
+
+    lx = m10 - m20; ly = m11 - m21; lz = m12 - m22
+
+    # limpia zbuf + grilla
+    for i in range(cols * rows):
+        ZB[i] = 0
+        G[i] = 32
+
+    cmin = cols; cmax = -1
+    rmin = rows; rmax = -1
+
+    for i in range(n):
+        x = (BX[i] ^ 0x8000) - 0x8000
+        y = (BY[i] ^ 0x8000) - 0x8000
+        z = (BZ[i] ^ 0x8000) - 0x8000
+
+        zz = ((m20 * x + m21 * y + m22 * z) >> 10) + k2
+        if zz <= 0:
+            continue
+        x1 = (m00 * x + m01 * y + m02 * z) >> 10
+        y1 = (m10 * x + m11 * y + m12 * z) >> 10
+
+        # (S * 64) // (zz // S + 1)
+        d = (zz >> 10) + 1
+        ooz = 65536
+        if d >= 2:
+            ooz = 0
+            if d < _RCP_N:
+                ooz = RC[d]
+
+        # r ~ 65536 / zz (zz hasta 16 bits: tabla de zz >> 4 si no alcanza)
+        r = 0
+        sh = 16
+        if zz < _RCP_N:
+            r = RC[zz]
+        elif (zz >> 4) < _RCP_N:
+            r = RC[zz >> 4]
+            sh = 20
+
+        # xp = cx2 + (x1 * X_SCALE) // zz
+        a = x1 * xs
+        q = (a * r) >> sh
+        while q * zz > a:
+            q -= 1
+        while q * zz + zz <= a:
+            q += 1
+        xp = cx2 + q
+        if xp < 0 or xp >= cols:
+            continue
+
+        # yp = cy2 - (y1 * Y_SCALE) // zz
+        a = y1 * ys
+        q = (a * r) >> sh
+        while q * zz > a:
+            q -= 1
+        while q * zz + zz <= a:
+            q += 1
+        yp = cy2 - q
+        if yp < 0 or yp >= rows:
+            continue
+
+        idx = yp * cols + xp
+        if ooz > ZB[idx]:
+            ZB[idx] = ooz
+
+            nx = (NX[i] ^ 0x8000) - 0x8000
+            ny = (NY[i] ^ 0x8000) - 0x8000
+            nz = (NZ[i] ^ 0x8000) - 0x8000
+            dot = (lx * nx + ly * ny + lz * nz) >> 10
+            lev = 0
+            if dot > 0:
+                lev = (dot * nlev) >> 11
+                if lev > nlev:
+                    lev = nlev
+            G[idx] = SH[lev]
+
+            if xp < cmin: cmin = xp
+            if xp > cmax: cmax = xp
+            if yp < rmin: rmin = yp
+            if yp > rmax: rmax = yp
+
+    P[17] = cmin; P[18] = rmin
+    P[19] = cmax; P[20] = rmax
+
+# =========================
+# Diff de grillas de bytes (celdas que cambiaron)
+# =========================
+# Compara cur contra prev, anota en out (array('H')) los índices que
+# cambiaron (en orden) y deja prev = cur. Devuelve cuántos hay.
+@micropython.viper
+def diff_cells(cur, prev, out, n: int) -> int:
+    C = ptr8(cur); P = ptr8(prev)
+    O = ptr16(out)
+    k = 0
+    for i in range(n):
+        c = C[i]
+        if c != P[i]:
+            O[k] = i
+            k += 1
+            P[i] = c
+    return k
+
+# Cambio de color: las celdas con tinta (!= espacio) pasan a 0, que no
+# coincide con ningún carácter, así el próximo diff_cells las vuelve a
+# listar aunque el carácter sea el mismo.
+@micropython.viper
+def ink_cells(cells, n: int):
+    C = ptr8(cells)
+    for i in range(n):
+        if C[i] != 32:
+            C[i] = 0
+
+# =========================
+# Filas sueltas -> buffer contiguo (blit parcial)
+# =========================
+# par: [o, nb, rows, stride] en bytes (pares). Copia rows filas de nb
+# bytes desde src[o], separadas stride bytes, una tras otra en dst.
+CR_PAR = 4
+
+@micropython.viper
+def copy_rows(dst, src, par):
+    D = ptr16(dst); SRC = ptr16(src)
+    P = ptr32(par)
+    o = P[0] >> 1
+    nh = P[1] >> 1
+    rows = P[2]
+    st = P[3] >> 1
+    j = 0
+    for r in range(rows):
+        i = o
+        e = o + nh
+        while i < e:
+            D[j] = SRC[i]
+            i += 1
+            j += 1
+        o += st
+
+# =========================
+# Neural mesh: vecinos por grilla espacial (celda = LINK_DIST)
+# =========================
+# pos = (X, Y, XC, YC)        posiciones array('h'); XC[x] / YC[y] celda (bytearray)
+# idx = (CELL, START, FILL, ORDER)
+#       CELL bytearray(n), START / FILL array('H', ncell + 1), ORDER array('H', n)
+# out = (LA, LB, LF, BEST, BD)
+#       links LA -> LB (array('H')), LF = 1 si está muy cerca (bytearray),
+#       BEST / BD array('H', MAXL) de trabajo
+# par: [n, cols, rows, DIST2, MAXL, nlinks]   (nlinks lo escribe el kernel)
+#
+# Mismo resultado que el doble loop: para cada i, los primeros MAXL j > i
+# (en orden de índice) a distancia <= DIST, en ese orden.
+GL_PAR = 6
+
+@micropython.viper
+def grid_links(pos, idx, out, par):
+    X = ptr16(pos[0]); Y = ptr16(pos[1])
+    XC = ptr8(pos[2]); YC = ptr8(pos[3])
+    CELL = ptr8(idx[0]); START = ptr16(idx[1])
+    FILL = ptr16(idx[2]); ORDER = ptr16(idx[3])
+    LA = ptr16(out[0]); LB = ptr16(out[1]); LF = ptr8(out[2])
+    BEST = ptr16(out[3]); BD = ptr16(out[4])
+    P = ptr32(par)
+
+    n = P[0]; cols = P[1]; rows = P[2]
+    dist2 = P[3]; maxl = P[4]
+    near2 = dist2 >> 2
+    ncell = cols * rows
+
+    # counting sort por celda (estable: dentro de cada celda, i creciente)
+    for c in range(ncell + 1):
+        START[c] = 0
+    for i in range(n):
+        c = XC[X[i]] + YC[Y[i]] * cols
+        CELL[i] = c
+        START[c + 1] += 1
+    for c in range(ncell):
+        START[c + 1] += START[c]
+    for c in range(ncell + 1):
+        FILL[c] = START[c]
+    for i in range(n):
+        c = CELL[i]
+        ORDER[FILL[c]] = i
+        FILL[c] += 1
+
+    nl = 0
+    for i in range(n):
+        xi = (X[i] ^ 0x8000) - 0x8000
+        yi = (Y[i] ^ 0x8000) - 0x8000
+        c = CELL[i]
+        cy = YC[Y[i]]
+        cx = c - cy * cols
+
+        # BEST: los j más chicos encontrados (ordenados), hasta maxl
+        k = 0
+        gy = cy - 1
+        while gy <= cy + 1:
+            if gy >= 0 and gy < rows:
+                gx = cx - 1
+                while gx <= cx + 1:
+                    if gx >= 0 and gx < cols:
+                        g = gy * cols + gx
+                        for p in range(START[g], START[g + 1]):
+                            j = ORDER[p]
+                            if j <= i:
+                                continue
+                            if k == maxl and j >= BEST[k - 1]:
+                                continue
+                            dx = xi - ((X[j] ^ 0x8000) - 0x8000)
+                            dy = yi - ((Y[j] ^ 0x8000) - 0x8000)
+                            d2 = dx * dx + dy * dy
+                            if d2 > dist2:
+                                continue
+                            q = k
+                            if k == maxl:
+                                q = maxl - 1
+                            while q > 0 and BEST[q - 1] > j:
+                                BEST[q] = BEST[q - 1]
+                                BD[q] = BD[q - 1]
+                                q -= 1
+                            BEST[q] = j
+                            BD[q] = d2
+                            if k < maxl:
+                                k += 1
+                    gx += 1
+            gy += 1
+
+        for q in range(k):
+            LA[nl] = i
+            LB[nl] = BEST[q]
+            LF[nl] = 0
+            if BD[q] < near2:
+                LF[nl] = 1
+            nl += 1
+
+    P[5] = nl
+
+# =========================
+# Capas estáticas (layers.py)
+# =========================
+# rows_restore: filas plantilla -> buf, solo en la caja x0..x1, y0..y1
+# (inclusiva, ya recortada a pantalla).
+# src = (ROWS, KIND): ROWS bytearray(k * w * 2) con las k filas distintas,
+#                     KIND bytearray(h) qué fila va en cada y
+# par: [w, x0, y0, x1, y1]
+RR_PAR = 5
+
+@micropython.viper
+def rows_restore(buf, src, par):
+    D = ptr16(buf)
+    R = ptr16(src[0]); K = ptr8(src[1])
+    P = ptr32(par)
+    w = P[0]
+    x0 = P[1]; y0 = P[2]
+    x1 = P[3]; y1 = P[4]
+    y = y0
+    while y <= y1:
+        o = y * w
+        t = K[y] * w
+        x = x0
+        while x <= x1:
+            D[o + x] = R[t + x]
+            x += 1
+        y += 1
+
+# dots: pixeles sueltos pts = (X, Y, C) array('H') -> buf, corridos dx
+# en x y dy en y (0 <= dx < w, 0 <= dy < h, dan la vuelta).
+# par: [n, w, dx, dy, h]
+DT_PAR = 5
+
+@micropython.viper
+def dots(buf, pts, par):
+    D = ptr16(buf)
+    X = ptr16(pts[0]); Y = ptr16(pts[1]); C = ptr16(pts[2])
+    P = ptr32(par)
+    n = P[0]; w = P[1]; dx = P[2]; dy = P[3]; h = P[4]
+    for i in range(n):
+        x = X[i] + dx
+        if x >= w:
+            x -= w
+        y = Y[i] + dy
+        if y >= h:
+            y -= h
+        D[y * w + x] = C[i]
+
+# fade: la caja x0..x1, y0..y1 de src, atenuada, en dst (modo estela).
+# dst puede ser src (en su lugar) u otro buffer del mismo tamaño (doble
+# buffer: el de enfrente atenuado en el de atrás).
+# lut = bytearray(128): R[0:32] | G[32:96] | B[96:128], cada canal ya
+# atenuado; los pixeles en 0 quedan en 0. swap = 1 si el framebuffer va
+# byte-reversed (gfxcore.SWAP_BYTES).
+# par: [w, x0, y0, x1, y1, swap]
+FD_PAR = 6
+
+@micropython.viper
+def fade(dst, src, lut, par):
+    D = ptr16(dst); SRC = ptr16(src)
+    L = ptr8(lut)
+    P = ptr32(par)
+    w = P[0]
+    x0 = P[1]; y0 = P[2]
+    x1 = P[3]; y1 = P[4]
+    swap = P[5]
+    y = y0
+    while y <= y1:
+        o = y * w
+        x = x0
+        while x <= x1:
+            v = SRC[o + x]
+            if v:
+                if swap:
+                    v = ((v & 0xFF) << 8) | (v >> 8)
+                v = (L[v >> 11] << 11) | (L[32 + ((v >> 5) & 63)] << 5) | L[96 + (v & 31)]
+                if swap:
+                    v = ((v & 0xFF) << 8) | (v >> 8)
+            D[o + x] = v
+            x += 1
+        y += 1
+
+# =========================
+# Back-face culling (Avion)
+# =========================
+# fc  = (NX, NY, NZ, CX, CY, CZ) array('h'): normal de cada cara (x S,
+#       hacia afuera) y su centro, en coordenadas del modelo
+# ed  = (EF0, EF1) array('H'): las 2 caras de cada arista (0xFFFF = no hay)
+# out = (FV, EV) bytearray: FV[f] = 1 si la cara mira a la cámara,
+#       EV[e] = 1 si la arista tiene caras y todas están de espaldas
+# par: el mismo de xform (matriz en par[0:9], zoff par[9], CAM par[12])
+#
+# La cámara está en z' = -CAM (igual que en xform): la cara se ve si
+# (M n) . (M c + zoff + CAM) < 0.
+@micropython.viper
+def cull(fc, ed, out, par):
+    NX = ptr16(fc[0]); NY = ptr16(fc[1]); NZ = ptr16(fc[2])
+    CX = ptr16(fc[3]); CY = ptr16(fc[4]); CZ = ptr16(fc[5])
+    EF0 = ptr16(ed[0]); EF1 = ptr16(ed[1])
+    FV = ptr8(out[0]); EV = ptr8(out[1])
+    P = ptr32(par)
+    nf = int(len(out[0]))
+    ne = int(len(out[1]))
+
+    m00 = P[0]; m01 = P[1]; m02 = P[2]
+    m10 = P[3]; m11 = P[4]; m12 = P[5]
+    m20 = P[6]; m21 = P[7]; m22 = P[8]
+    zc = P[9] + P[12]
+
+    for f in range(nf):
+        x = (NX[f] ^ 0x8000) - 0x8000
+        y = (NY[f] ^ 0x8000) - 0x8000
+        z = (NZ[f] ^ 0x8000) - 0x8000
+        nx = (m00 * x + m01 * y + m02 * z) >> 10
+        ny = (m10 * x + m11 * y + m12 * z) >> 10
+        nz = (m20 * x + m21 * y + m22 * z) >> 10
+
+        x = (CX[f] ^ 0x8000) - 0x8000
+        y = (CY[f] ^ 0x8000) - 0x8000
+        z = (CZ[f] ^ 0x8000) - 0x8000
+        cx = (m00 * x + m01 * y + m02 * z) >> 10
+        cy = (m10 * x + m11 * y + m12 * z) >> 10
+        cz = ((m20 * x + m21 * y + m22 * z) >> 10) + zc
+
+        FV[f] = 0
+        if nx * cx + ny * cy + nz * cz < 0:
+            FV[f] = 1
+
+    for e in range(ne):
+        a = EF0[e]
+        b = EF1[e]
+        back = 0
+        if a != 0xFFFF:
+            back = 1
+            if FV[a]:
+                back = 0
+            if b != 0xFFFF:
+                if FV[b]:
+                    back = 0
+        EV[e] = back
+
+# =========================
+# Aristas por profundidad (counting sort, Avion)
+# =========================
+# ed  = (EA, EB) array('H'), pz = PZ de xform
+# out = (ORDER array('H', ne), START array('H', nb + 1),
+#        FILL array('H', nb), BIN bytearray(ne))
+# par: [ne, zmin, shift, nb]
+#   zavg = (PZ[a] + PZ[b]) // 2,  bin = (zavg - zmin) >> shift  (0..nb-1)
+# Deja las aristas del bin b en ORDER[START[b]:START[b + 1]], en orden de
+# índice (estable).
+DB_PAR = 4
+
+@micropython.viper
+def depth_bins(ed, pz, out, par):
+    EA = ptr16(ed[0]); EB = ptr16(ed[1])
+    PZ = ptr16(pz)
+    ORDER = ptr16(out[0]); START = ptr16(out[1])
+    FILL = ptr16(out[2]); BIN = ptr8(out[3])
+    P = ptr32(par)
+    ne = P[0]; zmin = P[1]; sh = P[2]; nb = P[3]
+
+    for b in range(nb + 1):
+        START[b] = 0
+
+    for e in range(ne):
+        za = (((PZ[EA[e]] ^ 0x8000) - 0x8000) + ((PZ[EB[e]] ^ 0x8000) - 0x8000)) >> 1
+        b = (za - zmin) >> sh
+        if b < 0:
+            b = 0
+        if b >= nb:
+            b = nb - 1
+        BIN[e] = b
+        START[b + 1] += 1
+
+    for b in range(nb):
+        START[b + 1] += START[b]
+        FILL[b] = START[b]
+
+    for e in range(ne):
+        b = BIN[e]
+        ORDER[FILL[b]] = e
+        FILL[b] += 1
+
+# =========================
+# Estrellas de la galaxia (rotación diferencial, Galaxia)
+# =========================
+# st  = (R array('H'), ANG array('H'), BR bytearray, DR array('b')):
+#       radio, ángulo (grados), brillo y drift radial de cada estrella
+# tab = (OMEGA bytearray(maxr + 1), COS array('h', 360),
+#        SINE array('h', 360), RADT bytearray(maxr + 1), PAL array('H', 256))
+#       OMEGA[r] grados por frame, SINE = sin ya escalado por la elipse,
+#       RADT[r] = r * 255 // maxr (base de la paleta)
+# par: [n, w, h, cx, cy, drift, maxr]
+#   ang += OMEGA[r]; con drift r += DR (recortado a 0..maxr)
+#   x = cx + r * COS[ang] >> 10,  y = cy + r * SINE[ang] >> 10
+#   color PAL[(RADT[r] + br // 3) & 255], br > 240 suma +1 en x y en y
+# br // 3 = (br * 171) >> 9 (exacto para 0..255). Avanza R / ANG en su
+# lugar y pinta en buf.
+GX_PAR = 7
+
+@micropython.viper
+def _galaxy(st, tab, buf, par):
+    R = ptr16(st[0]); A = ptr16(st[1])
+    BR = ptr8(st[2]); DR = ptr8(st[3])
+    OM = ptr8(tab[0]); COS = ptr16(tab[1]); SINE = ptr16(tab[2])
+    RADT = ptr8(tab[3]); PAL = ptr16(tab[4])
+    D = ptr16(buf)
+    P = ptr32(par)
+    n = P[0]; w = P[1]; h = P[2]
+    cx = P[3]; cy = P[4]
+    drift = P[5]; maxr = P[6]
+
+    for i in range(n):
+        r = R[i]
+        a = A[i] + OM[r]
+        if a >= 360:
+            a -= 360
+        A[i] = a
+        if drift:
+            r += (DR[i] ^ 0x80) - 0x80
+            if r < 0:
+                r = 0
+            if r > maxr:
+                r = maxr
+            R[i] = r
+
+        x = cx + ((r * ((COS[a] ^ 0x8000) - 0x8000)) >> 10)
+        y = cy + ((r * ((SINE[a] ^ 0x8000) - 0x8000)) >> 10)
+        if x >= 0 and x < w and y >= 0 and y < h:
+            br = BR[i]
+            c = PAL[(RADT[r] + ((br * 171) >> 9)) & 255]
+            o = y * w + x
+            D[o] = c
+            if br > 240:
+                if x + 1 < w:
+                    D[o + 1] = c
+                if y + 1 < h:
+                    D[o + w] = c
+
+# En el PC el lote va con NumPy (el mismo resultado, el simulador no se
+# arrastra con miles de estrellas); sin NumPy corre el cuerpo de arriba.
+galaxy = _galaxy
+if not VIPER:
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+
+    def _galaxy_np(st, tab, buf, par):
+        n = par[0]; w = par[1]; h = par[2]
+        R = np.frombuffer(st[0], np.uint16, n)
+        A = np.frombuffer(st[1], np.uint16, n)
+        BR = np.frombuffer(st[2], np.uint8, n).astype(np.int32)
+        OM = np.frombuffer(tab[0], np.uint8)
+        COS = np.frombuffer(tab[1], np.int16)
+        SINE = np.frombuffer(tab[2], np.int16)
+        RADT = np.frombuffer(tab[3], np.uint8)
+        PAL = np.frombuffer(tab[4], np.uint16)
+        D = np.frombuffer(buf, np.uint16)
+
+        r = R.astype(np.int32)
+        a = A + OM[r]
+        a[a >= 360] -= 360
+        A[:] = a
+        if par[5]:
+            r = np.clip(r + np.frombuffer(st[3], np.int8, n), 0, par[6])
+            R[:] = r
+
+        x = par[3] + ((r * COS[a]) >> 10)
+        y = par[4] + ((r * SINE[a]) >> 10)
+        ok = (x >= 0) & (x < w) & (y >= 0) & (y < h)
+        c = PAL[(RADT[r] + ((BR * 171) >> 9)) & 255]
+        o = y * w + x
+        sp = ok & (BR > 240)
+
+        # misma secuencia de escrituras que el loop: pixel, x + 1, y + 1
+        # (con índices repetidos gana la última)
+        m = np.stack((ok, sp & (x + 1 < w), sp & (y + 1 < h)), 1).ravel()
+        q = np.stack((o, o + 1, o + w), 1).ravel()
+        D[q[m]] = np.repeat(c, 3)[m]
+
+    if np is not None:
+        galaxy = _galaxy_np
+
+# =========================
+# Estrellas fugaces: pool SoA (Galaxia)
+# =========================
+# pool = (X, Y, VX, VY, LIFE, FREE) array('h', cap): posición, velocidad
+#        y vida (0 = libre) de cada fugaz; FREE es la pila de índices
+#        libres, con FREE[0:nfree] válidos
+# par: [cap, w, h, trail, nfree, col_trail, col_head]
+# Por cada fugaz viva: trail pixeles hacia atrás (paso -v), la cabeza,
+# avanza y resta vida; la que se acaba o sale de pantalla (+20) vuelve
+# a FREE y actualiza par[4].
+MT_PAR = 7
+
+@micropython.viper
+def meteors(pool, buf, par):
+    X = ptr16(pool[0]); Y = ptr16(pool[1])
+    VX = ptr16(pool[2]); VY = ptr16(pool[3])
+    LIFE = ptr16(pool[4]); FREE = ptr16(pool[5])
+    D = ptr16(buf)
+    P = ptr32(par)
+    cap = P[0]; w = P[1]; h = P[2]
+    tl = P[3]; nfree = P[4]
+    ct = P[5]; ch = P[6]
+
+    for i in range(cap):
+        life = LIFE[i]
+        if life == 0:
+            continue
+        x = (X[i] ^ 0x8000) - 0x8000
+        y = (Y[i] ^ 0x8000) - 0x8000
+        vx = (VX[i] ^ 0x8000) - 0x8000
+        vy = (VY[i] ^ 0x8000) - 0x8000
+
+        # trail
+        x2 = x; y2 = y
+        k = 0
+        while k < tl:
+            x2 -= vx
+            y2 -= vy
+            if x2 >= 0 and x2 < w and y2 >= 0 and y2 < h:
+                D[y2 * w + x2] = ct
+            k += 1
+
+        if x >= 0 and x < w and y >= 0 and y < h:
+            D[y * w + x] = ch
+
+        x += vx
+        y += vy
+        life -= 1
+        if x < -20 or x > w + 20 or y < -20 or y > h + 20:
+            life = 0
+        X[i] = x & 0xFFFF
+        Y[i] = y & 0xFFFF
+        LIFE[i] = life
+        if life == 0:
+            FREE[nfree] = i
+            nfree += 1
+
+    P[4] = nfree
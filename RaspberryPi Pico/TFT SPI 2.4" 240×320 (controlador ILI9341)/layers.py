@@ -0,0 +1,202 @@
+# =========================
+# LAYERS: capas estáticas que se restauran en vez de redibujarse
+# =========================
+# Un respaldo completo del fondo serían otros 153 KB (no caben en la
+# Pico), así que cada capa se guarda en lo mínimo que la describe:
+#
+# RowLayer -> fondo hecho de pocas filas distintas (la cuadrícula de
+#   Avion). Se dibuja una vez en el framebuffer, capture() se queda con
+#   las filas distintas + qué fila va en cada y, y restore() las vuelve
+#   a copiar: todo el frame o solo una caja (lo que ensució el frame
+#   anterior).
+#
+# DotLayer -> pixeles sueltos sobre un color liso (estrellas, polvo).
+#   draw() = fill + un kernel que pone todos los pixeles, con scroll
+#   opcional (da la vuelta en x / y). stamp() solo pone los pixeles,
+#   encima de lo que ya haya.
+#
+# Decay -> modo estela: en vez de fill el frame anterior se atenúa
+#   (kernels.fade, LUT por canal) y lo que se mueve deja estela por
+#   acumulación. Solo se atenúa la unión de lo que se dibujó en los
+#   últimos n frames (lo que todavía no llegó a negro), y con dmg esa
+#   misma caja es lo único que se manda. Con doble buffer el frame
+#   anterior es el de enfrente: apply(gfx.buf, gfx.pres.front) lo copia
+#   atenuado al de atrás, así la estela es una sola historia y no dos
+#   que se atenúan un frame de cada dos.
+#
+# Uso:
+#   lay = RowLayer(W, H)
+#   draw_grid(gfx.fb)
+#   lay.capture(gfx.buf)             # False si tiene demasiadas filas
+#   ...
+#   lay.restore(gfx.buf, x0, y0, x1, y1)
+
+from array import array
+from kernels import rows_restore, RR_PAR, dots, DT_PAR, fade, FD_PAR
+
+class RowLayer:
+    def __init__(self, w, h, max_rows=8):
+        self.w = w
+        self.h = h
+        self.max_rows = max_rows
+        self.rows = None
+        self.kind = bytearray(h)
+        self.par = array('i', [0] * RR_PAR)
+        self.par[0] = w
+
+    def capture(self, buf):
+        # filas distintas de buf (ya dibujado); False si pasan de max_rows
+        w2 = self.w * 2
+        mv = memoryview(buf)
+        seen = {}
+        rows = []
+        for y in range(self.h):
+            r = bytes(mv[y * w2:(y + 1) * w2])
+            k = seen.get(r)
+            if k is None:
+                if len(rows) == self.max_rows:
+                    self.rows = None
+                    return False
+                k = len(rows)
+                seen[r] = k
+                rows.append(r)
+            self.kind[y] = k
+        self.rows = bytearray(b"".join(rows))
+        self.src = (self.rows, self.kind)
+        return True
+
+    def restore(self, buf, x0, y0, x1, y1):
+        # caja inclusiva en pixeles; se recorta a pantalla
+        if x0 < 0: x0 = 0
+        if y0 < 0: y0 = 0
+        if x1 >= self.w: x1 = self.w - 1
+        if y1 >= self.h: y1 = self.h - 1
+        if x0 > x1 or y0 > y1:
+            return
+        par = self.par
+        par[1] = x0; par[2] = y0
+        par[3] = x1; par[4] = y1
+        rows_restore(buf, self.src, par)
+
+    def restore_all(self, buf):
+        self.restore(buf, 0, 0, self.w - 1, self.h - 1)
+
+class DotLayer:
+    def __init__(self, xs, ys, cols, bg, w, h):
+        # xs / ys / cols: array('H') de igual largo
+        self.pts = (xs, ys, cols)
+        self.bg = bg
+        self.par = array('i', [0] * DT_PAR)
+        self.par[0] = len(xs)
+        self.par[1] = w
+        self.par[4] = h
+
+    def draw(self, fb, buf, dx=0, dy=0):
+        # fondo liso + todos los pixeles corridos dx en x, dy en y
+        fb.fill(self.bg)
+        self.stamp(buf, dx, dy)
+
+    def stamp(self, buf, dx=0, dy=0):
+        # solo los pixeles (0 <= dx < w, 0 <= dy < h)
+        par = self.par
+        par[2] = dx
+        par[3] = dy
+        dots(buf, self.pts, par)
+
+def fade_lut(keep):
+    # canal -> canal * keep // 256 (R y B de 5 bits, G de 6), keep < 256
+    lut = bytearray(128)
+    for c in range(32):
+        lut[c] = (c * keep) >> 8
+        lut[96 + c] = (c * keep) >> 8
+    for c in range(64):
+        lut[32 + c] = (c * keep) >> 8
+    return lut
+
+class Decay:
+    def __init__(self, w, h, keep=192, swap=True, dmg=None):
+        self.w = w
+        self.h = h
+        self.lut = fade_lut(keep)
+        self.dmg = dmg
+        self.par = array('i', [0] * FD_PAR)
+        self.par[0] = w
+        self.par[5] = 1 if swap else 0
+
+        # frames hasta que el canal más brillante (G = 63) llega a 0; el
+        # ring guarda esos k frames más el que se está dibujando
+        k = 0
+        c = 63
+        while c:
+            c = self.lut[32 + c]
+            k += 1
+        self.n = k + 1
+
+        # ring de cajas dibujadas (x0, y0, x1, y1) por frame; vacía = x0 > x1
+        self.boxes = array('h', [0] * (4 * self.n))
+        for i in range(self.n):
+            self._empty(i)
+        self.i = 0
+        self.fresh = 2      # los 2 primeros frames: fondo entero (cada buffer)
+
+    def _empty(self, i):
+        b = self.boxes
+        i *= 4
+        b[i] = self.w; b[i + 1] = self.h
+        b[i + 2] = -1; b[i + 3] = -1
+
+    def mark(self, x0, y0, x1, y1):
+        # caja inclusiva dibujada este frame (misma firma que Damage.mark)
+        b = self.boxes
+        i = self.i * 4
+        if x0 < b[i]: b[i] = x0
+        if y0 < b[i + 1]: b[i + 1] = y0
+        if x1 > b[i + 2]: b[i + 2] = x1
+        if y1 > b[i + 3]: b[i + 3] = y1
+        if self.dmg is not None:
+            self.dmg.mark(x0, y0, x1, y1)
+
+    def mark_all(self):
+        self.mark(0, 0, self.w - 1, self.h - 1)
+
+    def apply(self, buf, src=None):
+        # src (el frame anterior, por defecto buf) atenuado en buf y abre
+        # la caja del frame nuevo. Fuera de la caja buf ya coincide: ahí
+        # solo queda fondo en los dos buffers. False en los frames fresh:
+        # la escena tiene que dibujar el fondo entero (fill) en vez de
+        # atenuar
+        i = self.i + 1
+        if i == self.n:
+            i = 0
+        if self.fresh:
+            self.fresh -= 1
+            self.i = i
+            self._empty(i)
+            if self.dmg is not None:
+                self.dmg.mark_all()
+            return False
+
+        b = self.boxes
+        x0 = self.w; y0 = self.h
+        x1 = -1; y1 = -1
+        for k in range(0, 4 * self.n, 4):
+            if b[k] < x0: x0 = b[k]
+            if b[k + 1] < y0: y0 = b[k + 1]
+            if b[k + 2] > x1: x1 = b[k + 2]
+            if b[k + 3] > y1: y1 = b[k + 3]
+        self.i = i
+        self._empty(i)
+
+        if x0 < 0: x0 = 0
+        if y0 < 0: y0 = 0
+        if x1 >= self.w: x1 = self.w - 1
+        if y1 >= self.h: y1 = self.h - 1
+        if x0 > x1 or y0 > y1:
+            return True
+        par = self.par
+        par[1] = x0; par[2] = y0
+        par[3] = x1; par[4] = y1
+        fade(buf, buf if src is None else src, self.lut, par)
+        if self.dmg is not None:
+            self.dmg.mark(x0, y0, x1, y1)
+        return True
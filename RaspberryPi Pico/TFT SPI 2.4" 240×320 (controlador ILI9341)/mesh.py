@@ -0,0 +1,85 @@
+# =========================
+# MESH: malla pre-armada en binario (vértices, aristas, caras)
+# =========================
+# Armar la malla en el arranque (listas, append, closures + los sqrt de
+# las normales) tarda y deja un pico de heap. El .msh ya trae los arrays
+# finales tal como los usan los kernels y load() los lee directo con
+# readinto(), sin listas intermedias.
+#
+# Formato (little-endian):
+#   header  "MSH1", nv, ne, nf, flags         (4s + 4 x uint16 = 12 bytes)
+#   VX VY VZ          int16[nv]   vértices (SoA)
+#   EA EB             uint16[ne]  aristas
+#   NX NY NZ CX CY CZ int16[nf]   normal (x S) y centro de cada cara
+#   EF0 EF1           uint16[ne]  las 2 caras de cada arista (0xFFFF = no hay)
+#
+# load() devuelve (src, edges, fc, ed): src = (VX, VY, VZ) para xform,
+# edges = (EA, EB), fc / ed para kernels.cull.
+#
+#   src, edges, fc, ed = load("airliner.msh")
+#   src, edges, fc, ed = load(AIRLINER)        # bytes congelado (manifest)
+#
+# Un bytes congelado se lee igual por io.BytesIO: una copia directa a
+# RAM alineada (ptr16 necesita 2 bytes de alineación y el render indexa
+# EA / EB desde Python, así que una vista sobre la flash no sirve).
+#
+# En el PC: python sim/export_mesh.py arma el .msh desde build_airliner().
+
+import io, sys, struct
+from array import array
+
+MAGIC = b"MSH1"
+HEADER = "<4sHHHH"
+HEADER_SIZE = 12
+
+def _read(f, tc, n):
+    # el array sale de un buffer en cero (sin lista de n ints) y se llena
+    # con readinto
+    a = array(tc, bytes(2 * n))
+    if n and f.readinto(a) != 2 * n:
+        raise ValueError("mesh: archivo corto")
+    return a
+
+def _check(a, n, none):
+    # índices de a < n (o el "no hay"): los kernels los usan sin chequear
+    # a través de ptr16, uno fuera de rango escribe fuera del array
+    for v in a:
+        if v >= n and v != none:
+            raise ValueError("mesh: índice fuera de rango")
+
+def load(src):
+    # src: ruta al .msh o un buffer (bytes congelado, bytearray). Un
+    # archivo corto, de otro formato o con índices fuera de rango da
+    # ValueError (nunca struct.error ni arrays a medias).
+    f = open(src, "rb") if isinstance(src, str) else io.BytesIO(src)
+    try:
+        head = f.read(HEADER_SIZE)
+        if len(head) != HEADER_SIZE or head[:4] != MAGIC:
+            raise ValueError("mesh: no es MSH1")
+        magic, nv, ne, nf, flags = struct.unpack(HEADER, head)
+        size = f.seek(0, 2)
+        if size != HEADER_SIZE + 2 * (3 * nv + 4 * ne + 6 * nf):
+            raise ValueError("mesh: el largo no coincide con el header")
+        f.seek(HEADER_SIZE)
+        vs = (_read(f, 'h', nv), _read(f, 'h', nv), _read(f, 'h', nv))
+        edges = (_read(f, 'H', ne), _read(f, 'H', ne))
+        fc = tuple(_read(f, 'h', nf) for _ in range(6))
+        ed = (_read(f, 'H', ne), _read(f, 'H', ne))
+    finally:
+        f.close()
+    for a in edges:
+        _check(a, nv, -1)
+    for a in ed:
+        _check(a, nf, 0xFFFF)
+    return vs, edges, fc, ed
+
+def save(path, src, edges, fc, ed):
+    # el mismo orden que load(); los arrays se pasan a little-endian
+    nv = len(src[0]); ne = len(edges[0]); nf = len(fc[0])
+    with open(path, "wb") as f:
+        f.write(struct.pack(HEADER, MAGIC, nv, ne, nf, 0))
+        for a in src + edges + fc + ed:
+            if sys.byteorder != "little":
+                a = array(a.typecode, a)
+                a.byteswap()
+            f.write(bytes(a))
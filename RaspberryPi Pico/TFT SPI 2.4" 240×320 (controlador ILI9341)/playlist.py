@@ -0,0 +1,72 @@
+# =========================
+# PLAYLIST: rota escenas sin reiniciar (modo kiosko)
+# =========================
+# Donut -> Galaxia -> Neural mesh -> Tierra-Luna -> Avión -> ...
+# Cambia por tiempo (SCENE_SECONDS) o con el botón NEXT_PIN a GND.
+# El display/framebuffer es el mismo (gfxcore); entre escenas solo se
+# hace teardown + gc.collect() para que el heap quede estable.
+#
+# Para arrancar solo al encender: copia este archivo como main.py
+
+import gfxcore as gfx
+from scene import step
+from machine import Pin
+import time, gc
+
+# =========================
+# CONFIG
+# =========================
+SCENE_SECONDS = 30     # 0 = solo con botón
+
+# Botón "siguiente": GP21 a GND
+NEXT_PIN = 21
+
+# (módulo, clase) en orden; los nombres con espacio/guion se importan igual
+SCENES = (
+    ("Dona",        "Donut"),
+    ("Galaxia",     "Galaxy"),
+    ("Neural mesh", "NeuralMesh"),
+    ("Tierra-luna", "EarthMoon"),
+    ("Avion",       "Airliner"),
+)
+
+next_btn = Pin(NEXT_PIN, Pin.IN, Pin.PULL_UP)
+
+def play(mod_name, cls_name):
+    # corre una escena hasta que se acabe su tiempo o se apriete el botón
+    sc = getattr(__import__(mod_name), cls_name)()
+    gc.collect()
+    sc.init()
+    try:
+        t0 = time.ticks_ms()
+        was_down = not next_btn.value()
+        frame = 0
+        while True:
+            step(sc, frame)
+            frame += 1
+
+            down = not next_btn.value()
+            if down and not was_down:
+                break
+            was_down = down
+
+            if SCENE_SECONDS and time.ticks_diff(time.ticks_ms(), t0) >= SCENE_SECONDS * 1000:
+                break
+    finally:
+        sc.teardown()
+        gc.collect()
+
+def main():
+    # Ventana para detener fácil antes de arrancar
+    time.sleep(1)
+
+    i = 0
+    while True:
+        mod_name, cls_name = SCENES[i]
+        play(mod_name, cls_name)
+        i = (i + 1) % len(SCENES)
+
+try:
+    main()
+except KeyboardInterrupt:
+    gfx.clear(0)
@@ -0,0 +1,213 @@
+# =========================
+# PRESENTER (doble buffer + transferencia en paralelo)
+# =========================
+# La escena dibuja en pres.fb / pres.buf; present() entrega ese buffer a
+# la etapa de transferencia y cambia al otro, así el siguiente frame se
+# dibuja mientras el anterior sale por SPI.
+#
+# Etapas:
+#   "thread" -> segundo núcleo con _thread (también corre en CPython)
+#   "dma"    -> rp2.DMA alimentando el FIFO de SPI (frame completo); los
+#               registros salen del chip (RP2040 / RP2350), y como necesita
+#               2 buffers en la práctica es la Pico 2 (RP2350)
+#   "sync"   -> transferencia en línea (sustituto puro Python / fallback)
+#
+# Ojo RAM: 2 buffers de 240x320 RGB565 son 300 KB; en la Pico (RP2040)
+# no caben y se cae solo a un buffer en modo "sync". En la Pico 2 sí.
+#
+# Uso:
+#   pres = Presenter(tft)
+#   fb = pres.fb
+#   ... dibujar ...
+#   pres.present()          # o pres.present(dmg) con dirty rects
+#   fb = pres.fb            # ¡el buffer de dibujo cambió!
+
+import sys
+import framebuf
+
+try:
+    import _thread
+except ImportError:
+    _thread = None
+
+# Base de SPI0/SPI1 y DREQ de TX por chip
+#   RP2040: datasheet 4.4 / 2.5.3.1
+#   RP2350: datasheet, mapa de direcciones + tabla de DREQ del DMA
+# Los offsets de los registros (PL022) son los mismos en los dos.
+_SPI_REGS = {
+    "RP2040": ((0x4003C000, 0x40040000), (16, 18)),
+    "RP2350": ((0x40080000, 0x40088000), (24, 26)),
+}
+_SSPDR     = 0x08
+_SSPSR     = 0x0C
+_SSPSR_BSY = 0x10
+
+def _chip():
+    # "RP2040" / "RP2350" según sys.implementation._machine (None: otro)
+    m = getattr(sys.implementation, "_machine", "")
+    for k in _SPI_REGS:
+        if k in m:
+            return k
+    return None
+
+def _send(tft, buf, dmg):
+    if dmg is not None:
+        return dmg.send(tft, buf)
+    tft._begin_write(0, 0, tft.width - 1, tft.height - 1)
+    tft.spi.write(buf)
+    tft._end_write()
+    return len(buf)
+
+# =========================
+# Etapas de transferencia
+# =========================
+class _SyncStage:
+    def __init__(self, tft):
+        self.tft = tft
+
+    def start(self, buf, dmg):
+        _send(self.tft, buf, dmg)
+
+    def wait(self):
+        pass
+
+    def stop(self):
+        pass
+
+class _ThreadStage:
+    def __init__(self, tft):
+        self.tft = tft
+        self._buf = None
+        self._dmg = None
+        self._run = True
+        self._go = _thread.allocate_lock()
+        self._go.acquire()
+        self._done = _thread.allocate_lock()   # tomado = transferencia en vuelo
+        _thread.start_new_thread(self._loop, ())
+
+    def _loop(self):
+        while True:
+            self._go.acquire()
+            if not self._run:
+                break
+            _send(self.tft, self._buf, self._dmg)
+            self._done.release()
+
+    def start(self, buf, dmg):
+        self._done.acquire()
+        self._buf = buf
+        self._dmg = dmg
+        self._go.release()
+
+    def wait(self):
+        self._done.acquire()
+        self._done.release()
+
+    def stop(self):
+        self.wait()
+        self._run = False
+        self._go.release()
+
+class _DmaStage:
+    def __init__(self, tft, spi_id=0):
+        import rp2, machine
+        self.tft = tft
+        base, dreq = _SPI_REGS[_chip()]
+        self.mem32 = machine.mem32
+        self.sr = base[spi_id] + _SSPSR
+        self.dr = base[spi_id] + _SSPDR
+        self.dma = rp2.DMA()
+        self.ctrl = self.dma.pack_ctrl(size=0, inc_write=False,
+                                       treq_sel=dreq[spi_id])
+        self.busy = False
+
+    def start(self, buf, dmg):
+        if dmg is not None and not dmg.full:
+            # rects parciales: son chicos, van en línea
+            dmg.send(self.tft, buf)
+            return
+        if dmg is not None:
+            # como dmg.send() con frame completo
+            dmg.full = False
+            dmg.sent = len(buf)
+        tft = self.tft
+        tft._begin_write(0, 0, tft.width - 1, tft.height - 1)
+        self.dma.config(read=buf, write=self.dr, count=len(buf),
+                        ctrl=self.ctrl, trigger=True)
+        self.busy = True
+
+    def wait(self):
+        if not self.busy:
+            return
+        while self.dma.active():
+            pass
+        # el FIFO de SPI todavía puede estar sacando bytes
+        while self.mem32[self.sr] & _SSPSR_BSY:
+            pass
+        self.tft._end_write()
+        self.busy = False
+
+    def stop(self):
+        self.wait()
+        self.dma.close()
+
+# =========================
+# Presenter
+# =========================
+class Presenter:
+    def __init__(self, tft, buf=None, mode="auto", spi_id=0):
+        w = tft.width
+        h = tft.height
+        self.tft = tft
+
+        if buf is None:
+            buf = bytearray(w * h * 2)
+        try:
+            buf2 = bytearray(w * h * 2)
+        except MemoryError:
+            buf2 = None
+
+        self.double = buf2 is not None
+        self._bufs = (buf, buf2)
+        self._fbs = (framebuf.FrameBuffer(buf, w, h, framebuf.RGB565),
+                     framebuf.FrameBuffer(buf2, w, h, framebuf.RGB565) if buf2 else None)
+        self._back = 0
+        self.buf = buf
+        self.fb = self._fbs[0]
+        self.front = buf     # el último buffer presentado (= buf sin doble)
+
+        # con un solo buffer no hay nada que solapar; "dma" solo en un chip
+        # con registros conocidos
+        if not self.double:
+            mode = "sync"
+        elif mode == "dma" and _chip() is None:
+            mode = "auto"
+        if mode == "auto":
+            mode = "thread" if _thread is not None else "sync"
+
+        if mode == "thread":
+            self.stage = _ThreadStage(tft)
+        elif mode == "dma":
+            self.stage = _DmaStage(tft, spi_id)
+        else:
+            self.stage = _SyncStage(tft)
+        self.mode = mode
+
+    def present(self, dmg=None):
+        stage = self.stage
+        stage.wait()                 # el buffer de enfrente ya salió
+        if dmg is not None:
+            dmg.collect()
+        stage.start(self.buf, dmg)
+        self.front = self.buf
+
+        if self.double:
+            self._back ^= 1
+            self.buf = self._bufs[self._back]
+            self.fb = self._fbs[self._back]
+
+    def wait(self):
+        self.stage.wait()
+
+    def stop(self):
+        self.stage.stop()
@@ -0,0 +1,277 @@
+# =========================
+# PROF: tiempo por fase de cada frame (geometry / raster / transfer)
+# =========================
+# scene.step() llama begin() al empezar el frame y mark() al cerrar cada
+# fase. mark(ph) le suma a la fase ph el tiempo desde la marca anterior,
+# así una escena puede partir su render() con marcas propias:
+#
+#   import prof
+#   ... rotar / proyectar ...
+#   prof.mark(prof.GEOM)     # lo de arriba cuenta como geometría
+#   ... dibujar ...          # lo que quede lo cierra step() como raster
+#
+# Los últimos RING frames quedan en un ring (hist / per / nb) y hud()
+# dibuja fps, heap libre, bytes por frame y ms por fase en el hueco de
+# HUD de la escena. El texto se rehace cada HUD_EVERY frames, no en cada
+# uno, en bytearrays + glyphs.Labels (sin str: el HUD tampoco aloca).
+#
+# Audit de allocs: con audit() cada marca también lee gc.mem_alloc() y
+# anota cuántos bytes alocó cada fase (acur). Una fase que aloca sale
+# con "!" + su letra en el HUD (g / r / t) y report() imprime el resumen.
+# El loop de las escenas debe quedar en cero: scene.step() ya no llama a
+# gc.collect() cada tantos frames. Un delta negativo = corrió el gc
+# dentro de la fase (que también cuenta como alocar).
+#
+# Apagado (ENABLED = False) cada llamada es un if + return. Con
+# enable(hud=False) se miden las fases pero hud() no dibuja nada (así
+# la imagen no depende de los tiempos: sim/bench.py compara su CRC).
+# Para verlo en la Pico: prof.enable() (o prof.audit()) antes de
+# run(...) / main().
+
+import time, gc
+from array import array
+from glyphs import Labels, put_dec
+
+GEOM   = 0
+RASTER = 1
+XFER   = 2
+NPH    = 3
+
+NAMES = ("geometry", "raster", "transfer")
+
+ENABLED = False
+HUD     = True      # False: solo tiempos, sin texto en pantalla
+
+RING      = 32    # frames en el promedio (potencia de 2)
+HUD_EVERY = 16    # cada cuántos frames se rehace el texto del HUD
+
+# us por fase del frame en curso (o del último, después de step())
+cur = array('l', [0] * NPH)
+
+# ring: hist[ph * RING + i] us de la fase, per[i] us entre begin() y begin(),
+# nb[i] bytes mandados por SPI
+hist = array('l', [0] * (NPH * RING))
+per  = array('l', [0] * RING)
+nb   = array('l', [0] * RING)
+
+_t  = 0     # última marca
+_tf = 0     # último begin()
+_i  = 0     # posición en el ring
+_n  = 0     # frames cerrados con end()
+
+# audit: bytes alocados por fase en el frame en curso, frames en que cada
+# fase alocó y el máximo en un frame (desde audit())
+AUDIT = False
+acur = array('l', [0] * NPH)
+anz  = array('l', [0] * NPH)
+amax = array('l', [0] * NPH)
+_a  = 0     # gc.mem_alloc() en la última marca
+_na = 0     # frames auditados
+_af = 0     # fases que alocaron desde el último refresh (bits)
+
+def enable(on=True, hud=True):
+    global ENABLED, HUD
+    ENABLED = on
+    HUD = hud
+
+def audit(on=True):
+    # enable() + deltas de gc.mem_alloc() por fase
+    global AUDIT, _na, _af
+    AUDIT = on
+    if on:
+        enable()
+    for ph in range(NPH):
+        anz[ph] = 0
+        amax[ph] = 0
+    _na = 0
+    _af = 0
+
+def begin():
+    global _t, _tf, _a
+    if not ENABLED:
+        return
+    t = time.ticks_us()
+    if _n:
+        per[_i] = time.ticks_diff(t, _tf)
+    _tf = t
+    cur[0] = 0
+    cur[1] = 0
+    cur[2] = 0
+    _t = t
+    if AUDIT:
+        acur[0] = 0
+        acur[1] = 0
+        acur[2] = 0
+        _a = gc.mem_alloc()
+
+def mark(ph):
+    global _t, _a
+    if not ENABLED:
+        return
+    t = time.ticks_us()
+    cur[ph] += time.ticks_diff(t, _t)
+    _t = t
+    if AUDIT:
+        a = gc.mem_alloc()
+        acur[ph] += a - _a
+        _a = a
+
+def end(sent=0):
+    # cierra el frame: cur + bytes -> ring, y cada HUD_EVERY frames rehace
+    # el texto
+    global _i, _n, _na, _af
+    if not ENABLED:
+        return
+    i = _i
+    hist[i] = cur[0]
+    hist[RING + i] = cur[1]
+    hist[2 * RING + i] = cur[2]
+    nb[i] = sent
+    _i = (i + 1) & (RING - 1)
+    _n += 1
+    if AUDIT:
+        _na += 1
+        for ph in range(NPH):
+            d = acur[ph]
+            if d:
+                anz[ph] += 1
+                _af |= 1 << ph
+                if d > amax[ph]:
+                    amax[ph] = d
+    if _n % HUD_EVERY == 0:
+        _refresh()
+
+def avg(ph):
+    # us promedio de una fase en el ring
+    n = _n if _n < RING else RING
+    if n == 0:
+        return 0
+    base = ph * RING
+    t = 0
+    for i in range(n):
+        t += hist[base + i]
+    return t // n
+
+def avg_bytes():
+    # bytes por frame promedio en el ring
+    n = _n if _n < RING else RING
+    if n == 0:
+        return 0
+    t = 0
+    for i in range(n):
+        t += nb[i]
+    return t // n
+
+def period():
+    # us promedio entre frames (incluye el sleep de FRAME_MS)
+    n = _n - 1 if _n <= RING else RING
+    if n <= 0:
+        return 0
+    t = 0
+    for i in range(RING):
+        t += per[i]
+    return t // n
+
+def allocating():
+    # bits de las fases que alocaron en el último frame (1 << GEOM, ...)
+    m = 0
+    for ph in range(NPH):
+        if acur[ph]:
+            m |= 1 << ph
+    return m
+
+def report():
+    # resumen del audit por consola (este sí aloca: fuera del loop)
+    for ph in range(NPH):
+        print("%-9s %d/%d frames alocan, máx %d B" % (NAMES[ph], anz[ph], _na, amax[ph]))
+
+# =========================
+# HUD
+# =========================
+HUD_W = 24
+HUD_CHARS = b"0123456789. fpskBgrt!"
+
+# cada campo satura (999.9 fps, 9999k, 999kB, 99.9 ms): lo más largo es
+# "999.9 fps 9999k 999kB" (21) y "g99.9 r99.9 t99.9 !grt" (22) < HUD_W
+_t1 = bytearray(HUD_W)      # "41.7 fps 23k 18kB"
+_t2 = bytearray(HUD_W)      # "g1.2 r8.4 t3.0 !r"
+_n1 = 0
+_n2 = 0
+_new = False                # texto nuevo que falta pasar a _lab
+_lab = None                 # Labels(2 líneas), se crea con el color del 1er hud()
+_col = -1
+
+def _put(s, i, text):
+    # texto fijo (bytes) desde s[i]
+    for c in text:
+        s[i] = c
+        i += 1
+    return i
+
+def _put_ms(s, i, us):
+    # "12.3" sin floats ni str; de 100 ms para arriba queda "99.9"
+    if us > 99_999:
+        us = 99_999
+    i = put_dec(s, i, us // 1000)
+    s[i] = 0x2E
+    s[i + 1] = 48 + (us // 100) % 10
+    return i + 2
+
+def _refresh():
+    global _n1, _n2, _new, _af
+    s = _t1
+    p = period()
+    fps10 = 10_000_000 // p if p else 0
+    if fps10 > 9999:
+        fps10 = 9999
+    i = put_dec(s, 0, fps10 // 10)
+    s[i] = 0x2E
+    s[i + 1] = 48 + fps10 % 10
+    i = _put(s, i + 2, b" fps ")
+    k = gc.mem_free() // 1024
+    i = put_dec(s, i, k if k < 9999 else 9999)
+    i = _put(s, i, b"k ")
+    k = avg_bytes() // 1024
+    i = put_dec(s, i, k if k < 999 else 999)
+    _n1 = _put(s, i, b"kB")
+
+    s = _t2
+    s[0] = 0x67
+    i = _put_ms(s, 1, avg(GEOM))
+    s[i] = 0x20
+    s[i + 1] = 0x72
+    i = _put_ms(s, i + 2, avg(RASTER))
+    s[i] = 0x20
+    s[i + 1] = 0x74
+    i = _put_ms(s, i + 2, avg(XFER))
+    if _af:
+        i = _put(s, i, b" !")
+        for ph in range(NPH):
+            if _af & (1 << ph):
+                s[i] = HUD_CHARS[17 + ph]       # g / r / t
+                i += 1
+        _af = 0
+    _n2 = i
+    _new = True
+
+def hud(fb, x, y, col, dmg=None):
+    # 2 líneas (y, y + 10); con dmg marca su caja para el blit parcial
+    global _lab, _col, _new
+    if not (ENABLED and HUD):
+        return
+    if _lab is None or col != _col:
+        _lab = Labels(HUD_CHARS, 2, HUD_W, col)
+        _col = col
+        _new = True
+    if _new:
+        _lab.set(0, _t1, _n1)
+        _lab.set(1, _t2, _n2)
+        _new = False
+    _lab.draw(fb, 0, x, y)
+    _lab.draw(fb, 1, x, y + 10)
+    if dmg is not None:
+        n = _n1 if _n1 > _n2 else _n2
+        if n > HUD_W:
+            n = HUD_W
+        if n:
+            dmg.mark(x, y, x + n * 8 - 1, y + 17)
@@ -0,0 +1,86 @@
+# =========================
+# SCENE: protocolo de escena + loop estándar
+# =========================
+# Cada escena es una clase con:
+#   init()          -> aloca su estado (arrays, geometría, ...)
+#   update(frame)   -> avanza la animación
+#   render(fb)      -> dibuja el frame en fb
+#   teardown()      -> suelta lo que alocó (para que gc lo recupere)
+# y opcionalmente:
+#   FRAME_MS        -> presupuesto por frame
+#   dmg             -> dirty rects (dirty.Damage) para blit parcial
+#
+# El display y el framebuffer son los de gfxcore (uno solo por arranque);
+# run() corre una escena suelta y playlist.py rota varias sin reiniciar.
+
+import gfxcore as gfx
+import prof
+import time, gc
+
+class Scene:
+    FRAME_MS = 25
+    dmg = None
+
+    def init(self):
+        pass
+
+    def update(self, frame):
+        pass
+
+    def render(self, fb):
+        pass
+
+    def teardown(self):
+        pass
+
+def step(sc, frame):
+    # un frame completo: update + render + transferencia + ritmo
+    start = time.ticks_ms()
+
+    # salida garantizada
+    if not gfx.kill.value():
+        raise KeyboardInterrupt
+
+    # fases: update -> geometry, render -> raster (la escena puede marcar
+    # su propia geometría antes), present -> transfer. Con presenter en
+    # hilo/DMA "transfer" es solo la espera del frame anterior.
+    prof.begin()
+    sc.update(frame)
+    prof.mark(prof.GEOM)
+    sc.render(gfx.fb)
+    prof.mark(prof.RASTER)
+    gfx.present(sc.dmg)
+    prof.mark(prof.XFER)
+    # bytes por SPI del último envío (con presenter en hilo: el anterior)
+    prof.end(sc.dmg.sent if sc.dmg is not None else len(gfx.buf))
+
+    # anti-busy: cede CPU siempre -> Thonny puede interrumpir
+    dt = time.ticks_diff(time.ticks_ms(), start)
+    if dt < sc.FRAME_MS:
+        time.sleep_ms(sc.FRAME_MS - dt)
+    else:
+        time.sleep_ms(1)
+
+    # sin gc.collect() periódico: el loop de las escenas no aloca
+    # (prof.audit() lo comprueba por fase)
+
+def run(sc, frames=0):
+    # loop de una escena; frames=0 -> para siempre (hasta Ctrl+C / GP22)
+    gc.collect()
+    sc.init()
+    try:
+        # Ventana para detener fácil antes de arrancar
+        time.sleep(1)
+
+        frame = 0
+        while frames == 0 or frame < frames:
+            step(sc, frame)
+            frame += 1
+
+    except KeyboardInterrupt:
+        pass
+
+    finally:
+        sc.teardown()
+        gfx.clear(0)
+        gc.collect()
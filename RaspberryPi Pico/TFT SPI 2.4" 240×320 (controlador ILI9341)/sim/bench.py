@@ -0,0 +1,127 @@
+# =========================
+# BENCH: tiempos por escena y por fase (JSON)
+# =========================
+# Corre cada escena N frames en el simulador, siempre igual (semilla fija,
+# presenter síncrono, sin sleep) y saca mean/p50/p95/p99 en ms de:
+#   frame     -> geometry + raster + transfer
+#   geometry  -> update() + lo que la escena marque con prof.mark(GEOM)
+#   raster    -> el resto de render()
+#   transfer  -> present() (SPI falso -> GRAM)
+# Los ms son del PC, no de la Pico: sirven para comparar commits en la
+# misma máquina. "digest" es el CRC32 de la GRAM al final; si cambia, la
+# imagen cambió.
+#
+#   python sim/bench.py --frames 300 --out bench.json
+#   python sim/bench.py --frames 300 --compare bench.json
+
+import os, sys, json, zlib, argparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import host
+
+SEED = 0x12345678
+
+def percentile(v, p):
+    # nearest-rank sobre una lista ya ordenada
+    if not v:
+        return 0.0
+    k = -(-len(v) * p // 100) - 1
+    if k < 0:
+        k = 0
+    return v[k]
+
+def summary(us):
+    v = sorted(x / 1000 for x in us)
+    n = len(v)
+    return {
+        "mean": round(sum(v) / n, 3) if n else 0.0,
+        "p50":  round(percentile(v, 50), 3),
+        "p95":  round(percentile(v, 95), 3),
+        "p99":  round(percentile(v, 99), 3),
+    }
+
+def bench_one(gfx, name, frames, warmup):
+    import prof
+    from scene import step
+
+    spi = gfx.tft.spi
+    gfx.seed(SEED)
+    sc = host.load_scene(name)
+    sc.init()
+
+    samples = [[] for _ in range(prof.NPH)]
+    total = []
+    try:
+        for frame in range(warmup):
+            step(sc, frame)
+
+        b0 = spi.bytes
+        w0 = gfx.tft.windows
+        for frame in range(warmup, warmup + frames):
+            step(sc, frame)
+            t = 0
+            for ph in range(prof.NPH):
+                samples[ph].append(prof.cur[ph])
+                t += prof.cur[ph]
+            total.append(t)
+        nbytes = spi.bytes - b0
+        nwin = gfx.tft.windows - w0
+    finally:
+        sc.teardown()
+
+    out = {"frame": summary(total)}
+    for ph in range(prof.NPH):
+        out[prof.NAMES[ph]] = summary(samples[ph])
+    out["bytes_per_frame"] = nbytes // frames
+    out["windows_per_frame"] = round(nwin / frames, 2)
+    out["digest"] = "%08x" % (zlib.crc32(gfx.tft.gram.tobytes()) & 0xFFFFFFFF)
+    return out
+
+def compare(old, new):
+    # p50 / p95 por fase, viejo -> nuevo
+    for name, cur in new["scenes"].items():
+        prev = old.get("scenes", {}).get(name)
+        if prev is None:
+            print("%-12s (nueva)" % name)
+            continue
+        for key in ("frame", "geometry", "raster", "transfer"):
+            a = prev[key]; b = cur[key]
+            d = (b["p50"] - a["p50"]) * 100 / a["p50"] if a["p50"] else 0.0
+            print("%-12s %-9s p50 %8.3f -> %8.3f ms (%+6.1f%%)   p95 %8.3f -> %8.3f ms" % (
+                name, key, a["p50"], b["p50"], d, a["p95"], b["p95"]))
+        if prev.get("digest") != cur.get("digest"):
+            print("%-12s digest %s -> %s (la imagen cambió)" % (
+                name, prev.get("digest"), cur.get("digest")))
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark por fase de las escenas ILI9341")
+    ap.add_argument("scene", nargs="?", default="all", help='escena o "all"')
+    ap.add_argument("--frames", type=int, default=300)
+    ap.add_argument("--warmup", type=int, default=10, help="frames que no se miden")
+    ap.add_argument("--out", default=None, help="archivo JSON (por defecto stdout)")
+    ap.add_argument("--compare", default=None, help="JSON anterior para comparar")
+    args = ap.parse_args()
+
+    gfx = host.setup(realtime=False, threads=False)
+    import prof
+    prof.enable(hud=False)      # el HUD cambiaría el digest entre corridas
+
+    names = host.SCENES if args.scene == "all" else (args.scene,)
+    frames = max(args.frames, 1)
+    res = {"frames": frames, "warmup": args.warmup, "seed": SEED, "scenes": {}}
+    for name in names:
+        res["scenes"][name] = bench_one(gfx, name, frames, args.warmup)
+
+    text = json.dumps(res, indent=2, sort_keys=True)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), res)
+
+if __name__ == "__main__":
+    main()
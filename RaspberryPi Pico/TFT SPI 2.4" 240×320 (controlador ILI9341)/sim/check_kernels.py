@@ -0,0 +1,539 @@
+# =========================
+# Comprueba kernels.py contra las funciones de gfxcore (bit a bit)
+# =========================
+# El código de kernels.py es el mismo que corre con viper en la Pico, así
+# que si aquí da igual a la cuenta directa con //, allá también (salvo
+# overflow de 32 bits, que con estos rangos no pasa).
+#
+#   python sim/check_kernels.py --trials 200
+
+import os, sys, random, argparse
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import host
+
+def check_xform(gfx, rng, trials, nv):
+    # xform (viper) vs la misma cuenta en Python con // ; además cuánto se
+    # aleja la matriz compuesta de rot_y -> rot_x -> rot_z (en px)
+    import kernels
+    from Avion import project, CAM_Z, FOV, DEN_MIN
+
+    VX = array('h', [0] * nv); VY = array('h', [0] * nv); VZ = array('h', [0] * nv)
+    PX = array('h', [0] * nv); PY = array('h', [0] * nv); PZ = array('h', [0] * nv)
+    par = array('i', [0] * kernels.XF_PAR)
+    bad = 0
+    drift = 0
+
+    for t in range(trials):
+        for i in range(nv):
+            VX[i] = rng.randint(-200, 200)
+            VY[i] = rng.randint(-200, 200)
+            VZ[i] = rng.randint(-200, 200)
+        yaw = rng.randrange(360); pitch = rng.randrange(-30, 30); roll = rng.randrange(-40, 40)
+        cy = gfx.cos_deg(yaw);   sy = gfx.sin_deg(yaw)
+        cx = gfx.cos_deg(pitch); sx = gfx.sin_deg(pitch)
+        cz = gfx.cos_deg(roll);  sz = gfx.sin_deg(roll)
+        zoff = rng.randint(-22, 22)
+        ox = gfx.W // 2; oy = gfx.H // 2 + 8
+        yflip = t & 1
+
+        kernels.mat_yxz(par, cy, sy, cx, sx, cz, sz)
+        par[9] = zoff; par[10] = ox; par[11] = oy
+        par[12] = CAM_Z; par[13] = FOV; par[14] = DEN_MIN; par[15] = yflip
+        kernels.xform((VX, VY, VZ), (PX, PY, PZ), par, nv)
+        m = par[0:9]
+
+        bx0 = 32767; by0 = 32767; bx1 = -32768; by1 = -32768
+        for i in range(nv):
+            x = VX[i]; y = VY[i]; z = VZ[i]
+            x1 = (m[0] * x + m[1] * y + m[2] * z) // gfx.S
+            y1 = (m[3] * x + m[4] * y + m[5] * z) // gfx.S
+            z1 = (m[6] * x + m[7] * y + m[8] * z) // gfx.S + zoff
+            if yflip:
+                sx2d, sy2d = project(x1, y1, z1, ox, oy)
+            else:
+                den = max(CAM_Z + z1, DEN_MIN)
+                sx2d = ox + (x1 * FOV) // den
+                sy2d = oy + (y1 * FOV) // den
+            if (PX[i], PY[i], PZ[i]) != (sx2d, sy2d, z1):
+                bad += 1
+                if bad <= 5:
+                    print("xform", (VX[i], VY[i], VZ[i]), (PX[i], PY[i], PZ[i]),
+                          "!=", (sx2d, sy2d, z1))
+            bx0 = min(bx0, sx2d); bx1 = max(bx1, sx2d)
+            by0 = min(by0, sy2d); by1 = max(by1, sy2d)
+
+            if yflip:
+                a, b, c = gfx.rot_y(x, y, z, cy, sy)
+                a, b, c = gfx.rot_x(a, b, c, cx, sx)
+                a, b, c = gfx.rot_z(a, b, c, cz, sz)
+                rx, ry = project(a, b, c + zoff, ox, oy)
+                drift = max(drift, abs(rx - sx2d), abs(ry - sy2d))
+        if (par[16], par[17], par[18], par[19]) != (bx0, by0, bx1, by1):
+            bad += 1
+            print("xform bbox", tuple(par[16:20]), "!=", (bx0, by0, bx1, by1))
+
+    print("xform      matriz compuesta vs rot_* en serie: %d px máx" % drift)
+    return bad
+
+def check_donut(gfx, rng, trials, nv):
+    # kernels.donut vs la misma cuenta en Python (grilla, zbuf y caja)
+    import kernels
+    import Dona
+    S = gfx.S
+    COLS = Dona.COLS; ROWS = Dona.ROWS
+
+    sc = Dona.Donut()
+    sc.init()
+    tab = sc.tab
+    par = sc.par
+    zref = [0] * (COLS * ROWS)
+    gref = bytearray(COLS * ROWS)
+    bad = 0
+
+    for _ in range(trials):
+        A = rng.randrange(360); B = rng.randrange(360)
+        kernels.mat_yxz(par, S, 0, gfx.cos_deg(A), gfx.sin_deg(A),
+                        gfx.cos_deg(B), gfx.sin_deg(B))
+        kernels.donut(tab, sc.out, par, Dona.NPTS)
+
+        m = par[0:9]
+        lx = m[3] - m[6]; ly = m[4] - m[7]; lz = m[5] - m[8]
+        for i in range(COLS * ROWS):
+            zref[i] = 0
+            gref[i] = 32
+        cmin = COLS; cmax = -1; rmin = ROWS; rmax = -1
+        for i in range(Dona.NPTS):
+            x = tab[0][i]; y = tab[1][i]; z = tab[2][i]
+            zz = (m[6] * x + m[7] * y + m[8] * z) // S + Dona.K2
+            if zz <= 0:
+                continue
+            x1 = (m[0] * x + m[1] * y + m[2] * z) // S
+            y1 = (m[3] * x + m[4] * y + m[5] * z) // S
+            ooz = (S * 64) // (zz // S + 1)
+            xp = par[11] + (x1 * Dona.X_SCALE) // zz
+            yp = par[12] - (y1 * Dona.Y_SCALE) // zz
+            if not (0 <= xp < COLS and 0 <= yp < ROWS):
+                continue
+            idx = yp * COLS + xp
+            if ooz > zref[idx]:
+                zref[idx] = ooz
+                dot = (lx * tab[3][i] + ly * tab[4][i] + lz * tab[5][i]) // S
+                lev = 0
+                if dot > 0:
+                    lev = min((dot * Dona.NLEV) // (2 * S), Dona.NLEV)
+                gref[idx] = Dona.SHADE_B[lev]
+                cmin = min(cmin, xp); cmax = max(cmax, xp)
+                rmin = min(rmin, yp); rmax = max(rmax, yp)
+
+        if sc.grid != gref or list(sc.zbuf) != zref or \
+                tuple(par[17:21]) != (cmin, rmin, cmax, rmax):
+            bad += 1
+            if bad <= 5:
+                print("donut A=%d B=%d" % (A, B), tuple(par[17:21]), (cmin, rmin, cmax, rmax))
+
+    sc.teardown()
+    return bad
+
+def check_links(gfx, rng, trials, nv):
+    # kernels.grid_links vs el doble loop O(N²) original
+    import kernels
+    nm = __import__("Neural mesh")
+    W = gfx.W; H = gfx.H
+    bad = 0
+
+    for t in range(trials):
+        n = rng.choice((1, 2, 34, 150, 300))
+        maxl = rng.randint(1, 6)
+        sc = nm.NeuralMesh()
+        saved = nm.NODES, nm.MAX_LINKS_PER_NODE
+        nm.NODES, nm.MAX_LINKS_PER_NODE = n, maxl
+        try:
+            sc.init()
+        finally:
+            nm.NODES, nm.MAX_LINKS_PER_NODE = saved
+        x = sc.x; y = sc.y
+        for i in range(n):
+            x[i] = rng.randint(nm.MARGIN, W - nm.MARGIN - 1)
+            y[i] = rng.randint(nm.MARGIN, H - nm.MARGIN - 1)
+
+        kernels.grid_links(sc.pos, sc.idx, sc.links, sc.par)
+        got = [(sc.la[k], sc.lb[k], sc.lf[k]) for k in range(sc.par[5])]
+
+        ref = []
+        for i in range(n):
+            links_i = 0
+            for j in range(i + 1, n):
+                dx = x[i] - x[j]; dy = y[i] - y[j]
+                d2 = dx * dx + dy * dy
+                if d2 <= nm.LINK_DIST2:
+                    ref.append((i, j, 1 if d2 < (nm.LINK_DIST2 >> 2) else 0))
+                    links_i += 1
+                    if links_i >= maxl:
+                        break
+        if got != ref:
+            bad += 1
+            if bad <= 5:
+                print("grid_links n=%d maxl=%d: %d links vs %d" % (n, maxl, len(got), len(ref)))
+        sc.teardown()
+    return bad
+
+def check_copy(gfx, rng, trials, nv):
+    # kernels.copy_rows vs concatenar slices (lo que hacía dirty.send)
+    import kernels
+    W = gfx.W; H = gfx.H
+    stride = W * 2
+    src = bytearray(rng.getrandbits(8) for _ in range(stride * H))
+    dst = bytearray(4096)
+    par = array('i', [0] * kernels.CR_PAR)
+    bad = 0
+
+    for _ in range(trials):
+        x0 = rng.randrange(W); x1 = rng.randrange(x0, W)
+        nb = (x1 - x0 + 1) * 2
+        rows = rng.randint(1, min(len(dst) // nb, H))
+        y0 = rng.randrange(H - rows + 1)
+        o = y0 * stride + x0 * 2
+        par[0] = o; par[1] = nb; par[2] = rows; par[3] = stride
+        kernels.copy_rows(dst, src, par)
+        ref = b"".join(src[o + r * stride:o + r * stride + nb] for r in range(rows))
+        if dst[:len(ref)] != ref:
+            bad += 1
+            if bad <= 5:
+                print("copy_rows x0=%d x1=%d y0=%d rows=%d" % (x0, x1, y0, rows))
+    return bad
+
+def check_cells(gfx, rng, trials, nv):
+    # diff_cells / ink_cells vs comparar byte a byte en Python
+    import kernels
+    n = (gfx.W // 8) * (gfx.H // 8)
+    out = array('H', [0] * n)
+    bad = 0
+
+    for _ in range(trials):
+        cur = bytearray(rng.choice(b"  .:#@") for _ in range(n))
+        prev = bytearray(rng.choice(b"  .:#@") for _ in range(n))
+        ref = [i for i in range(n) if cur[i] != prev[i]]
+        k = kernels.diff_cells(cur, prev, out, n)
+        ink = bytes(0 if c != 32 else 32 for c in cur)
+        kernels.ink_cells(prev, n)
+        if list(out[:k]) != ref or prev != ink:
+            bad += 1
+            if bad <= 5:
+                print("cells %d vs %d cambios" % (k, len(ref)))
+    return bad
+
+def check_layers(gfx, rng, trials, nv):
+    # rows_restore / dots vs escribir pixel a pixel en Python
+    import kernels
+    W = gfx.W; H = gfx.H
+    bad = 0
+
+    k = 4
+    rows = array('H', [rng.getrandbits(16) for _ in range(k * W)])
+    kind = bytearray(rng.randrange(k) for _ in range(H))
+    xs = array('H', [rng.randrange(W) for _ in range(nv)])
+    ys = array('H', [rng.randrange(H) for _ in range(nv)])
+    cs = array('H', [rng.getrandbits(16) for _ in range(nv)])
+    par = array('i', [0] * kernels.RR_PAR)
+    dpar = array('i', [0] * kernels.DT_PAR)
+
+    for _ in range(trials):
+        buf = array('H', [0] * (W * H))
+        ref = array('H', [0] * (W * H))
+        x0 = rng.randrange(W); x1 = rng.randrange(x0, W)
+        y0 = rng.randrange(H); y1 = rng.randrange(y0, H)
+        par[0] = W; par[1] = x0; par[2] = y0; par[3] = x1; par[4] = y1
+        kernels.rows_restore(buf, (rows, kind), par)
+        for y in range(y0, y1 + 1):
+            for x in range(x0, x1 + 1):
+                ref[y * W + x] = rows[kind[y] * W + x]
+
+        dx = rng.randrange(W)
+        dy = rng.randrange(H)
+        dpar[0] = nv; dpar[1] = W; dpar[2] = dx; dpar[3] = dy; dpar[4] = H
+        kernels.dots(buf, (xs, ys, cs), dpar)
+        for i in range(nv):
+            ref[(ys[i] + dy) % H * W + (xs[i] + dx) % W] = cs[i]
+
+        if buf != ref:
+            bad += 1
+            if bad <= 5:
+                print("layers caja", (x0, y0, x1, y1), "dx", dx, "dy", dy)
+    return bad
+
+def check_fade(gfx, rng, trials, nv):
+    # kernels.fade vs atenuar canal por canal en Python (con y sin swap),
+    # en su lugar y de un buffer a otro (doble buffer: dst tiene basura)
+    import kernels
+    from layers import fade_lut
+    W = gfx.W; H = 40
+    par = array('i', [0] * kernels.FD_PAR)
+    bad = 0
+
+    for t in range(trials):
+        keep = rng.randrange(256)
+        lut = fade_lut(keep)
+        swap = t & 1
+        src = array('H', [rng.getrandbits(16) if rng.random() < 0.7 else 0 for _ in range(W * H)])
+        buf = src if t & 2 else array('H', [rng.getrandbits(16) for _ in range(W * H)])
+        ref = array('H', buf)
+        x0 = rng.randrange(W); x1 = rng.randrange(x0, W)
+        y0 = rng.randrange(H); y1 = rng.randrange(y0, H)
+        par[0] = W; par[1] = x0; par[2] = y0; par[3] = x1; par[4] = y1; par[5] = swap
+        kernels.fade(buf, src, lut, par)
+        for y in range(y0, y1 + 1):
+            for x in range(x0, x1 + 1):
+                v = src[y * W + x] if buf is not src else ref[y * W + x]
+                if swap:
+                    v = ((v & 0xFF) << 8) | (v >> 8)
+                r = ((v >> 11) * keep) >> 8
+                g = (((v >> 5) & 63) * keep) >> 8
+                b = ((v & 31) * keep) >> 8
+                v = (r << 11) | (g << 5) | b
+                if swap:
+                    v = ((v & 0xFF) << 8) | (v >> 8)
+                ref[y * W + x] = v
+        if buf != ref:
+            bad += 1
+            if bad <= 5:
+                print("fade keep", keep, "swap", swap, "en su lugar" if t & 2 else "a otro", (x0, y0, x1, y1))
+    return bad
+
+def check_cull(gfx, rng, trials, nv):
+    # kernels.cull vs la misma cuenta en Python con las caras de Avion
+    import kernels
+    import Avion
+    sc = Avion.Airliner()
+    sc.init()
+    NX, NY, NZ, CX, CY, CZ = sc.fc
+    EF0, EF1 = sc.ed
+    FV, EV = sc.cv
+    par = sc.par
+    bad = 0
+
+    for _ in range(trials):
+        yaw = rng.randrange(360); pitch = rng.randrange(-30, 30); roll = rng.randrange(-40, 40)
+        kernels.mat_yxz(par, gfx.cos_deg(yaw), gfx.sin_deg(yaw),
+                        gfx.cos_deg(pitch), gfx.sin_deg(pitch),
+                        gfx.cos_deg(roll), gfx.sin_deg(roll))
+        par[9] = rng.randint(-22, 22)
+        kernels.cull(sc.fc, sc.ed, sc.cv, par)
+        m = par[0:9]
+        zc = par[9] + par[12]
+
+        fref = bytearray(len(FV))
+        for f in range(len(FV)):
+            n = (NX[f], NY[f], NZ[f]); c = (CX[f], CY[f], CZ[f])
+            rn = [(m[3 * r] * n[0] + m[3 * r + 1] * n[1] + m[3 * r + 2] * n[2]) >> 10 for r in range(3)]
+            rc = [(m[3 * r] * c[0] + m[3 * r + 1] * c[1] + m[3 * r + 2] * c[2]) >> 10 for r in range(3)]
+            rc[2] += zc
+            fref[f] = 1 if rn[0] * rc[0] + rn[1] * rc[1] + rn[2] * rc[2] < 0 else 0
+        eref = bytearray(len(EV))
+        for e in range(len(EV)):
+            fs = [f for f in (EF0[e], EF1[e]) if f != 0xFFFF]
+            eref[e] = 1 if fs and not any(fref[f] for f in fs) else 0
+
+        if FV != fref or EV != eref:
+            bad += 1
+            if bad <= 5:
+                print("cull yaw=%d pitch=%d roll=%d" % (yaw, pitch, roll))
+    sc.teardown()
+    return bad
+
+def check_bins(gfx, rng, trials, nv):
+    # kernels.depth_bins vs sorted() estable por bin
+    import kernels
+    ne = nv * 4
+    EA = array('H', [rng.randrange(nv) for _ in range(ne)])
+    EB = array('H', [rng.randrange(nv) for _ in range(ne)])
+    PZ = array('h', [0] * nv)
+    nb = 16
+    out = (array('H', [0] * ne), array('H', [0] * (nb + 1)), array('H', [0] * nb), bytearray(ne))
+    par = array('i', [ne, -256, 5, nb])
+    bad = 0
+
+    for _ in range(trials):
+        for i in range(nv):
+            PZ[i] = rng.randint(-400, 400)
+        kernels.depth_bins((EA, EB), PZ, out, par)
+
+        def bn(e):
+            b = ((PZ[EA[e]] + PZ[EB[e]]) // 2 + 256) >> 5
+            return min(max(b, 0), nb - 1)
+        ref = sorted(range(ne), key=bn)
+        start = [sum(1 for e in range(ne) if bn(e) < b) for b in range(nb + 1)]
+        if list(out[0]) != ref or list(out[1]) != start:
+            bad += 1
+            if bad <= 5:
+                print("depth_bins", list(out[1]), start)
+    return bad
+
+def check_galaxy(gfx, rng, trials, nv):
+    # kernels._galaxy (y galaxy: NumPy en el PC) vs el loop por estrella
+    import kernels
+    n = nv * 8
+    w, h, maxr = 240, 320, 150
+    OM = bytearray(2 + 90 // (r + 12) for r in range(maxr + 1))
+    RT = bytearray((r * 255) // maxr for r in range(maxr + 1))
+    COS = array('h', [gfx.cos_deg(a) for a in range(360)])
+    SINE = array('h', [(gfx.sin_deg(a) * 650) // 1000 for a in range(360)])
+    PAL = array('H', [rng.randrange(1, 65536) for _ in range(256)])
+    tab = (OM, COS, SINE, RT, PAL)
+    fns = [kernels._galaxy]
+    if kernels.galaxy is not kernels._galaxy:
+        fns.append(kernels.galaxy)
+    bad = 0
+
+    for t in range(trials):
+        R0 = [rng.randint(0, maxr) for _ in range(n)]
+        A0 = [rng.randrange(360) for _ in range(n)]
+        BR = bytearray(rng.randrange(256) for _ in range(n))
+        DR = array('b', [rng.randint(-1, 1) for _ in range(n)])
+        drift = t & 1
+        cx = w // 2 + rng.randint(-60, 60)
+        cy = h // 2 + rng.randint(-80, 80)
+
+        ref = array('H', [0] * (w * h))
+        R1 = list(R0); A1 = list(A0)
+        for i in range(n):
+            r = R1[i]
+            a = (A1[i] + OM[r]) % 360
+            if drift:
+                r = min(max(r + DR[i], 0), maxr)
+            x = cx + (r * COS[a]) // 1024
+            y = cy + (r * SINE[a]) // 1024
+            if 0 <= x < w and 0 <= y < h:
+                c = PAL[(RT[r] + BR[i] // 3) & 255]
+                ref[y * w + x] = c
+                if BR[i] > 240:
+                    if x + 1 < w: ref[y * w + x + 1] = c
+                    if y + 1 < h: ref[(y + 1) * w + x] = c
+            R1[i] = r
+            A1[i] = a
+
+        for fn in fns:
+            R = array('H', R0); A = array('H', A0)
+            buf = bytearray(w * h * 2)
+            fn((R, A, BR, DR), tab, buf, array('i', [n, w, h, cx, cy, drift, maxr]))
+            if list(R) != R1 or list(A) != A1 or bytes(buf) != ref.tobytes():
+                bad += 1
+                if bad <= 5:
+                    print("galaxy", fn.__name__, t)
+    return bad
+
+def check_meteors(gfx, rng, trials, nv):
+    # kernels.meteors vs el loop de una fugaz, repetido por cada una
+    import kernels
+    w, h, cap = 240, 320, 24
+    bad = 0
+
+    for t in range(trials):
+        pool = tuple(array('h', [0] * cap) for _ in range(6))
+        X, Y, VX, VY, LIFE, FREE = pool
+        for i in range(cap):
+            if rng.random() < 0.6:
+                X[i] = rng.randint(-30, w + 30); Y[i] = rng.randint(-30, h + 30)
+                VX[i] = rng.randint(-5, 5); VY[i] = rng.randint(-5, 5)
+                LIFE[i] = rng.randint(1, 18)
+        nfree = rng.randrange(cap - sum(1 for v in LIFE if v) + 1)
+        tl = rng.choice((1, 16))
+        par = array('i', [cap, w, h, tl, nfree, 0x1234, 0xFFFF])
+
+        ref = array('H', [0] * (w * h))
+        R = [list(a) for a in pool[:5]]
+        rfree = list(FREE[:nfree])
+        for i in range(cap):
+            if not R[4][i]:
+                continue
+            x, y, vx, vy = R[0][i], R[1][i], R[2][i], R[3][i]
+            x2, y2 = x, y
+            for _ in range(tl):
+                x2 -= vx; y2 -= vy
+                if 0 <= x2 < w and 0 <= y2 < h:
+                    ref[y2 * w + x2] = 0x1234
+            if 0 <= x < w and 0 <= y < h:
+                ref[y * w + x] = 0xFFFF
+            x += vx; y += vy
+            life = R[4][i] - 1
+            if x < -20 or x > w + 20 or y < -20 or y > h + 20:
+                life = 0
+            R[0][i] = x; R[1][i] = y; R[4][i] = life
+            if life == 0:
+                rfree.append(i)
+
+        buf = bytearray(w * h * 2)
+        kernels.meteors(pool, buf, par)
+        if (bytes(buf) != ref.tobytes() or [list(a) for a in pool[:5]] != R
+                or par[4] != len(rfree) or list(FREE[:par[4]]) != rfree):
+            bad += 1
+            if bad <= 5:
+                print("meteors", t, par[4], len(rfree))
+    return bad
+
+def check_hud(gfx, rng, trials, nv):
+    # prof._refresh con fases de >= 100 ms, las 3 marcas de audit y fps /
+    # heap / bytes enormes: el texto satura y no se pasa de HUD_W
+    import gc, framebuf, prof
+    fb = framebuf.FrameBuffer(bytearray(gfx.W * 20 * 2), gfx.W, 20, framebuf.RGB565)
+    mem_free = gc.mem_free
+    bad = 0
+    try:
+        prof.enable()
+        for t in range(trials):
+            us = (100_000, 99_999, 123_456, 2_000_000_000)[t & 3] + rng.randrange(1000)
+            for i in range(prof.NPH * prof.RING):
+                prof.hist[i] = us
+            for i in range(prof.RING):
+                prof.per[i] = 1 + rng.randrange(3)
+                prof.nb[i] = 2_000_000_000
+            prof._n = prof.RING + 1
+            prof._af = 7
+            heap = rng.randrange(1, 1 << 40)
+            gc.mem_free = lambda: heap
+            try:
+                prof._refresh()
+                prof.hud(fb, 0, 0, 0xFFFF)
+            except IndexError:
+                bad += 1
+                print("hud IndexError us=%d" % us)
+                continue
+            l2 = bytes(prof._t2[:prof._n2])
+            if (prof._n1 > prof.HUD_W or prof._n2 > prof.HUD_W
+                    or bytes(prof._t1[:prof._n1]) != b"999.9 fps 9999k 999kB"
+                    or l2 != b"g99.9 r99.9 t99.9 !grt"):
+                bad += 1
+                if bad <= 5:
+                    print("hud", bytes(prof._t1[:prof._n1]), l2)
+    finally:
+        gc.mem_free = mem_free
+        prof.enable(False)
+        prof._n = 0
+        prof._af = 0
+    return bad
+
+def main():
+    ap = argparse.ArgumentParser(description="kernels.py vs gfxcore (bit a bit)")
+    ap.add_argument("--trials", type=int, default=100)
+    ap.add_argument("--verts", type=int, default=64)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    gfx = host.setup()
+    rng = random.Random(args.seed)
+
+    bad = 0
+    for name, fn in (("xform", check_xform), ("donut", check_donut), ("links", check_links),
+                     ("copy_rows", check_copy), ("cells", check_cells),
+                     ("layers", check_layers), ("fade", check_fade),
+                     ("cull", check_cull), ("depth_bins", check_bins),
+                     ("galaxy", check_galaxy), ("meteors", check_meteors),
+                     ("hud", check_hud)):
+        b = fn(gfx, rng, args.trials, args.verts)
+        print("%-10s %s" % (name, "ok" if b == 0 else "%d diferencias" % b))
+        bad += b
+    sys.exit(1 if bad else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# =========================
+# EXPORT_MESH: build_airliner() -> airliner.msh (formato de mesh.py)
+# =========================
+# Corre el generador de Avion.py en el PC, guarda los arrays finales y
+# los vuelve a leer con mesh.load() para comprobar que salen iguales (y
+# que un .msh cortado o con índices fuera de rango da ValueError).
+# El .msh se copia a la Pico junto a Avion.py (o se congela como bytes).
+#
+#   python sim/export_mesh.py
+#   python sim/export_mesh.py --out /tmp/airliner.msh
+
+import os, sys, argparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import host
+
+def main():
+    ap = argparse.ArgumentParser(description="Avion.build_airliner() -> .msh")
+    ap.add_argument("--out", default=os.path.join(host.SCENE_DIR, "airliner.msh"))
+    args = ap.parse_args()
+
+    host.setup()
+    import mesh
+    import Avion
+
+    tabs = Avion.airliner_tables()
+    mesh.save(args.out, *tabs)
+
+    back = mesh.load(args.out)
+    for a, b in zip(tabs, back):
+        if [list(x) for x in a] != [list(x) for x in b]:
+            print("mesh.load no coincide con build_airliner()")
+            sys.exit(1)
+
+    # un .msh roto tiene que dar ValueError (Avion cae a build_airliner())
+    import struct
+    with open(args.out, "rb") as f:
+        good = f.read()
+    nv = len(tabs[0][0])
+    ea = mesh.HEADER_SIZE + 6 * nv          # primer índice de EA
+    bad = [good[:n] for n in (0, 5, mesh.HEADER_SIZE, 3000, len(good) - 1)]
+    bad.append(b"MSH0" + good[4:])
+    bad.append(good + b"\0\0")
+    bad.append(good[:ea] + struct.pack("<H", nv) + good[ea + 2:])
+    bad.append(good[:-2] + struct.pack("<H", len(tabs[2][0])))
+    for k, b in enumerate(bad):
+        try:
+            mesh.load(b)
+        except ValueError:
+            continue
+        print("mesh.load no rechazó el caso roto %d" % k)
+        sys.exit(1)
+
+    src, edges, fc, ed = tabs
+    print("%s: %d vértices, %d aristas, %d caras, %d bytes" % (
+        args.out, len(src[0]), len(edges[0]), len(fc[0]), os.path.getsize(args.out)))
+
+if __name__ == "__main__":
+    main()
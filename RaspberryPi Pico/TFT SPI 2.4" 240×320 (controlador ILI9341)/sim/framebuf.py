@@ -0,0 +1,371 @@
+# =========================
+# framebuf (simulador en PC)
+# =========================
+# FrameBuffer sobre numpy con la misma semántica que el módulo de
+# MicroPython: RGB565 y GS8 son vistas directas del bytearray (así los
+# memoryview / slices que hacen las escenas siguen viendo lo mismo); los
+# formatos empaquetados (MONO_*, GS2, GS4) van pixel a pixel.
+# Línea = mismo Bresenham que modframebuf.c; texto = font 8x8 (petme128).
+
+import numpy as np
+
+MONO_VLSB = 0
+MVLSB     = MONO_VLSB
+RGB565    = 1
+GS4_HMSB  = 2
+MONO_HLSB = 3
+MONO_HMSB = 4
+GS2_HMSB  = 5
+GS8       = 6
+
+# 8x8, columnas LSB arriba, chars 32..127
+FONT8X8 = bytes((
+    0x00,0x00,0x00,0x00,0x00,0x00,0x00,0x00, # 32=
+    0x00,0x00,0x00,0x4f,0x4f,0x00,0x00,0x00, # 33=!
+    0x00,0x07,0x07,0x00,0x00,0x07,0x07,0x00, # 34="
+    0x14,0x7f,0x7f,0x14,0x14,0x7f,0x7f,0x14, # 35=#
+    0x00,0x24,0x2e,0x6b,0x6b,0x3a,0x12,0x00, # 36=$
+    0x00,0x63,0x33,0x18,0x0c,0x66,0x63,0x00, # 37=%
+    0x00,0x32,0x7f,0x4d,0x4d,0x77,0x72,0x50, # 38=&
+    0x00,0x00,0x00,0x04,0x06,0x03,0x01,0x00, # 39='
+    0x00,0x00,0x1c,0x3e,0x63,0x41,0x00,0x00, # 40=(
+    0x00,0x00,0x41,0x63,0x3e,0x1c,0x00,0x00, # 41=)
+    0x08,0x2a,0x3e,0x1c,0x1c,0x3e,0x2a,0x08, # 42=*
+    0x00,0x08,0x08,0x3e,0x3e,0x08,0x08,0x00, # 43=+
+    0x00,0x00,0x80,0xe0,0x60,0x00,0x00,0x00, # 44=,
+    0x00,0x08,0x08,0x08,0x08,0x08,0x08,0x00, # 45=-
+    0x00,0x00,0x00,0x60,0x60,0x00,0x00,0x00, # 46=.
+    0x00,0x40,0x60,0x30,0x18,0x0c,0x06,0x02, # 47=/
+    0x00,0x3e,0x7f,0x49,0x45,0x7f,0x3e,0x00, # 48=0
+    0x00,0x40,0x44,0x7f,0x7f,0x40,0x40,0x00, # 49=1
+    0x00,0x62,0x73,0x51,0x49,0x4f,0x46,0x00, # 50=2
+    0x00,0x22,0x63,0x49,0x49,0x7f,0x36,0x00, # 51=3
+    0x00,0x18,0x18,0x14,0x16,0x7f,0x7f,0x10, # 52=4
+    0x00,0x27,0x67,0x45,0x45,0x7d,0x39,0x00, # 53=5
+    0x00,0x3e,0x7f,0x49,0x49,0x7b,0x32,0x00, # 54=6
+    0x00,0x03,0x03,0x79,0x7d,0x07,0x03,0x00, # 55=7
+    0x00,0x36,0x7f,0x49,0x49,0x7f,0x36,0x00, # 56=8
+    0x00,0x26,0x6f,0x49,0x49,0x7f,0x3e,0x00, # 57=9
+    0x00,0x00,0x00,0x24,0x24,0x00,0x00,0x00, # 58=:
+    0x00,0x00,0x80,0xe4,0x64,0x00,0x00,0x00, # 59=;
+    0x00,0x08,0x1c,0x36,0x63,0x41,0x41,0x00, # 60=<
+    0x00,0x14,0x14,0x14,0x14,0x14,0x14,0x00, # 61==
+    0x00,0x41,0x41,0x63,0x36,0x1c,0x08,0x00, # 62=>
+    0x00,0x02,0x03,0x51,0x59,0x0f,0x06,0x00, # 63=?
+    0x00,0x3e,0x7f,0x41,0x4d,0x4f,0x2e,0x00, # 64=@
+    0x00,0x7c,0x7e,0x0b,0x0b,0x7e,0x7c,0x00, # 65=A
+    0x00,0x7f,0x7f,0x49,0x49,0x7f,0x36,0x00, # 66=B
+    0x00,0x3e,0x7f,0x41,0x41,0x63,0x22,0x00, # 67=C
+    0x00,0x7f,0x7f,0x41,0x63,0x3e,0x1c,0x00, # 68=D
+    0x00,0x7f,0x7f,0x49,0x49,0x41,0x41,0x00, # 69=E
+    0x00,0x7f,0x7f,0x09,0x09,0x01,0x01,0x00, # 70=F
+    0x00,0x3e,0x7f,0x41,0x49,0x7b,0x3a,0x00, # 71=G
+    0x00,0x7f,0x7f,0x08,0x08,0x7f,0x7f,0x00, # 72=H
+    0x00,0x00,0x41,0x7f,0x7f,0x41,0x00,0x00, # 73=I
+    0x00,0x20,0x60,0x41,0x7f,0x3f,0x01,0x00, # 74=J
+    0x00,0x7f,0x7f,0x1c,0x36,0x63,0x41,0x00, # 75=K
+    0x00,0x7f,0x7f,0x40,0x40,0x40,0x40,0x00, # 76=L
+    0x00,0x7f,0x7f,0x06,0x0c,0x06,0x7f,0x7f, # 77=M
+    0x00,0x7f,0x7f,0x0e,0x1c,0x7f,0x7f,0x00, # 78=N
+    0x00,0x3e,0x7f,0x41,0x41,0x7f,0x3e,0x00, # 79=O
+    0x00,0x7f,0x7f,0x09,0x09,0x0f,0x06,0x00, # 80=P
+    0x00,0x1e,0x3f,0x21,0x61,0x7f,0x5e,0x00, # 81=Q
+    0x00,0x7f,0x7f,0x19,0x39,0x6f,0x46,0x00, # 82=R
+    0x00,0x26,0x6f,0x49,0x49,0x7b,0x32,0x00, # 83=S
+    0x00,0x01,0x01,0x7f,0x7f,0x01,0x01,0x00, # 84=T
+    0x00,0x3f,0x7f,0x40,0x40,0x7f,0x3f,0x00, # 85=U
+    0x00,0x1f,0x3f,0x60,0x60,0x3f,0x1f,0x00, # 86=V
+    0x00,0x7f,0x7f,0x30,0x18,0x30,0x7f,0x7f, # 87=W
+    0x00,0x63,0x77,0x1c,0x1c,0x77,0x63,0x00, # 88=X
+    0x00,0x07,0x0f,0x78,0x78,0x0f,0x07,0x00, # 89=Y
+    0x00,0x61,0x71,0x59,0x4d,0x47,0x43,0x00, # 90=Z
+    0x00,0x00,0x7f,0x7f,0x41,0x41,0x00,0x00, # 91=[
+    0x00,0x02,0x06,0x0c,0x18,0x30,0x60,0x40, # 92=\
+    0x00,0x00,0x41,0x41,0x7f,0x7f,0x00,0x00, # 93=]
+    0x00,0x08,0x0c,0x06,0x06,0x0c,0x08,0x00, # 94=^
+    0xc0,0xc0,0xc0,0xc0,0xc0,0xc0,0xc0,0xc0, # 95=_
+    0x00,0x00,0x01,0x03,0x06,0x04,0x00,0x00, # 96=`
+    0x00,0x20,0x74,0x54,0x54,0x7c,0x78,0x00, # 97=a
+    0x00,0x7f,0x7f,0x44,0x44,0x7c,0x38,0x00, # 98=b
+    0x00,0x38,0x7c,0x44,0x44,0x6c,0x28,0x00, # 99=c
+    0x00,0x38,0x7c,0x44,0x44,0x7f,0x7f,0x00, # 100=d
+    0x00,0x38,0x7c,0x54,0x54,0x5c,0x58,0x00, # 101=e
+    0x00,0x08,0x7e,0x7f,0x09,0x03,0x02,0x00, # 102=f
+    0x00,0x98,0xbc,0xa4,0xa4,0xfc,0x7c,0x00, # 103=g
+    0x00,0x7f,0x7f,0x04,0x04,0x7c,0x78,0x00, # 104=h
+    0x00,0x00,0x00,0x7d,0x7d,0x00,0x00,0x00, # 105=i
+    0x00,0x40,0xc0,0x80,0x80,0xfd,0x7d,0x00, # 106=j
+    0x00,0x7f,0x7f,0x30,0x38,0x6c,0x44,0x00, # 107=k
+    0x00,0x00,0x41,0x7f,0x7f,0x40,0x00,0x00, # 108=l
+    0x00,0x7c,0x7c,0x18,0x30,0x18,0x7c,0x7c, # 109=m
+    0x00,0x7c,0x7c,0x04,0x04,0x7c,0x78,0x00, # 110=n
+    0x00,0x38,0x7c,0x44,0x44,0x7c,0x38,0x00, # 111=o
+    0x00,0xfc,0xfc,0x24,0x24,0x3c,0x18,0x00, # 112=p
+    0x00,0x18,0x3c,0x24,0x24,0xfc,0xfc,0x00, # 113=q
+    0x00,0x7c,0x7c,0x04,0x04,0x0c,0x08,0x00, # 114=r
+    0x00,0x48,0x5c,0x54,0x54,0x74,0x24,0x00, # 115=s
+    0x00,0x04,0x04,0x3e,0x7e,0x44,0x44,0x00, # 116=t
+    0x00,0x3c,0x7c,0x40,0x40,0x7c,0x7c,0x00, # 117=u
+    0x00,0x1c,0x3c,0x60,0x60,0x3c,0x1c,0x00, # 118=v
+    0x00,0x1c,0x7c,0x70,0x38,0x70,0x7c,0x1c, # 119=w
+    0x00,0x44,0x6c,0x38,0x38,0x6c,0x44,0x00, # 120=x
+    0x00,0x9c,0xbc,0xa0,0xe0,0x7c,0x3c,0x00, # 121=y
+    0x00,0x44,0x64,0x74,0x5c,0x4c,0x44,0x00, # 122=z
+    0x00,0x08,0x08,0x3e,0x77,0x41,0x41,0x00, # 123={
+    0x00,0x00,0x00,0xff,0xff,0x00,0x00,0x00, # 124=|
+    0x00,0x41,0x41,0x77,0x3e,0x08,0x08,0x00, # 125=}
+    0x00,0x02,0x03,0x01,0x03,0x02,0x03,0x01, # 126=~
+    0xaa,0x55,0xaa,0x55,0xaa,0x55,0xaa,0x55, # 127
+))
+
+# máscara por char (8x8 bool, [y][x]) precalculada
+_GLYPHS = np.zeros((96, 8, 8), dtype=bool)
+for _c in range(96):
+    for _x in range(8):
+        _col = FONT8X8[_c * 8 + _x]
+        for _y in range(8):
+            _GLYPHS[_c, _y, _x] = (_col >> _y) & 1
+
+class FrameBuffer:
+    def __init__(self, buf, width, height, format, stride=None):
+        self.buf = buf
+        self.width = width
+        self.height = height
+        self.format = format
+        if stride is None:
+            stride = width
+        if format in (MONO_HLSB, MONO_HMSB):
+            stride = (stride + 7) & ~7
+        elif format == GS2_HMSB:
+            stride = (stride + 3) & ~3
+        elif format == GS4_HMSB:
+            stride = (stride + 1) & ~1
+        self.stride = stride
+
+        mv = memoryview(buf).cast('B')
+        if format == RGB565:
+            a = np.frombuffer(mv, dtype='<u2', count=height * stride)
+            self._px = a.reshape(height, stride)[:, :width]
+        elif format == GS8:
+            a = np.frombuffer(mv, dtype=np.uint8, count=height * stride)
+            self._px = a.reshape(height, stride)[:, :width]
+        else:
+            self._px = None
+            self._raw = np.frombuffer(mv, dtype=np.uint8)
+
+    # =========================
+    # pixel a pixel (formatos empaquetados)
+    # =========================
+    def _set(self, x, y, c):
+        if self._px is not None:
+            self._px[y, x] = c
+            return
+        raw = self._raw
+        f = self.format
+        if f == MONO_HLSB:
+            i = (x + y * self.stride) >> 3
+            o = 7 - (x & 7)
+            raw[i] = (raw[i] & (0xFF ^ (1 << o))) | ((c != 0) << o)
+        elif f == MONO_HMSB:
+            i = (x + y * self.stride) >> 3
+            o = x & 7
+            raw[i] = (raw[i] & (0xFF ^ (1 << o))) | ((c != 0) << o)
+        elif f == MONO_VLSB:
+            i = (y >> 3) * self.stride + x
+            o = y & 7
+            raw[i] = (raw[i] & (0xFF ^ (1 << o))) | ((c != 0) << o)
+        elif f == GS2_HMSB:
+            i = (x + y * self.stride) >> 2
+            sh = (x & 3) << 1
+            raw[i] = (raw[i] & (0xFF ^ (3 << sh))) | ((c & 3) << sh)
+        elif f == GS4_HMSB:
+            i = (x + y * self.stride) >> 1
+            if x & 1:
+                raw[i] = (raw[i] & 0xF0) | (c & 0x0F)
+            else:
+                raw[i] = (raw[i] & 0x0F) | ((c & 0x0F) << 4)
+
+    def _get(self, x, y):
+        if self._px is not None:
+            return int(self._px[y, x])
+        raw = self._raw
+        f = self.format
+        if f == MONO_HLSB:
+            return (raw[(x + y * self.stride) >> 3] >> (7 - (x & 7))) & 1
+        if f == MONO_HMSB:
+            return (raw[(x + y * self.stride) >> 3] >> (x & 7)) & 1
+        if f == MONO_VLSB:
+            return (raw[(y >> 3) * self.stride + x] >> (y & 7)) & 1
+        if f == GS2_HMSB:
+            return (raw[(x + y * self.stride) >> 2] >> ((x & 3) << 1)) & 3
+        if f == GS4_HMSB:
+            v = raw[(x + y * self.stride) >> 1]
+            return int(v & 0x0F) if x & 1 else int(v >> 4)
+        return 0
+
+    def _array(self):
+        # contenido como array 2D (copia para empaquetados)
+        if self._px is not None:
+            return self._px
+        out = np.zeros((self.height, self.width), dtype=np.uint16)
+        for y in range(self.height):
+            for x in range(self.width):
+                out[y, x] = self._get(x, y)
+        return out
+
+    def _mask(self, x, y, mask, c):
+        # pinta c donde mask (2D bool) es True, con clip
+        h, w = mask.shape
+        x0 = max(x, 0); y0 = max(y, 0)
+        x1 = min(x + w, self.width); y1 = min(y + h, self.height)
+        if x0 >= x1 or y0 >= y1:
+            return
+        m = mask[y0 - y:y1 - y, x0 - x:x1 - x]
+        if self._px is not None:
+            self._px[y0:y1, x0:x1][m] = c
+            return
+        ys, xs = np.nonzero(m)
+        for yy, xx in zip(ys, xs):
+            self._set(x0 + int(xx), y0 + int(yy), c)
+
+    # =========================
+    # API framebuf
+    # =========================
+    def fill(self, c):
+        self.fill_rect(0, 0, self.width, self.height, c)
+
+    def fill_rect(self, x, y, w, h, c):
+        if h < 1 or w < 1 or x + w <= 0 or y + h <= 0 or y >= self.height or x >= self.width:
+            return
+        x1 = min(self.width, x + w)
+        y1 = min(self.height, y + h)
+        x = max(x, 0)
+        y = max(y, 0)
+        if self._px is not None:
+            self._px[y:y1, x:x1] = c & (0xFFFF if self.format == RGB565 else 0xFF)
+            return
+        for yy in range(y, y1):
+            for xx in range(x, x1):
+                self._set(xx, yy, c)
+
+    def pixel(self, x, y, c=None):
+        if 0 <= x < self.width and 0 <= y < self.height:
+            if c is None:
+                return self._get(x, y)
+            self._set(x, y, c & (0xFFFF if self.format == RGB565 else 0xFF))
+        return None
+
+    def hline(self, x, y, w, c):
+        self.fill_rect(x, y, w, 1, c)
+
+    def vline(self, x, y, h, c):
+        self.fill_rect(x, y, 1, h, c)
+
+    def rect(self, x, y, w, h, c, f=False):
+        if f:
+            self.fill_rect(x, y, w, h, c)
+            return
+        self.fill_rect(x, y, w, 1, c)
+        self.fill_rect(x, y + h - 1, w, 1, c)
+        self.fill_rect(x, y, 1, h, c)
+        self.fill_rect(x + w - 1, y, 1, h, c)
+
+    def line(self, x1, y1, x2, y2, c):
+        # Bresenham igual que modframebuf.c
+        dx = x2 - x1
+        if dx > 0:
+            sx = 1
+        else:
+            dx = -dx
+            sx = -1
+        dy = y2 - y1
+        if dy > 0:
+            sy = 1
+        else:
+            dy = -dy
+            sy = -1
+        steep = dy > dx
+        if steep:
+            x1, y1 = y1, x1
+            dx, dy = dy, dx
+            sx, sy = sy, sx
+
+        w = self.width
+        h = self.height
+        xs = []
+        ys = []
+        e = 2 * dy - dx
+        for _ in range(dx):
+            if steep:
+                if 0 <= y1 < w and 0 <= x1 < h:
+                    xs.append(y1); ys.append(x1)
+            else:
+                if 0 <= x1 < w and 0 <= y1 < h:
+                    xs.append(x1); ys.append(y1)
+            while e >= 0:
+                y1 += sy
+                e -= 2 * dx
+            x1 += sx
+            e += 2 * dy
+        if 0 <= x2 < w and 0 <= y2 < h:
+            xs.append(x2); ys.append(y2)
+
+        if not xs:
+            return
+        if self._px is not None:
+            self._px[ys, xs] = c & (0xFFFF if self.format == RGB565 else 0xFF)
+        else:
+            for xx, yy in zip(xs, ys):
+                self._set(xx, yy, c)
+
+    def text(self, s, x, y, c=1):
+        if isinstance(s, (bytes, bytearray)):
+            s = s.decode()
+        for ch in s:
+            code = ord(ch)
+            if code < 32 or code > 127:
+                code = 127
+            self._mask(x, y, _GLYPHS[code - 32], c)
+            x += 8
+
+    def blit(self, fbuf, x, y, key=-1, palette=None):
+        if isinstance(fbuf, tuple):
+            fbuf = FrameBuffer(*fbuf)
+        src = fbuf._array().astype(np.int64)
+        if palette is not None:
+            lut = palette._array()[0].astype(np.int64)
+            src = lut[src]
+        mask = np.ones(src.shape, dtype=bool) if key == -1 else (src != key)
+
+        h, w = src.shape
+        x0 = max(x, 0); y0 = max(y, 0)
+        x1 = min(x + w, self.width); y1 = min(y + h, self.height)
+        if x0 >= x1 or y0 >= y1:
+            return
+        s = src[y0 - y:y1 - y, x0 - x:x1 - x]
+        m = mask[y0 - y:y1 - y, x0 - x:x1 - x]
+        if self._px is not None:
+            dst = self._px[y0:y1, x0:x1]
+            dst[m] = s[m]
+            return
+        ys, xs = np.nonzero(m)
+        for yy, xx in zip(ys, xs):
+            self._set(x0 + int(xx), y0 + int(yy), int(s[yy, xx]))
+
+    def scroll(self, xstep, ystep):
+        # como MicroPython: lo que queda descubierto no se toca
+        a = self._array().copy()
+        h, w = a.shape
+        if abs(xstep) >= w or abs(ystep) >= h:
+            return
+        sx0 = max(0, -xstep); sx1 = w - max(0, xstep)
+        sy0 = max(0, -ystep); sy1 = h - max(0, ystep)
+        part = a[sy0:sy1, sx0:sx1]
+        dx0 = sx0 + xstep
+        dy0 = sy0 + ystep
+        if self._px is not None:
+            self._px[dy0:dy0 + part.shape[0], dx0:dx0 + part.shape[1]] = part
+            return
+        for yy in range(part.shape[0]):
+            for xx in range(part.shape[1]):
+                self._set(dx0 + xx, dy0 + yy, int(part[yy, xx]))
@@ -0,0 +1,151 @@
+# =========================
+# HOST: arranque del simulador en PC
+# =========================
+# setup() pone sim/ y la carpeta de escenas en sys.path, agrega a time y
+# gc lo que tiene MicroPython (ticks_ms, sleep_ms, mem_free, ...) y deja
+# listo gfxcore con el ILI9341 falso. Después las escenas corren igual
+# que en la Pico:
+#
+#   import host
+#   host.setup()
+#   sc = host.load_scene("Dona")
+#   ...
+
+import os, sys, time, gc, zlib, struct
+
+SIM_DIR   = os.path.dirname(os.path.abspath(__file__))
+SCENE_DIR = os.path.dirname(SIM_DIR)
+
+TICKS_PERIOD = 1 << 30
+
+_t0 = time.perf_counter_ns()
+_real_sleep = time.sleep
+_realtime = False
+
+# =========================
+# Shims de time / gc
+# =========================
+def ticks_ms():
+    return ((time.perf_counter_ns() - _t0) // 1_000_000) & (TICKS_PERIOD - 1)
+
+def ticks_us():
+    return ((time.perf_counter_ns() - _t0) // 1_000) & (TICKS_PERIOD - 1)
+
+def ticks_cpu():
+    return ticks_us()
+
+def ticks_diff(a, b):
+    half = TICKS_PERIOD // 2
+    return ((a - b + half) & (TICKS_PERIOD - 1)) - half
+
+def ticks_add(t, d):
+    return (t + d) & (TICKS_PERIOD - 1)
+
+def sleep(s):
+    if _realtime:
+        _real_sleep(s)
+
+def sleep_ms(ms):
+    if _realtime and ms > 0:
+        _real_sleep(ms / 1000)
+
+def sleep_us(us):
+    if _realtime and us > 0:
+        _real_sleep(us / 1_000_000)
+
+def mem_alloc():
+    import tracemalloc
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[0]
+    return 0
+
+def mem_free():
+    return 0
+
+# =========================
+# Punteros de viper
+# =========================
+# En la Pico ptr8/ptr16/ptr32 los entiende el compilador viper; aquí son
+# vistas sin signo (memoryview) puestas en builtins para que los kernels
+# corran como Python normal.
+def ptr8(a):
+    return memoryview(a).cast('B')
+
+def ptr16(a):
+    return memoryview(a).cast('B').cast('H')
+
+def ptr32(a):
+    return memoryview(a).cast('B').cast('i')
+
+def setup(realtime=False, threads=False):
+    # realtime=False: sleep_ms no duerme (corre lo más rápido posible)
+    # threads=False: presenter en modo "sync" (tiempos deterministas)
+    global _realtime
+    _realtime = realtime
+
+    for p in (SCENE_DIR, SIM_DIR):
+        if p in sys.path:
+            sys.path.remove(p)
+        sys.path.insert(0, p)
+
+    time.ticks_ms = ticks_ms
+    time.ticks_us = ticks_us
+    time.ticks_cpu = ticks_cpu
+    time.ticks_diff = ticks_diff
+    time.ticks_add = ticks_add
+    time.sleep_ms = sleep_ms
+    time.sleep_us = sleep_us
+    time.sleep = sleep
+
+    gc.mem_alloc = mem_alloc
+    gc.mem_free = mem_free
+
+    import builtins
+    builtins.ptr8 = ptr8
+    builtins.ptr16 = ptr16
+    builtins.ptr32 = ptr32
+
+    if not threads:
+        import presenter
+        presenter._thread = None
+
+    import gfxcore
+    return gfxcore
+
+# =========================
+# Escenas
+# =========================
+def load_scene(mod_name):
+    # instancia la (única) subclase de Scene definida en el módulo
+    from scene import Scene
+    mod = __import__(mod_name)
+    for v in vars(mod).values():
+        if isinstance(v, type) and issubclass(v, Scene) and v is not Scene \
+                and v.__module__ == mod.__name__:
+            return v()
+    raise ValueError("no hay Scene en " + mod_name)
+
+SCENES = ("Dona", "Galaxia", "Neural mesh", "Tierra-luna", "Avion")
+
+# =========================
+# PNG (sin Pillow)
+# =========================
+def write_png(path, rgb):
+    # rgb: array (H, W, 3) uint8
+    h, w = rgb.shape[0], rgb.shape[1]
+    raw = b"".join(b"\x00" + rgb[y].tobytes() for y in range(h))
+
+    def chunk(tag, data):
+        c = struct.pack(">I", len(data)) + tag + data
+        return c + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", w, h, 8, 2, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(raw, 6)))
+        f.write(chunk(b"IEND", b""))
+
+def screenshot(path):
+    # lo que tiene el panel (GRAM), no el framebuffer
+    import gfxcore
+    write_png(path, gfxcore.tft.rgb888())
@@ -0,0 +1,81 @@
+# =========================
+# ili9341 (simulador en PC)
+# =========================
+# Misma interfaz que usa gfxcore: color565(), ILI9341(...), _begin_write,
+# _end_write y .spi. Lo que entra por SPI dentro de una ventana se
+# escribe en una GRAM de numpy, así los PNG muestran lo que de verdad
+# llegaría al panel (blit parcial incluido).
+
+import numpy as np
+
+def color565(r, g, b):
+    # RGB565 con bytes invertidos: el framebuffer guarda little-endian y
+    # el panel lee big-endian
+    v = ((r & 0xF8) << 8) | ((g & 0xFC) << 3) | (b >> 3)
+    return ((v & 0xFF) << 8) | (v >> 8)
+
+class ILI9341:
+    def __init__(self, spi, cs=None, dc=None, rst=None, width=240, height=320,
+                 rotation=0, bgr=True):
+        self.spi = spi
+        self.width = width
+        self.height = height
+        self.rotation = rotation
+        self.bgr = bgr
+
+        # GRAM en RGB565 estándar (como la guarda el panel)
+        self.gram = np.zeros((height, width), dtype=np.uint16)
+
+        self.windows = 0     # ventanas _begin_write abiertas
+        self._win = None
+        self._pos = 0
+        self._odd = None     # byte suelto entre dos write()
+
+        spi.display = self
+
+    def _begin_write(self, x0, y0, x1, y1):
+        self.windows += 1
+        self._win = (x0, y0, x1, y1)
+        self._pos = 0
+        self._odd = None
+
+    def _end_write(self):
+        self._win = None
+
+    def _feed(self, data):
+        if self._win is None:
+            return
+        raw = bytes(memoryview(data).cast('B'))
+        if self._odd is not None:
+            raw = self._odd + raw
+            self._odd = None
+        if len(raw) & 1:
+            self._odd = raw[-1:]
+            raw = raw[:-1]
+
+        px = np.frombuffer(raw, dtype='>u2')
+        x0, y0, x1, y1 = self._win
+        ww = x1 - x0 + 1
+        total = ww * (y1 - y0 + 1)
+
+        i = 0
+        n = len(px)
+        while i < n and self._pos < total:
+            row = self._pos // ww
+            col = self._pos % ww
+            m = min(ww - col, n - i)
+            self.gram[y0 + row, x0 + col:x0 + col + m] = px[i:i + m]
+            i += m
+            self._pos += m
+
+    def rgb888(self):
+        # GRAM -> array (H, W, 3) uint8 para PNG
+        g = self.gram.astype(np.uint32)
+        r = (g >> 11) & 0x1F
+        gg = (g >> 5) & 0x3F
+        b = g & 0x1F
+        out = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        out[..., 0] = (r * 255 + 15) // 31
+        out[..., 1] = (gg * 255 + 31) // 63
+        out[..., 2] = (b * 255 + 15) // 31
+        return out
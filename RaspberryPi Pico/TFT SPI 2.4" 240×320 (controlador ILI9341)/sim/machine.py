@@ -0,0 +1,68 @@
+# =========================
+# machine (simulador en PC)
+# =========================
+# Lo mínimo que usan las escenas: Pin (con niveles que el host puede
+# cambiar para simular el kill switch / botón) y un SPI que cuenta bytes
+# y reenvía los datos al ILI9341 falso para que "pinte" su GRAM.
+
+_levels = {}
+
+def set_pin(pin_id, level):
+    # simula un botón: set_pin(22, 0) == GP22 a GND
+    _levels[pin_id] = level
+
+def freq(hz=None):
+    return 125_000_000
+
+class Pin:
+    IN = 0
+    OUT = 1
+    OPEN_DRAIN = 2
+    PULL_UP = 1
+    PULL_DOWN = 2
+
+    def __init__(self, pin_id, mode=-1, pull=-1, value=None):
+        self.id = pin_id
+        if pin_id not in _levels:
+            _levels[pin_id] = 0 if pull == Pin.PULL_DOWN else 1
+        if value is not None:
+            _levels[pin_id] = 1 if value else 0
+
+    def value(self, v=None):
+        if v is None:
+            return _levels[self.id]
+        _levels[self.id] = 1 if v else 0
+
+    def on(self):
+        _levels[self.id] = 1
+
+    def off(self):
+        _levels[self.id] = 0
+
+    def __call__(self, v=None):
+        return self.value(v)
+
+class SPI:
+    def __init__(self, spi_id, baudrate=1_000_000, polarity=0, phase=0,
+                 bits=8, firstbit=0, sck=None, mosi=None, miso=None):
+        self.id = spi_id
+        self.baudrate = baudrate
+        self.bytes = 0       # bytes totales mandados
+        self.writes = 0      # llamadas a write()
+        self.display = None  # lo conecta ili9341.ILI9341
+
+    def write(self, data):
+        n = len(memoryview(data).cast('B'))
+        self.bytes += n
+        self.writes += 1
+        if self.display is not None:
+            self.display._feed(data)
+
+    def read(self, nbytes, write=0x00):
+        return bytes(nbytes)
+
+    def write_readinto(self, write_buf, read_buf):
+        self.write(write_buf)
+
+    def deinit(self):
+        pass
@@ -0,0 +1,20 @@
+# =========================
+# micropython (simulador en PC)
+# =========================
+# Los decoradores de emisor no hacen nada en CPython; el código con
+# @micropython.viper debe traer su fallback en Python puro.
+
+def const(x):
+    return x
+
+def native(f):
+    return f
+
+def viper(f):
+    return f
+
+def mem_info(verbose=False):
+    pass
+
+def alloc_emergency_exception_buf(size):
+    pass
@@ -0,0 +1,57 @@
+# =========================
+# Corre una escena sin hardware y guarda PNGs
+# =========================
+#   python sim/run.py Dona --frames 120 --png out --every 10
+#   python sim/run.py "Neural mesh" --realtime
+#   python sim/run.py all --frames 60
+
+import os, sys, time, argparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import host
+
+def run_one(gfx, name, frames, png_dir, every):
+    from scene import step
+    sc = host.load_scene(name)
+    spi = gfx.tft.spi
+    b0 = spi.bytes
+    w0 = gfx.tft.windows
+
+    sc.init()
+    t0 = time.perf_counter()
+    try:
+        for frame in range(frames):
+            step(sc, frame)
+            if png_dir and (frame % every) == 0:
+                gfx.pres.wait()
+                fname = "%s_%04d.png" % (name.replace(" ", "_"), frame)
+                host.screenshot(os.path.join(png_dir, fname))
+    finally:
+        sc.teardown()
+    dt = time.perf_counter() - t0
+
+    n = max(frames, 1)
+    print("%-12s %4d frames  %7.2f ms/frame  %8d bytes/frame  %5.1f ventanas/frame" % (
+        name, frames, dt * 1000 / n, (spi.bytes - b0) // n,
+        (gfx.tft.windows - w0) / n))
+
+def main():
+    ap = argparse.ArgumentParser(description="Simulador headless de las escenas ILI9341")
+    ap.add_argument("scene", help='módulo de la escena (Dona, Galaxia, "Neural mesh", Tierra-luna, Avion) o "all"')
+    ap.add_argument("--frames", type=int, default=60)
+    ap.add_argument("--png", default=None, help="carpeta para los PNG")
+    ap.add_argument("--every", type=int, default=10, help="un PNG cada N frames")
+    ap.add_argument("--realtime", action="store_true", help="respeta FRAME_MS (sleep_ms real)")
+    ap.add_argument("--threads", action="store_true", help="presenter con _thread (doble buffer)")
+    args = ap.parse_args()
+
+    gfx = host.setup(realtime=args.realtime, threads=args.threads)
+    if args.png:
+        os.makedirs(args.png, exist_ok=True)
+
+    names = host.SCENES if args.scene == "all" else (args.scene,)
+    for name in names:
+        run_one(gfx, name, args.frames, args.png, max(args.every, 1))
+
+if __name__ == "__main__":
+    main()